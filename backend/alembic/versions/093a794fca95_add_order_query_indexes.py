@@ -0,0 +1,78 @@
+"""Add order indexes matching the listing, export and rollup queries
+
+Revision ID: 093a794fca95
+Revises: 7642c4e8a7d3
+Create Date: 2026-10-17 11:48:52.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '093a794fca95'
+down_revision: Union[str, Sequence[str], None] = '7642c4e8a7d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build without blocking writes on a populated table
+    with op.get_context().autocommit_block():
+        # ?status= and ?customer_id= listings, already sorted by (order_date, id)
+        op.create_index(
+            'ix_orders_status_order_date_id',
+            'orders',
+            ['status', 'order_date', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_orders_customer_id_order_date_id',
+            'orders',
+            ['customer_id', 'order_date', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        # Index-only scans for the per-day totals of rollup rebuilds and checks
+        op.create_index(
+            'ix_orders_utc_date_currency',
+            'orders',
+            [sa.text("date(timezone('UTC', order_date))"), 'currency'],
+            unique=False,
+            postgresql_include=['total_amount'],
+            postgresql_concurrently=True,
+        )
+        # The primary key already indexes id, and customer_id is the leading column
+        # of ix_orders_customer_id_order_date_id
+        op.drop_index('ix_orders_id', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_orders_customer_id', table_name='orders', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_customer_id',
+            'orders',
+            ['customer_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_orders_id', 'orders', ['id'], unique=False, postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_orders_utc_date_currency', table_name='orders', postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_orders_customer_id_order_date_id',
+            table_name='orders',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_orders_status_order_date_id', table_name='orders', postgresql_concurrently=True
+        )
@@ -0,0 +1,165 @@
+"""Partition orders by month on order_date
+
+Revision ID: 5b0e2f4c9a17
+Revises: 093a794fca95
+Create Date: 2026-10-17 12:21:40.118264
+
+Rebuilds orders as a table partitioned by RANGE (order_date), see app/partitions.py.
+The rows are copied inside the migration's transaction, which holds an exclusive lock on
+orders throughout; plan a maintenance window for large tables.
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0e2f4c9a17'
+down_revision: Union[str, Sequence[str], None] = '093a794fca95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions created ahead of the current month; `python -m app.cli partitions` keeps
+# this window moving
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    'id, order_id, customer_id, order_date, total_amount, currency, status, '
+    'created_at, updated_at'
+)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_indexes(unique_order_id: bool) -> None:
+    op.create_index('ix_orders_order_id', 'orders', ['order_id'], unique=unique_order_id)
+    op.create_index('ix_orders_order_date_id', 'orders', ['order_date', 'id'])
+    op.create_index('ix_orders_status_order_date_id', 'orders', ['status', 'order_date', 'id'])
+    op.create_index(
+        'ix_orders_customer_id_order_date_id', 'orders', ['customer_id', 'order_date', 'id']
+    )
+    op.create_index(
+        'ix_orders_utc_date_currency',
+        'orders',
+        [sa.text("date(timezone('UTC', order_date))"), 'currency'],
+        postgresql_include=['total_amount'],
+    )
+
+
+def _drop_indexes() -> None:
+    for name in (
+        'ix_orders_order_id',
+        'ix_orders_order_date_id',
+        'ix_orders_status_order_date_id',
+        'ix_orders_customer_id_order_date_id',
+        'ix_orders_utc_date_currency',
+    ):
+        op.execute(f'DROP INDEX {name}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Index names are schema-wide, so the old table gives its names up first
+    op.rename_table('orders', 'orders_unpartitioned')
+    op.execute(
+        'ALTER TABLE orders_unpartitioned RENAME CONSTRAINT orders_pkey TO orders_unpartitioned_pkey'
+    )
+    _drop_indexes()
+    # Keep the id sequence alive when the old table is dropped
+    op.execute('ALTER SEQUENCE orders_id_seq OWNED BY NONE')
+
+    # Primary keys of partitioned tables must contain the partition key
+    op.execute("""
+        CREATE TABLE orders (
+            id integer NOT NULL DEFAULT nextval('orders_id_seq'::regclass),
+            order_id varchar NOT NULL,
+            customer_id varchar NOT NULL,
+            order_date timestamptz NOT NULL DEFAULT now(),
+            total_amount integer NOT NULL,
+            currency varchar(3) NOT NULL,
+            status varchar NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT orders_pkey PRIMARY KEY (id, order_date)
+        ) PARTITION BY RANGE (order_date)
+    """)
+    op.execute('ALTER SEQUENCE orders_id_seq OWNED BY orders.id')
+    op.execute('CREATE TABLE orders_default PARTITION OF orders DEFAULT')
+
+    # One partition per UTC month from the oldest order until MONTHS_AHEAD from now,
+    # or the newest order if that is later
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    first, last = current, _add_months(current, MONTHS_AHEAD)
+    if not context.is_offline_mode():
+        oldest, newest = op.get_bind().execute(
+            sa.text(
+                "SELECT min(order_date AT TIME ZONE 'UTC')::date, "
+                "max(order_date AT TIME ZONE 'UTC')::date FROM orders_unpartitioned"
+            )
+        ).one()
+        if oldest is not None:
+            first = min(first, oldest.replace(day=1))
+            last = max(last, newest.replace(day=1))
+    month = first
+    while month <= last:
+        following = _add_months(month, 1)
+        op.execute(
+            f'CREATE TABLE orders_p{month:%Y_%m} PARTITION OF orders '
+            f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{following} 00:00:00+00')"
+        )
+        month = following
+
+    # order_id stays unique across partitions through a key table kept by a trigger.
+    # Rows moving between partitions fire DELETE and then INSERT.
+    op.create_table(
+        'order_ids',
+        sa.Column('order_id', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('order_id'),
+    )
+    op.execute("""
+        CREATE FUNCTION orders_sync_order_ids() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                DELETE FROM order_ids WHERE order_id = OLD.order_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO order_ids (order_id) VALUES (NEW.order_id);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER orders_sync_order_ids
+        AFTER INSERT OR DELETE OR UPDATE OF order_id ON orders
+        FOR EACH ROW EXECUTE FUNCTION orders_sync_order_ids()
+    """)
+
+    op.execute(f'INSERT INTO orders ({COLUMNS}) SELECT {COLUMNS} FROM orders_unpartitioned')
+    # Indexes on the parent cascade to every partition; building them after the copy
+    # is faster than maintaining them row by row
+    _create_indexes(unique_order_id=False)
+    op.drop_table('orders_unpartitioned')
+    op.execute('ANALYZE orders')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Detached partitions are left alone; reattach them first to keep their rows
+    op.execute('CREATE TABLE orders_unpartitioned (LIKE orders INCLUDING DEFAULTS)')
+    op.execute(f'INSERT INTO orders_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM orders')
+    op.execute('ALTER SEQUENCE orders_id_seq OWNED BY NONE')
+    op.drop_table('orders')
+    op.drop_table('order_ids')
+    op.execute('DROP FUNCTION orders_sync_order_ids()')
+
+    op.rename_table('orders_unpartitioned', 'orders')
+    op.create_primary_key('orders_pkey', 'orders', ['id'])
+    op.execute('ALTER SEQUENCE orders_id_seq OWNED BY orders.id')
+    _create_indexes(unique_order_id=True)
@@ -0,0 +1,46 @@
+"""Add fx_rates table
+
+Revision ID: 7642c4e8a7d3
+Revises: e8c45e1073fc
+Create Date: 2026-10-17 11:02:17.504311
+
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7642c4e8a7d3'
+down_revision: Union[str, Sequence[str], None] = 'e8c45e1073fc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    fx_rates = op.create_table('fx_rates',
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('effective_date', sa.Date(), nullable=False),
+    sa.Column('rate', sa.Numeric(precision=18, scale=8), nullable=False),
+    sa.PrimaryKeyConstraint('currency', 'effective_date')
+    )
+
+    # Starting rates in ISK, valid for all existing orders. The first six are the
+    # rates the admin frontend used to hard-code; replace them via PUT /fx-rates.
+    op.bulk_insert(fx_rates, [
+        {'currency': currency, 'effective_date': date(1970, 1, 1), 'rate': Decimal(rate)}
+        for currency, rate in [
+            ('ISK', '1'), ('USD', '138.89'), ('EUR', '153.85'), ('GBP', '175.45'),
+            ('SEK', '13.86'), ('NOK', '12.84'), ('CAD', '100.52'), ('AUD', '90.41'),
+            ('JPY', '0.93'), ('CHF', '157.12'), ('DKK', '20.62'),
+        ]
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('fx_rates')
@@ -0,0 +1,50 @@
+"""Add customer_stats table
+
+Revision ID: d91f3b7c2e48
+Revises: c3e8a1d5f260
+Create Date: 2026-10-17 16:21:05.402931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd91f3b7c2e48'
+down_revision: Union[str, Sequence[str], None] = 'c3e8a1d5f260'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('customer_stats',
+    sa.Column('customer_id', sa.String(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('revenue_sum', sa.BigInteger(), nullable=False),
+    sa.Column('last_order_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('customer_id', 'currency')
+    )
+
+    # Backfill from existing orders, like app/customers.py rebuild()
+    op.execute(
+        """
+        INSERT INTO customer_stats (customer_id, currency, order_count, revenue_sum, last_order_at)
+        SELECT customer_id, currency, count(*), sum(total_amount), max(order_date)
+        FROM orders
+        GROUP BY customer_id, currency
+        """
+    )
+
+    op.create_index('ix_customer_stats_currency_revenue', 'customer_stats', ['currency', 'revenue_sum', 'customer_id'], unique=False)
+    op.create_index('ix_customer_stats_currency_orders', 'customer_stats', ['currency', 'order_count', 'customer_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_customer_stats_currency_orders', table_name='customer_stats')
+    op.drop_index('ix_customer_stats_currency_revenue', table_name='customer_stats')
+    op.drop_table('customer_stats')
@@ -0,0 +1,67 @@
+"""Add indexes for searching orders by order_id and customer_id
+
+Revision ID: e4a7c2d9b513
+Revises: d91f3b7c2e48
+Create Date: 2026-10-17 17:02:44.519307
+
+text_pattern_ops b-trees serve exact and prefix searches, pg_trgm GIN indexes substring
+searches, both on lower() of the column, see app/search.py. orders is partitioned and
+CREATE INDEX CONCURRENTLY does not work on a partitioned table, so each index is
+created on the parent only (invalid until complete), built concurrently on every
+partition and attached there. Writes to orders are not blocked while the indexes build.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c2d9b513'
+down_revision: Union[str, Sequence[str], None] = 'd91f3b7c2e48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name: (method, indexed expression with operator class)
+INDEXES = {
+    'ix_orders_order_id_lower_pattern': ('btree', 'lower(order_id) text_pattern_ops'),
+    'ix_orders_customer_id_lower_pattern': ('btree', 'lower(customer_id) text_pattern_ops'),
+    'ix_orders_order_id_trgm': ('gin', 'lower(order_id) gin_trgm_ops'),
+    'ix_orders_customer_id_trgm': ('gin', 'lower(customer_id) gin_trgm_ops'),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    if context.is_offline_mode():
+        # No partitions to look up; the statement locks out writes while it builds
+        for name, (method, expression) in INDEXES.items():
+            op.execute(f'CREATE INDEX {name} ON orders USING {method} ({expression})')
+        return
+
+    partitions = op.get_bind().execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'orders'::regclass ORDER BY c.relname"
+        )
+    ).scalars().all()
+    for name, (method, expression) in INDEXES.items():
+        op.execute(f'CREATE INDEX {name} ON ONLY orders USING {method} ({expression})')
+    with op.get_context().autocommit_block():
+        for name, (method, expression) in INDEXES.items():
+            for partition in partitions:
+                partition_index = f'{partition}_{name.removeprefix("ix_orders_")}'
+                op.execute(
+                    f'CREATE INDEX CONCURRENTLY {partition_index} '
+                    f'ON {partition} USING {method} ({expression})'
+                )
+                op.execute(f'ALTER INDEX {name} ATTACH PARTITION {partition_index}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Dropping the parent indexes drops the attached partition indexes too
+    for name in reversed(INDEXES):
+        op.drop_index(name, table_name='orders')
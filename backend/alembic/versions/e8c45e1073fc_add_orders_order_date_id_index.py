@@ -0,0 +1,37 @@
+"""Add (order_date, id) index for keyset pagination
+
+Revision ID: e8c45e1073fc
+Revises: ed809009ae92
+Create Date: 2026-10-17 10:41:07.502913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c45e1073fc'
+down_revision: Union[str, Sequence[str], None] = 'ed809009ae92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build without blocking writes on a populated table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_orders_order_date_id',
+            'orders',
+            ['order_date', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_order_date_id', table_name='orders', postgresql_concurrently=True)
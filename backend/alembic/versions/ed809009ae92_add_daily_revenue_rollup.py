@@ -0,0 +1,44 @@
+"""Add daily_revenue rollup table
+
+Revision ID: ed809009ae92
+Revises: 20a2128406fd
+Create Date: 2026-10-17 09:12:40.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ed809009ae92'
+down_revision: Union[str, Sequence[str], None] = '20a2128406fd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_revenue',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('revenue_sum', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('date', 'currency')
+    )
+
+    # Backfill from existing orders, bucketed by UTC date like app/rollup.py
+    op.execute(
+        """
+        INSERT INTO daily_revenue (date, currency, order_count, revenue_sum)
+        SELECT date(timezone('UTC', order_date)), currency, count(id), sum(total_amount)
+        FROM orders
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('daily_revenue')
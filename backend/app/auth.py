@@ -1,23 +1,274 @@
-from fastapi import Security, HTTPException, status
-from fastapi.security import APIKeyHeader
+"""
+API key authentication and scopes.
+
+Every integration gets its own key, created and revoked with `python -m app.cli
+api-keys`. The api_keys table stores only the SHA-256 of each key. Keys are 32 random
+bytes, so a fast hash is as strong as a slow one and keeps verification cheap. The
+API_KEY setting stays valid as a key with every scope; it is compared digest to digest
+with hmac.compare_digest, and stored keys are found by their digest, so response
+times reveal nothing about the key itself.
+
+Verified digests are kept in an in-process LRU cache for API_KEY_CACHE_TTL_SECONDS.
+Most requests therefore cost one hash and one dict lookup instead of a database round
+trip. Unknown keys are cached too, so that repeated bad keys do not reach the database.
+Revocations through the CLI take effect once the TTL has passed. A cache miss looks the
+key up in a short session of its own.
+
+Each verified request then takes a token from the key's rate limit bucket for the
+route (see app.ratelimit). Endpoints declare their API key before their database
+session, so a request rejected with 401, 403 or 429 never checks out a connection for
+its handler.
+
+Usage counts and last-used times are accumulated in memory and written to api_keys
+in one batch every API_KEY_USAGE_FLUSH_SECONDS.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from fastapi import Depends, HTTPException, Request, Security, status
+from fastapi.security import APIKeyHeader, SecurityScopes
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app import models, ratelimit
 from app.config import settings
+from app.database import AsyncSessionLocal, get_session_factory
+
+logger = logging.getLogger(__name__)
 
 # Define the header name
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
+SCOPES = ("orders:read", "orders:write", "fx:read", "fx:write")
+DEFAULT_SCOPES = ("orders:read",)
+KEY_PREFIX = "osk_"
+
+
+@dataclass(frozen=True)
+class ApiKeyPrincipal:
+    """The caller behind a verified API key"""
+
+    key_hash: str
+    name: str
+    scopes: frozenset[str]
+    # None for the API_KEY setting, which has no api_keys row
+    id: int | None = None
+
+
+def hash_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+def generate_key() -> str:
+    return KEY_PREFIX + secrets.token_urlsafe(32)
+
+
+class KeyCache:
+    """LRU cache of key digest -> principal (None for unknown keys) with a TTL"""
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: OrderedDict[str, tuple[float, ApiKeyPrincipal | None]] = OrderedDict()
+
+    def get(self, key_hash: str) -> tuple[bool, ApiKeyPrincipal | None]:
+        """(True, principal) on a hit, (False, None) on a miss or expired entry"""
+        entry = self._entries.get(key_hash)
+        if entry is None:
+            return False, None
+        expires, principal = entry
+        if expires <= self.clock():
+            del self._entries[key_hash]
+            return False, None
+        self._entries.move_to_end(key_hash)
+        return True, principal
+
+    def put(self, key_hash: str, principal: ApiKeyPrincipal | None):
+        self._entries[key_hash] = (self.clock() + self.ttl, principal)
+        self._entries.move_to_end(key_hash)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, key_hash: str):
+        self._entries.pop(key_hash, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class UsageCounter:
+    """Per-key request counts waiting to be written to api_keys"""
+
+    def __init__(self):
+        self._counts: dict[int, int] = {}
+        self._last_used: dict[int, datetime] = {}
+
+    def record(self, key_id: int):
+        self._counts[key_id] = self._counts.get(key_id, 0) + 1
+        self._last_used[key_id] = datetime.now(timezone.utc)
+
+    def pending(self) -> dict[int, int]:
+        return dict(self._counts)
 
-async def verify_api_key(api_key: str = Security(api_key_header)):
-    """Verify API key from header"""
+    async def flush(self, session_factory=None) -> int:
+        """Write the pending counts in one executemany UPDATE; returns the keys updated"""
+        counts, last_used = self._counts, self._last_used
+        if not counts:
+            return 0
+        self._counts, self._last_used = {}, {}
+
+        table = models.ApiKey.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("key_id"))
+            .values(
+                request_count=table.c.request_count + bindparam("count"),
+                last_used_at=bindparam("last_used"),
+            )
+        )
+        rows = [
+            {"key_id": key_id, "count": count, "last_used": last_used[key_id]}
+            for key_id, count in counts.items()
+        ]
+        try:
+            async with (session_factory or AsyncSessionLocal)() as db:
+                await db.execute(stmt, rows)
+                await db.commit()
+        except Exception:
+            # Keep the counts for the next attempt rather than losing them
+            for key_id, count in counts.items():
+                self._counts[key_id] = self._counts.get(key_id, 0) + count
+                self._last_used.setdefault(key_id, last_used[key_id])
+            raise
+        return len(rows)
+
+
+key_cache = KeyCache(settings.api_key_cache_size, settings.api_key_cache_ttl_seconds)
+usage = UsageCounter()
+
+_SETTINGS_KEY = ApiKeyPrincipal(
+    key_hash=hash_key(settings.api_key), name="API_KEY", scopes=frozenset(SCOPES)
+)
+
+
+async def flush_usage_periodically(interval: float):
+    """Background task flushing usage counts, and once more when cancelled"""
+
+    async def flush():
+        try:
+            await usage.flush()
+        except Exception:
+            logger.exception("Failed to flush API key usage counts")
+
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await flush()
+    finally:
+        await flush()
+
+
+async def lookup(db: AsyncSession, key_hash: str) -> ApiKeyPrincipal | None:
+    """The active key with this digest, from the database"""
+    row = (
+        await db.execute(
+            select(models.ApiKey.id, models.ApiKey.name, models.ApiKey.scopes).where(
+                models.ApiKey.key_hash == key_hash, models.ApiKey.revoked_at.is_(None)
+            )
+        )
+    ).one_or_none()
+    if row is None:
+        return None
+    return ApiKeyPrincipal(
+        key_hash=key_hash, name=row.name, scopes=frozenset(row.scopes.split()), id=row.id
+    )
+
+
+async def authenticate(session_factory: async_sessionmaker, api_key: str) -> ApiKeyPrincipal | None:
+    """The principal for api_key, or None if it is unknown or revoked"""
+    key_hash = hash_key(api_key)
+    if hmac.compare_digest(key_hash, _SETTINGS_KEY.key_hash):
+        return _SETTINGS_KEY
+
+    hit, principal = key_cache.get(key_hash)
+    if not hit:
+        async with session_factory() as db:
+            principal = await lookup(db, key_hash)
+        key_cache.put(key_hash, principal)
+    return principal
+
+
+async def verify_api_key(
+    request: Request,
+    security_scopes: SecurityScopes,
+    api_key: str = Security(api_key_header),
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+) -> ApiKeyPrincipal:
+    """Verify API key from header, check its scopes and take a rate limit token"""
     if api_key is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="API key is missing",
         )
 
-    if api_key != settings.api_key:
+    principal = await authenticate(session_factory, api_key)
+    if principal is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid API key",
         )
 
+    missing = [scope for scope in security_scopes.scopes if scope not in principal.scopes]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"API key lacks scope: {', '.join(missing)}",
+        )
+
+    await ratelimit.limiter.check(request, principal.key_hash)
+
+    if principal.id is not None:
+        usage.record(principal.id)
+    return principal
+
+
+def create_key(db: Session, name: str, scopes: Iterable[str]) -> str:
+    """Store a new key and return it; only its digest is kept"""
+    scopes = sorted(set(scopes))
+    unknown = set(scopes) - set(SCOPES)
+    if unknown:
+        raise ValueError(f"Unknown scopes: {', '.join(sorted(unknown))}")
+    api_key = generate_key()
+    db.add(
+        models.ApiKey(
+            name=name,
+            key_hash=hash_key(api_key),
+            prefix=api_key[: len(KEY_PREFIX) + 4],
+            scopes=" ".join(scopes),
+        )
+    )
     return api_key
+
+
+def revoke_key(db: Session, name: str) -> bool:
+    """Mark the named key revoked; False if there is no such active key"""
+    result = db.execute(
+        update(models.ApiKey)
+        .where(models.ApiKey.name == name, models.ApiKey.revoked_at.is_(None))
+        .values(revoked_at=datetime.now(timezone.utc))
+    )
+    return result.rowcount > 0
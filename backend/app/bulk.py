@@ -0,0 +1,267 @@
+"""
+Bulk order ingestion for POST /orders/bulk.
+
+Rows are validated one by one and then handled in chunks: one IN query per chunk
+finds order_ids that already exist and one multi-row INSERT ... RETURNING creates
+the rest, so a chunk costs two round trips instead of four per order. The created
+orders' change events are written just before each commit.
+
+An insert that fails because another writer created some of the order_ids after the
+check is rolled back, those rows are reported as duplicates and the rest retried, as
+often as that keeps happening.
+"""
+
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import customers, events, models, responses, rollup, schemas
+from app.cache import cache
+
+NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+# Documents both accepted request bodies, since the handler reads the raw request
+OPENAPI_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "array",
+                    "items": {"$ref": "#/components/schemas/OrderCreate"},
+                }
+            },
+            "application/x-ndjson": {
+                "schema": {"type": "string", "description": "One OrderCreate JSON object per line"}
+            },
+        },
+    }
+}
+
+
+async def read_rows(request: Request) -> AsyncIterator[Any]:
+    """
+    Yield raw input rows from a JSON array body or an NDJSON stream.
+
+    NDJSON lines are yielded as bytes and decoded during validation, so one bad line
+    only invalidates its own row. The stream is consumed incrementally.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type in NDJSON_MEDIA_TYPES:
+        buffer = b""
+        async for piece in request.stream():
+            buffer += piece
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        rows = None
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=422, detail="Request body must be a JSON array or NDJSON stream"
+        )
+    for row in rows:
+        yield row
+
+
+def format_errors(exc: ValidationError) -> str:
+    """Flatten a pydantic ValidationError into one readable line"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'body'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+class BulkIngest:
+    """Per-request ingestion state shared by all chunks of one bulk request"""
+
+    def __init__(self, atomic: bool = False):
+        self.atomic = atomic
+        self.failed = False
+        self.results: dict[int, schemas.BulkOrderRowResult] = {}
+        self.seen: set[str] = set()
+        self.next_index = 0
+        # Created orders whose events go out with the next commit
+        self.unrecorded: list = []
+
+    def _record(self, index: int, order_id: str | None, status: schemas.BulkRowStatus, **extra):
+        self.results[index] = schemas.BulkOrderRowResult(
+            index=index, order_id=order_id, status=status, **extra
+        )
+        if self.atomic and status in (
+            schemas.BulkRowStatus.DUPLICATE,
+            schemas.BulkRowStatus.INVALID,
+        ):
+            self.failed = True
+
+    def _validate(self, index: int, raw: Any) -> schemas.OrderCreate | None:
+        if isinstance(raw, bytes):
+            try:
+                raw = json.loads(raw)
+            except ValueError:
+                self._record(index, None, schemas.BulkRowStatus.INVALID, detail="Invalid JSON")
+                return None
+
+        try:
+            return schemas.OrderCreate.model_validate(raw)
+        except ValidationError as exc:
+            order_id = raw.get("order_id") if isinstance(raw, dict) else None
+            self._record(
+                index,
+                order_id if isinstance(order_id, str) else None,
+                schemas.BulkRowStatus.INVALID,
+                detail=format_errors(exc),
+            )
+            return None
+
+    async def _existing(self, db: AsyncSession, order_ids: list[str]) -> set[str]:
+        return set(
+            await db.scalars(
+                select(models.Order.order_id).where(models.Order.order_id.in_(order_ids))
+            )
+        )
+
+    async def _insert(self, db: AsyncSession, rows: list[tuple[int, schemas.OrderCreate]]):
+        values = []
+        for _, order in rows:
+            row = order.model_dump()
+            row["status"] = order.status.value
+            if row["order_date"] is None:
+                row["order_date"] = func.now()
+            values.append(row)
+
+        stmt = insert(models.Order).values(values).returning(*responses.ORDER_COLUMNS)
+        created = {row.order_id: row for row in await db.execute(stmt)}
+        self.unrecorded.extend(created.values())
+
+        deltas: rollup.RollupDeltas = {}
+        stats: customers.StatsDeltas = {}
+        for index, order in rows:
+            row = created[order.order_id]
+            rollup.track(deltas, row.order_date, row.currency, row.total_amount, 1)
+            customers.track_order(stats, row, 1)
+            self._record(index, order.order_id, schemas.BulkRowStatus.CREATED, id=row.id)
+        await rollup.apply_deltas(db, deltas)
+        await customers.apply_deltas(db, stats)
+
+    async def process_chunk(self, db: AsyncSession, chunk: list[Any]):
+        """Validate, duplicate-check and insert one chunk of raw rows"""
+        valid = []
+        for raw in chunk:
+            index = self.next_index
+            self.next_index += 1
+            order = self._validate(index, raw)
+            if order is not None:
+                valid.append((index, order))
+
+        pending = []
+        existing = (
+            await self._existing(db, [order.order_id for _, order in valid]) if valid else set()
+        )
+        for index, order in valid:
+            if order.order_id in existing or order.order_id in self.seen:
+                self._record(
+                    index,
+                    order.order_id,
+                    schemas.BulkRowStatus.DUPLICATE,
+                    detail="Order ID already exists",
+                )
+            else:
+                self.seen.add(order.order_id)
+                pending.append((index, order))
+
+        if self.failed:
+            for index, order in pending:
+                self._record(index, order.order_id, schemas.BulkRowStatus.SKIPPED)
+            return
+        if not pending:
+            return
+
+        while pending:
+            try:
+                await self._insert(db, pending)
+                break
+            except IntegrityError:
+                await db.rollback()
+            if self.atomic:
+                # Everything written so far is gone with the rollback
+                self.failed = True
+                for index, order in pending:
+                    self._record(index, order.order_id, schemas.BulkRowStatus.SKIPPED)
+                return
+
+            # A concurrent writer created some of these order_ids after the check, and
+            # may create more before the retry
+            existing = await self._existing(db, [order.order_id for _, order in pending])
+            if not existing:
+                # The conflict is not on order_id, so retrying the same rows cannot help
+                for index, order in pending:
+                    self._record(
+                        index,
+                        order.order_id,
+                        schemas.BulkRowStatus.SKIPPED,
+                        detail="Conflicting concurrent write",
+                    )
+                return
+            retry = []
+            for index, order in pending:
+                if order.order_id in existing:
+                    self._record(
+                        index,
+                        order.order_id,
+                        schemas.BulkRowStatus.DUPLICATE,
+                        detail="Order ID already exists",
+                    )
+                else:
+                    retry.append((index, order))
+            pending = retry
+
+        if not self.atomic:
+            await self._commit(db)
+
+    async def _commit(self, db: AsyncSession):
+        await events.record(db, schemas.OrderEventType.CREATED, self.unrecorded)
+        self.unrecorded = []
+        await db.commit()
+        events.notifier.notify()
+        await cache.invalidate("orders")
+
+    async def finish(self, db: AsyncSession) -> schemas.BulkOrderResponse:
+        """Commit or roll back an atomic request and build the per-row report"""
+        if self.atomic:
+            if self.failed:
+                await db.rollback()
+                for index, result in self.results.items():
+                    if result.status == schemas.BulkRowStatus.CREATED:
+                        self.results[index] = result.model_copy(
+                            update={"status": schemas.BulkRowStatus.SKIPPED, "id": None}
+                        )
+            else:
+                await self._commit(db)
+
+        results = [self.results[index] for index in sorted(self.results)]
+        counts = {status: 0 for status in schemas.BulkRowStatus}
+        for result in results:
+            counts[result.status] += 1
+
+        return schemas.BulkOrderResponse(
+            created=counts[schemas.BulkRowStatus.CREATED],
+            duplicates=counts[schemas.BulkRowStatus.DUPLICATE],
+            invalid=counts[schemas.BulkRowStatus.INVALID],
+            skipped=counts[schemas.BulkRowStatus.SKIPPED],
+            results=results,
+        )
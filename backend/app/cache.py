@@ -0,0 +1,198 @@
+"""
+Response cache with write-invalidated version counters.
+
+Writers bump a version counter per scope (e.g. "orders") after they commit. Cached
+entries are keyed by the versions they were computed under, so a write makes every
+older entry unreachable at once and a stale result never outlives it; the TTL only
+bounds how long unreachable entries linger. Concurrent misses for the same key share
+a single computation within the process.
+
+The backend is in-memory by default. With CACHE_BACKEND=redis the entries and version
+counters live in Redis (or anything speaking its protocol), so all workers see the
+same versions.
+
+Each bump also records the wall clock time of the change, which app/replicas.py uses
+to keep reads of just-changed scopes off lagging replicas.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+
+from app import metrics
+from app.config import settings
+
+CACHE_REQUESTS = metrics.Counter(
+    "cache_requests_total", "Response cache lookups by cache name and result"
+)
+
+
+class MemoryBackend:
+    """Process-local backend; versions are not shared between workers"""
+
+    def __init__(self):
+        self._entries: dict[str, tuple[float, bytes]] = {}
+        self._versions: dict[str, int] = {}
+        self._changed: dict[str, float] = {}
+        # Versions restart at zero with the process, so ETags built from them carry
+        # an epoch that changes too
+        self.epoch = uuid.uuid4().hex[:8]
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        now = time.monotonic()
+        # Entries for old versions are never read again, so sweep expired ones here
+        if len(self._entries) > 1000:
+            self._entries = {k: e for k, e in self._entries.items() if e[0] >= now}
+        self._entries[key] = (now + ttl, value)
+
+    async def versions(self, keys: Sequence[str]) -> list[int]:
+        return [self._versions.get(key, 0) for key in keys]
+
+    async def incr(self, key: str) -> int:
+        self._versions[key] = self._versions.get(key, 0) + 1
+        return self._versions[key]
+
+    async def changed_at(self, keys: Sequence[str]) -> list[float]:
+        return [self._changed.get(key, 0.0) for key in keys]
+
+    async def set_changed_at(self, key: str, when: float):
+        self._changed[key] = when
+
+
+class RedisBackend:
+    """Backend on a redis.asyncio client (or a compatible one such as fakeredis)"""
+
+    def __init__(self, client, prefix: str = "order-service:"):
+        self.client = client
+        self.prefix = prefix
+        self.epoch = ""
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    async def versions(self, keys: Sequence[str]) -> list[int]:
+        epoch_key = f"{self.prefix}epoch"
+        epoch, *values = await self.client.mget(
+            [epoch_key, *(f"{self.prefix}version:{key}" for key in keys)]
+        )
+        if epoch is None:
+            # Fresh or flushed Redis: versions restarted, so start a new epoch
+            await self.client.set(epoch_key, uuid.uuid4().hex[:8], nx=True)
+            epoch = await self.client.get(epoch_key)
+        self.epoch = epoch.decode() if isinstance(epoch, bytes) else epoch
+        return [int(value or 0) for value in values]
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(f"{self.prefix}version:{key}")
+
+    async def changed_at(self, keys: Sequence[str]) -> list[float]:
+        values = await self.client.mget([f"{self.prefix}changed:{key}" for key in keys])
+        return [float(value or 0) for value in values]
+
+    async def set_changed_at(self, key: str, when: float):
+        await self.client.set(f"{self.prefix}changed:{key}", repr(when))
+
+
+def create_backend():
+    """Build the backend selected by CACHE_BACKEND"""
+    if settings.cache_backend == "redis":
+        # Optional dependency, only needed when Redis is configured
+        import redis.asyncio
+
+        return RedisBackend(redis.asyncio.from_url(settings.cache_redis_url))
+    if settings.cache_backend == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown cache backend: {settings.cache_backend}")
+
+
+class ResponseCache:
+    """Versioned get-or-compute cache for JSON-serializable responses"""
+
+    def __init__(self, backend, wall_clock: Callable[[], float] = time.time):
+        self.backend = backend
+        self.wall_clock = wall_clock
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def version(self, scope: str) -> int:
+        """Current change version of a scope"""
+        return (await self.backend.versions([scope]))[0]
+
+    async def invalidate(self, *scopes: str):
+        """Bump the version of each scope; call after the write has committed"""
+        for scope in scopes:
+            await self.backend.incr(scope)
+            await self.backend.set_changed_at(scope, self.wall_clock())
+
+    async def last_changed(self, scopes: Sequence[str]) -> float:
+        """Unix time of the latest change to any of scopes; 0 if none is known"""
+        return max(await self.backend.changed_at(scopes), default=0.0)
+
+    async def get_or_compute(
+        self,
+        name: str,
+        key: str,
+        scopes: Sequence[str],
+        ttl: float,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return the cached value for key, computing it at most once per version"""
+        if ttl <= 0:
+            return await compute()
+
+        versions = await self.backend.versions(scopes)
+        full_key = f"{name}:{'.'.join(map(str, versions))}:{key}"
+
+        cached = await self.backend.get(full_key)
+        if cached is not None:
+            CACHE_REQUESTS.inc(cache=name, result="hit")
+            return json.loads(cached)
+
+        pending = self._inflight.get(full_key)
+        if pending is not None:
+            CACHE_REQUESTS.inc(cache=name, result="coalesced")
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The request computing the value went away; compute it here instead
+                return await compute()
+
+        CACHE_REQUESTS.inc(cache=name, result="miss")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            value = await compute()
+            await self.backend.set(full_key, json.dumps(value).encode(), ttl)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so an exception nobody else awaited is not logged
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[full_key]
+
+
+cache = ResponseCache(create_backend())
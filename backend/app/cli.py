@@ -0,0 +1,225 @@
+"""
+Management commands.
+
+Usage: python -m app.cli <command>
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import timedelta
+
+from app import auth, customers, events, idempotency, models, partitions, rollup
+from app.cache import cache
+from app.config import settings
+from app.database import SessionLocal
+
+
+def rollup_check(args) -> int:
+    """Compare daily_revenue against the orders table"""
+    with SessionLocal() as db:
+        mismatches = rollup.find_mismatches(db)
+
+    for day, currency, expected, actual in mismatches:
+        print(
+            f"{day} {currency}: expected count={expected[0]} revenue={expected[1]}, "
+            f"rollup has count={actual[0]} revenue={actual[1]}"
+        )
+    if mismatches:
+        print(f"{len(mismatches)} mismatching rollup rows (run 'rollup-rebuild' to fix)")
+        return 1
+    print("daily_revenue rollup matches the orders table")
+    return 0
+
+
+def rollup_rebuild(args) -> int:
+    """Recompute daily_revenue from the orders table"""
+    with SessionLocal() as db:
+        rollup.rebuild(db)
+        db.commit()
+    # Cached summaries and their ETags were computed from the old rollup
+    asyncio.run(cache.invalidate("orders"))
+    print("daily_revenue rollup rebuilt")
+    return 0
+
+
+def customer_stats_check(args) -> int:
+    """Compare customer_stats against the orders table"""
+    with SessionLocal() as db:
+        mismatches = customers.find_mismatches(db)
+
+    for customer_id, currency, expected, actual in mismatches:
+        print(
+            f"{customer_id} {currency}: expected count={expected[0]} revenue={expected[1]}, "
+            f"customer_stats has count={actual[0]} revenue={actual[1]}"
+        )
+    if mismatches:
+        print(
+            f"{len(mismatches)} mismatching customer_stats rows "
+            "(run 'customer-stats-rebuild' to fix)"
+        )
+        return 1
+    print("customer_stats matches the orders table")
+    return 0
+
+
+def customer_stats_rebuild(args) -> int:
+    """Recompute customer_stats from the orders table"""
+    with SessionLocal() as db:
+        customers.rebuild(db)
+        db.commit()
+    # Drop anything cached, or ETagged, from the old customer_stats
+    asyncio.run(cache.invalidate("orders"))
+    print("customer_stats rebuilt")
+    return 0
+
+
+def partition_maintenance(args) -> int:
+    """Create upcoming orders partitions and detach expired ones (PostgreSQL)"""
+    with SessionLocal() as db:
+        if not partitions.is_partitioned(db):
+            print("orders is not partitioned on this database, nothing to do")
+            return 0
+        created = partitions.ensure_partitions(db, args.ahead)
+        detached = partitions.detach_partitions(db, args.retain_months)
+        db.commit()
+
+    for name in created:
+        print(f"created {name}")
+    for name in detached:
+        print(f"detached {name}")
+    if detached:
+        # Listings and the summary no longer include the detached orders
+        asyncio.run(cache.invalidate("orders"))
+    print(f"{len(created)} partitions created, {len(detached)} detached")
+    return 0
+
+
+def idempotency_purge(args) -> int:
+    """Delete Idempotency-Keys older than the retention period"""
+    with SessionLocal() as db:
+        deleted = idempotency.purge(db, timedelta(hours=args.older_than_hours))
+        db.commit()
+    print(f"{deleted} idempotency keys deleted")
+    return 0
+
+
+def order_events_purge(args) -> int:
+    """Delete order change events older than the retention period"""
+    # Without a relay nothing is ever marked published
+    keep_unpublished = settings.order_events_sink != "none"
+    with SessionLocal() as db:
+        deleted = events.purge(db, timedelta(days=args.older_than_days), keep_unpublished)
+        db.commit()
+    print(f"{deleted} order events deleted")
+    return 0
+
+
+def api_keys_create(args) -> int:
+    """Create an API key for an integration"""
+    with SessionLocal() as db:
+        try:
+            api_key = auth.create_key(db, args.name, args.scopes)
+        except ValueError as e:
+            print(e)
+            return 2
+        db.commit()
+    # Only the digest is stored, so this is the one chance to copy the key
+    print(api_key)
+    return 0
+
+
+def api_keys_revoke(args) -> int:
+    """Revoke an integration's API key"""
+    with SessionLocal() as db:
+        revoked = auth.revoke_key(db, args.name)
+        db.commit()
+    if not revoked:
+        print(f"no active API key named {args.name}")
+        return 1
+    print(
+        f"revoked {args.name}; running workers accept it for up to "
+        f"{settings.api_key_cache_ttl_seconds:g} more seconds"
+    )
+    return 0
+
+
+def api_keys_list(args) -> int:
+    """List API keys with their scopes and usage"""
+    with SessionLocal() as db:
+        for key in db.query(models.ApiKey).order_by(models.ApiKey.name):
+            state = f"revoked {key.revoked_at:%Y-%m-%d}" if key.revoked_at else "active"
+            print(
+                f"{key.name}\t{key.prefix}...\t{key.scopes}\t{state}\t"
+                f"{key.request_count} requests\tlast used {key.last_used_at or 'never'}"
+            )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("rollup-check", help=rollup_check.__doc__).set_defaults(func=rollup_check)
+    commands.add_parser("rollup-rebuild", help=rollup_rebuild.__doc__).set_defaults(
+        func=rollup_rebuild
+    )
+    commands.add_parser("customer-stats-check", help=customer_stats_check.__doc__).set_defaults(
+        func=customer_stats_check
+    )
+    commands.add_parser("customer-stats-rebuild", help=customer_stats_rebuild.__doc__).set_defaults(
+        func=customer_stats_rebuild
+    )
+    maintenance = commands.add_parser("partitions", help=partition_maintenance.__doc__)
+    maintenance.add_argument(
+        "--ahead",
+        type=int,
+        default=settings.partition_months_ahead,
+        help="Months to create after the current one",
+    )
+    maintenance.add_argument(
+        "--retain-months",
+        type=int,
+        default=settings.partition_retention_months,
+        help="Detach months ending more than this many months ago (0 keeps all)",
+    )
+    maintenance.set_defaults(func=partition_maintenance)
+    purge = commands.add_parser("idempotency-purge", help=idempotency_purge.__doc__)
+    purge.add_argument(
+        "--older-than-hours",
+        type=int,
+        default=settings.idempotency_key_ttl_hours,
+        help="Delete keys first used more than this many hours ago",
+    )
+    purge.set_defaults(func=idempotency_purge)
+    events_purge = commands.add_parser("order-events-purge", help=order_events_purge.__doc__)
+    events_purge.add_argument(
+        "--older-than-days",
+        type=int,
+        default=settings.order_events_retention_days,
+        help="Delete events that occurred more than this many days ago",
+    )
+    events_purge.set_defaults(func=order_events_purge)
+
+    api_keys = commands.add_parser("api-keys", help="Manage per-integration API keys")
+    api_key_commands = api_keys.add_subparsers(dest="api_keys_command", required=True)
+    create = api_key_commands.add_parser("create", help=api_keys_create.__doc__)
+    create.add_argument("name", help="Integration name, e.g. warehouse")
+    create.add_argument(
+        "--scopes",
+        nargs="+",
+        default=list(auth.DEFAULT_SCOPES),
+        help=f"Any of {', '.join(auth.SCOPES)} (default: {' '.join(auth.DEFAULT_SCOPES)})",
+    )
+    create.set_defaults(func=api_keys_create)
+    revoke = api_key_commands.add_parser("revoke", help=api_keys_revoke.__doc__)
+    revoke.add_argument("name")
+    revoke.set_defaults(func=api_keys_revoke)
+    api_key_commands.add_parser("list", help=api_keys_list.__doc__).set_defaults(func=api_keys_list)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,99 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     database_url: str
 
+    # Override for the async engine; derived from database_url when unset
+    async_database_url: str | None = None
+
+    # Connection pool (not used for SQLite)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    # Recycle connections before load balancers drop them as idle; -1 disables
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # Server-side statement timeout in milliseconds; 0 disables
+    db_statement_timeout_ms: int = 0
+    # Running behind PgBouncer or a similar pooler: NullPool, no prepared statements
+    db_external_pooler: bool = False
+
+    # Read replicas for GET requests (app/replicas.py), as a JSON list of URLs. A replica
+    # that fails is skipped for, and checked again every, REPLICA_HEALTH_CHECK_SECONDS.
+    # After a write, the client's reads go to the primary for READ_YOUR_WRITES_SECONDS,
+    # which should exceed the usual replication lag.
+    database_replica_urls: list[str] = []
+    replica_health_check_seconds: float = 5.0
+    read_your_writes_seconds: float = 5.0
+
+    # Key with every scope; per-integration keys live in the api_keys table
     api_key: str
+    # Seconds a verified (or unknown) key is trusted without a database lookup, which
+    # bounds how long a revoked key keeps working
+    api_key_cache_ttl_seconds: float = 30.0
+    api_key_cache_size: int = 10000
+    # Seconds between batched writes of per-key usage counts
+    api_key_usage_flush_seconds: float = 10.0
+
+    # Token bucket per API key and route: requests per second and burst size, with
+    # per-route overrides such as {"POST /orders/bulk": [1, 5]}; a rate of 0 disables
+    rate_limit_per_second: float = 20.0
+    rate_limit_burst: int = 40
+    rate_limit_routes: dict[str, tuple[float, int]] = {}
+    # "memory" (per process) or "redis" (shared, uses CACHE_REDIS_URL)
+    rate_limit_backend: str = "memory"
+
+    # Load shedding: answer 503 while more requests than this are in flight, or while
+    # the smoothed pool checkout wait exceeds the threshold; 0 disables either check
+    load_shed_max_in_flight: int = 512
+    load_shed_pool_wait_ms: float = 500.0
+    load_shed_retry_after_seconds: int = 1
+
+    # Response cache: "memory" (per process) or "redis" (shared, needs the redis extra)
+    cache_backend: str = "memory"
+    cache_redis_url: str = "redis://localhost:6379/0"
+    # Seconds a cached /orders/summary response may be served; 0 disables caching.
+    # Writes invalidate it immediately regardless of the TTL.
+    summary_cache_ttl_seconds: float = 30.0
+    # The same for /orders/stats, kept short as dashboards poll it
+    order_stats_cache_ttl_seconds: float = 5.0
+
+    # Seconds the in-process FX rate cache is trusted; writes through this process
+    # invalidate it immediately, other workers pick changes up after the TTL
+    fx_cache_ttl_seconds: int = 300
+
+    # Rows per duplicate-check query and multi-row INSERT in POST /orders/bulk
+    bulk_chunk_size: int = 1000
+
+    # Orders per UPDATE ... RETURNING in POST /orders/status-transitions
+    status_transition_chunk_size: int = 5000
+
+    # Rows fetched from the server-side cursor per batch in GET /orders/export
+    export_batch_size: int = 2000
+
+    # Hours an Idempotency-Key of POST /orders/ is remembered before
+    # `python -m app.cli idempotency-purge` may forget it
+    idempotency_key_ttl_hours: int = 24
+
+    # Order change events (app/events.py): where the relay publishes them, "none",
+    # "memory", "log" or "redis" (a Redis stream at CACHE_REDIS_URL), how often the relay
+    # and waiting /orders/changes requests look for events committed by other workers,
+    # and days published events are kept before `python -m app.cli order-events-purge`
+    # may delete them
+    order_events_sink: str = "none"
+    order_events_poll_seconds: float = 1.0
+    order_events_batch_size: int = 500
+    order_events_retention_days: int = 7
+
+    # Monthly orders partitions on PostgreSQL, maintained by `python -m app.cli partitions`:
+    # months created ahead of time, and months kept attached (0 keeps everything)
+    partition_months_ahead: int = 3
+    partition_retention_months: int = 0
+
+    # Per-request Server-Timing header and request histograms on /metrics
+    instrumentation_enabled: bool = False
+    # Log statements slower than this many milliseconds; 0 disables
+    slow_query_ms: float = 0
+    # Include the EXPLAIN plan in slow query log entries
+    slow_query_explain: bool = True
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -0,0 +1,265 @@
+"""
+Per-customer order statistics.
+
+The customer_stats table holds one row per (customer_id, currency) with the number of
+orders, the summed total_amount and the order_date of the latest order. Order
+mutations apply deltas to it in the same transaction, like the daily_revenue rollup,
+so a customer's lifetime value is one primary key lookup however many orders they
+have, and GET /customers/top walks an index from the top instead of sorting every
+customer.
+
+Adding an order can only move last_order_at forward. Removing one may take away the
+latest order, so apply_deltas looks the latest remaining order up again for those
+customers, through ix_orders_customer_id_order_date_id. It must therefore run after
+the order changes are flushed.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, select, text, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.database import dialect_insert
+
+
+@dataclass
+class StatsDelta:
+    order_count: int = 0
+    revenue_sum: int = 0
+    # Latest order_date among added orders
+    last_order_at: datetime | None = None
+    # Whether an order left, so last_order_at has to be looked up again
+    removed: bool = False
+
+
+StatsDeltas = dict[tuple[str, str], StatsDelta]
+
+# Sort columns of GET /customers/top, each led by an index on (currency, column, customer_id)
+RANKINGS = {
+    schemas.CustomerRanking.REVENUE: models.CustomerStats.revenue_sum,
+    schemas.CustomerRanking.ORDERS: models.CustomerStats.order_count,
+}
+
+
+def track(
+    deltas: StatsDeltas,
+    customer_id: str,
+    currency: str,
+    amount: int,
+    order_date: datetime,
+    sign: int,
+):
+    """Accumulate the contribution of one order (sign=1) or its removal (sign=-1)"""
+    delta = deltas.setdefault((customer_id, currency), StatsDelta())
+    delta.order_count += sign
+    delta.revenue_sum += sign * amount
+    if sign < 0:
+        delta.removed = True
+    elif delta.last_order_at is None or order_date > delta.last_order_at:
+        delta.last_order_at = order_date
+
+
+def track_order(deltas: StatsDeltas, order, sign: int):
+    """track() for an ORM order or a row with the same columns"""
+    track(deltas, order.customer_id, order.currency, order.total_amount, order.order_date, sign)
+
+
+def counted(order) -> tuple:
+    """The fields of an order that its customer's stats depend on"""
+    return (order.customer_id, order.currency, order.total_amount, order.order_date)
+
+
+def _later(db, current, new):
+    """SQL for the later of two timestamps, either of which may be NULL"""
+    greatest = func.greatest if db.get_bind().dialect.name == "postgresql" else func.max
+    return greatest(func.coalesce(current, new), func.coalesce(new, current))
+
+
+async def apply_deltas(db: AsyncSession, deltas: StatsDeltas):
+    """Upsert all deltas in one statement, then fix up customers that lost an order"""
+    rows = [
+        {
+            "customer_id": customer_id,
+            "currency": currency,
+            "order_count": delta.order_count,
+            "revenue_sum": delta.revenue_sum,
+            "last_order_at": delta.last_order_at,
+        }
+        for (customer_id, currency), delta in deltas.items()
+    ]
+    if not rows:
+        return
+
+    table = models.CustomerStats
+    stmt = dialect_insert(db)(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.customer_id, table.currency],
+        set_={
+            "order_count": table.order_count + stmt.excluded.order_count,
+            "revenue_sum": table.revenue_sum + stmt.excluded.revenue_sum,
+            "last_order_at": _later(db, table.last_order_at, stmt.excluded.last_order_at),
+        },
+    )
+    await db.execute(stmt)
+
+    removed = [key for key, delta in deltas.items() if delta.removed]
+    if removed:
+        key = tuple_(table.customer_id, table.currency)
+        await db.execute(delete(table).where(key.in_(removed), table.order_count <= 0))
+        order = models.Order
+        latest = (
+            select(func.max(order.order_date))
+            .where(order.customer_id == table.customer_id, order.currency == table.currency)
+            .scalar_subquery()
+        )
+        await db.execute(update(table).where(key.in_(removed)).values(last_order_at=latest))
+
+
+async def add_order(db: AsyncSession, order: models.Order):
+    """Count a newly inserted order in its customer's stats"""
+    deltas: StatsDeltas = {}
+    track_order(deltas, order, 1)
+    await apply_deltas(db, deltas)
+
+
+async def remove_order(db: AsyncSession, order: models.Order):
+    """Remove a deleted order from its customer's stats, after the delete is flushed"""
+    deltas: StatsDeltas = {}
+    track_order(deltas, order, -1)
+    await apply_deltas(db, deltas)
+
+
+async def summarize(db: AsyncSession, customer_id: str) -> dict | None:
+    """The CustomerSummary of a customer as a dict; None if they have no orders"""
+    table = models.CustomerStats
+    rows = await db.execute(
+        select(table.currency, table.order_count, table.revenue_sum, table.last_order_at)
+        .where(table.customer_id == customer_id)
+        .order_by(table.currency)
+    )
+    by_currency = [
+        {
+            "currency": row.currency,
+            "order_count": row.order_count,
+            "revenue": row.revenue_sum,
+            "last_order_date": row.last_order_at,
+        }
+        for row in rows
+    ]
+    if not by_currency:
+        return None
+    dates = [stats["last_order_date"] for stats in by_currency if stats["last_order_date"]]
+    return {
+        "customer_id": customer_id,
+        "order_count": sum(stats["order_count"] for stats in by_currency),
+        "last_order_date": max(dates, default=None),
+        "by_currency": by_currency,
+    }
+
+
+async def top(
+    db: AsyncSession,
+    currency: str,
+    by: schemas.CustomerRanking,
+    limit: int,
+    after: tuple[int, str] | None = None,
+) -> list[dict]:
+    """
+    Customers with the highest value of the by column in currency, as CustomerRank dicts.
+
+    Ties are broken by customer_id, descending, so the order matches the index and
+    after, the (value, customer_id) of the last row of a page, seeks past it.
+    """
+    table = models.CustomerStats
+    column = RANKINGS[by]
+    query = select(
+        table.customer_id,
+        table.currency,
+        table.order_count,
+        table.revenue_sum,
+        table.last_order_at,
+    ).where(table.currency == currency)
+    if after is not None:
+        query = query.where(tuple_(column, table.customer_id) < tuple_(*after))
+    query = query.order_by(column.desc(), table.customer_id.desc()).limit(limit)
+    return [
+        {
+            "customer_id": row.customer_id,
+            "currency": row.currency,
+            "order_count": row.order_count,
+            "revenue": row.revenue_sum,
+            "last_order_date": row.last_order_at,
+        }
+        for row in await db.execute(query)
+    ]
+
+
+def remove_detached(db: Session, partition: str):
+    """
+    Take the orders of a detached orders partition out of customer_stats (PostgreSQL).
+
+    Partitions are detached oldest first, so a customer keeps their last_order_at
+    unless none of their orders remain, and then their row goes.
+    """
+    db.execute(
+        text(
+            "UPDATE customer_stats s SET order_count = s.order_count - d.order_count, "
+            "revenue_sum = s.revenue_sum - d.revenue_sum "
+            "FROM (SELECT customer_id, currency, count(*) AS order_count, "
+            f"sum(total_amount) AS revenue_sum FROM {partition} GROUP BY 1, 2) d "
+            "WHERE s.customer_id = d.customer_id AND s.currency = d.currency"
+        )
+    )
+    db.execute(delete(models.CustomerStats).where(models.CustomerStats.order_count <= 0))
+
+
+def _raw_totals():
+    order = models.Order
+    return select(
+        order.customer_id,
+        order.currency,
+        func.count().label("order_count"),
+        func.sum(order.total_amount).label("revenue_sum"),
+        func.max(order.order_date).label("last_order_at"),
+    ).group_by(order.customer_id, order.currency)
+
+
+def find_mismatches(db: Session) -> list[tuple[str, str, tuple[int, int], tuple[int, int]]]:
+    """
+    Compare customer_stats against a fresh aggregation of the orders table.
+
+    Returns (customer_id, currency, expected, actual) for every differing key, where
+    expected and actual are (order_count, revenue_sum) pairs.
+    """
+    expected = {
+        (row.customer_id, row.currency): (row.order_count, int(row.revenue_sum))
+        for row in db.execute(_raw_totals())
+    }
+    table = models.CustomerStats
+    actual = {
+        (row.customer_id, row.currency): (row.order_count, int(row.revenue_sum))
+        for row in db.execute(
+            select(table.customer_id, table.currency, table.order_count, table.revenue_sum)
+        )
+    }
+
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys()):
+        want, have = expected.get(key, (0, 0)), actual.get(key, (0, 0))
+        if want != have:
+            mismatches.append((key[0], key[1], want, have))
+    return mismatches
+
+
+def rebuild(db: Session):
+    """Recompute customer_stats from the orders table"""
+    db.execute(delete(models.CustomerStats))
+    db.execute(
+        insert(models.CustomerStats).from_select(
+            ["customer_id", "currency", "order_count", "revenue_sum", "last_order_at"],
+            _raw_totals(),
+        )
+    )
@@ -1,15 +1,148 @@
-from sqlalchemy import create_engine
+import logging
+import time
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
+from app import loadshed, metrics, replicas
 from app.config import settings
 
-engine = create_engine(settings.database_url)
+logger = logging.getLogger(__name__)
+
+# Async drivers for each backend; psycopg 3 serves both sync and async connections
+ASYNC_DRIVERS = {"postgresql": "psycopg", "sqlite": "aiosqlite"}
+
+POOL_CHECKOUT_SECONDS = metrics.Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled database connection"
+)
+POOL_IN_USE = metrics.Gauge(
+    "db_pool_connections_in_use", "Database connections currently checked out of the pool"
+)
+
+
+def async_database_url(url: str) -> str:
+    """Map a database URL onto the async driver for its backend"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or parsed.get_driver_name() in ("asyncpg", "aiosqlite"):
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(
+        hide_password=False
+    )
+
+
+def engine_options(url: str) -> dict:
+    """Pool and connection keyword arguments for create_engine/create_async_engine"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        # SQLite picks its own pool per URL and has no server-side timeout
+        return {}
+
+    options: dict = {"pool_pre_ping": settings.db_pool_pre_ping}
+    connect_args: dict = {}
+
+    if settings.db_external_pooler:
+        # The external pooler owns the connections. Transaction pooling hands each
+        # transaction to an arbitrary server connection, so neither session state nor
+        # prepared statements survive between transactions.
+        options["poolclass"] = NullPool
+        if parsed.get_driver_name() in ("psycopg", "psycopg_async"):
+            connect_args["prepare_threshold"] = None
+        elif parsed.get_driver_name() == "asyncpg":
+            connect_args["statement_cache_size"] = 0
+    else:
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+        timeout = settings.db_statement_timeout_ms
+        if timeout and parsed.get_driver_name() == "asyncpg":
+            connect_args["server_settings"] = {"statement_timeout": str(timeout)}
+        elif timeout:
+            connect_args["options"] = f"-c statement_timeout={timeout}"
+
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def _instrument(sync_engine, pool_name: str):
+    """Track pool usage and apply the per-transaction statement timeout"""
+
+    @event.listens_for(sync_engine.pool, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_IN_USE.inc(engine=pool_name)
+
+    @event.listens_for(sync_engine.pool, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        POOL_IN_USE.dec(engine=pool_name)
+
+    if (
+        settings.db_statement_timeout_ms
+        and settings.db_external_pooler
+        and sync_engine.dialect.name == "postgresql"
+    ):
+        # Poolers do not forward startup options, so the timeout is set per
+        # transaction instead. SET LOCAL costs one extra statement per transaction;
+        # setting it on the database role avoids that.
+        @event.listens_for(sync_engine, "begin")
+        def _statement_timeout(connection):
+            cursor = connection.connection.cursor()
+            cursor.execute(f"SET LOCAL statement_timeout = {int(settings.db_statement_timeout_ms)}")
+            cursor.close()
+
+
+# Sync engine for management commands and scripts (Alembic builds its own)
+engine = create_engine(settings.database_url, **engine_options(settings.database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API handlers
+_async_url = settings.async_database_url or async_database_url(settings.database_url)
+async_engine = create_async_engine(_async_url, **engine_options(_async_url))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+_instrument(engine, "sync")
+_instrument(async_engine.sync_engine, "async")
+
+
+def _replica(index: int, url: str) -> replicas.Replica:
+    url = async_database_url(url)
+    replica_engine = create_async_engine(url, **engine_options(url))
+    name = f"replica{index}"
+    _instrument(replica_engine.sync_engine, name)
+    return replicas.Replica(
+        name, async_sessionmaker(replica_engine, autoflush=False, expire_on_commit=False)
+    )
+
+
+# Read replicas for GET requests, see app/replicas.py
+router = replicas.ReplicaRouter(
+    AsyncSessionLocal,
+    [_replica(index, url) for index, url in enumerate(settings.database_replica_urls)],
+)
+
 Base = declarative_base()
 
 
+def dialect_insert(db):
+    """Pick the INSERT construct that supports ON CONFLICT for the session's dialect"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"INSERT ... ON CONFLICT is not supported on {dialect}")
+
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
@@ -17,3 +150,44 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def _checkout(session_factory: async_sessionmaker) -> AsyncSession:
+    db = session_factory()
+    try:
+        # Check out the connection up front so pool waits are measured
+        started = time.perf_counter()
+        await db.connection()
+    except BaseException:
+        await db.close()
+        raise
+    waited = time.perf_counter() - started
+    POOL_CHECKOUT_SECONDS.observe(waited)
+    loadshed.shedder.observe_pool_wait(waited)
+    return db
+
+
+def get_session_factory() -> async_sessionmaker:
+    """Dependency for short sessions on the primary outside the request's own session"""
+    return router.primary
+
+
+async def get_async_db(request: Request, response: Response):
+    """Dependency to get an async database session, on a read replica for GET requests"""
+    replica = await router.route(request, response)
+    db = None
+    while replica is not None:
+        try:
+            db = await _checkout(replica.session_factory)
+            break
+        except (OSError, SQLAlchemyError) as error:
+            logger.warning("Read replica %s is down: %s", replica.name, error)
+            router.mark_down(replica)
+            replica = router.next_replica()
+    if db is None:
+        db = await _checkout(router.primary)
+    router.count(replica)
+    try:
+        yield db
+    finally:
+        await db.close()
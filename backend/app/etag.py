@@ -0,0 +1,56 @@
+"""
+ETags and conditional requests.
+
+Single orders are tagged from their id and updated_at. Listings and the summary are
+tagged from the change versions kept by app/cache.py plus the query parameters, so a
+matching If-None-Match is answered with 304 before any rows are loaded.
+"""
+
+import hashlib
+from collections.abc import Sequence
+from datetime import datetime
+
+from fastapi import HTTPException, Request, Response
+
+from app.cache import cache
+
+
+def order_etag(order_pk: int, updated_at: datetime) -> str:
+    """Strong ETag for one order; updated_at changes with every write"""
+    return f'"{order_pk}-{updated_at:%Y%m%d%H%M%S%f}"'
+
+
+async def collection_etag(name: str, scopes: Sequence[str], params: dict) -> str:
+    """Strong ETag for a listing from the versions of the scopes it reads"""
+    versions = await cache.backend.versions(scopes)
+    query = "&".join(f"{key}={value}" for key, value in sorted(params.items()) if value is not None)
+    digest = hashlib.blake2b(query.encode(), digest_size=8).hexdigest()
+    return f'"{name}-{cache.backend.epoch}-{".".join(map(str, versions))}-{digest}"'
+
+
+def _tags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(request: Request, etag: str) -> bool:
+    """True when If-None-Match already names etag (weak comparison, RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = _tags(header)
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response carrying the current ETag"""
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def check_if_match(request: Request, etag: str):
+    """Reject the write with 412 if If-Match names a different version (strong comparison)"""
+    header = request.headers.get("if-match")
+    if header is None:
+        return
+    tags = _tags(header)
+    if "*" not in tags and etag not in tags:
+        raise HTTPException(status_code=412, detail="Order was modified by another request")
@@ -0,0 +1,285 @@
+"""
+Order change events: a transactional outbox and the change stream.
+
+Every order mutation calls record() before it commits, so its order_events row is
+committed together with the change or not at all. Each event carries the order as
+OrderResponse JSON and a seq from the table's sequence. Consumers read the events after
+the last seq they saw from GET /orders/changes, as pages that can wait for new events
+(long polling) or as a Server-Sent Events stream, instead of re-reading GET /orders/.
+
+A sequence hands out numbers when rows are inserted, not when they commit, so two
+concurrent transactions could become visible out of order and a reader could skip
+the lower seq for good. On PostgreSQL, record() therefore takes a transaction-level
+advisory lock first. Transactions that record events commit one after another, in seq
+order, and the lock is held only from the event insert to the commit. SQLite
+serializes writers anyway.
+
+OutboxRelay is the other way out of the outbox. It publishes unpublished events in seq
+order to the sink selected by ORDER_EVENTS_SINK and marks them published. Delivery is at
+least once: if the process dies between publishing and marking, the batch is published
+again, so sinks should ignore seqs they have already seen.
+
+After a commit, this process wakes its waiting requests and its relay at once. Events
+committed by other workers are found by polling every ORDER_EVENTS_POLL_SECONDS.
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Iterable
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+from typing import Any, Protocol
+
+import orjson
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import metrics, models, responses, schemas
+from app.config import settings
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+EVENTS_RELAYED = metrics.Counter("order_events_relayed_total", "Order events handed to the sink")
+
+# pg_advisory_xact_lock keys: one orders commits of event writers, one elects the relay
+SEQUENCE_LOCK = 66_001
+RELAY_LOCK = 66_002
+
+# Seconds between comment lines that keep idle Server-Sent Events connections open
+KEEPALIVE_SECONDS = 15.0
+
+
+class ChangeNotifier:
+    """Wakes tasks waiting for events when this process commits some"""
+
+    def __init__(self):
+        self._waiters: set[asyncio.Future] = set()
+
+    def notify(self):
+        waiters, self._waiters = self._waiters, set()
+        for waiter in waiters:
+            # Waiters may belong to another thread's event loop, or one already closed
+            with suppress(RuntimeError):
+                waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for notify() for up to timeout seconds; True if it was called"""
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters.discard(waiter)
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+notifier = ChangeNotifier()
+
+
+def _dumps(value: Any) -> bytes:
+    # UTC datetimes end in Z, as in every other response
+    return orjson.dumps(value, option=orjson.OPT_UTC_Z)
+
+
+def snapshot(order) -> str:
+    """OrderResponse JSON of an ORM order or a row with the same columns"""
+    return _dumps({field: getattr(order, field) for field in responses.ORDER_FIELDS}).decode()
+
+
+async def record(db: AsyncSession, event_type: schemas.OrderEventType, orders: Iterable):
+    """Write one event per order in the current transaction"""
+    rows = [
+        {"order_id": order.order_id, "type": event_type.value, "payload": snapshot(order)}
+        for order in orders
+    ]
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(SEQUENCE_LOCK)))
+    # Rows as executemany parameters rather than one VALUES clause compiled per call,
+    # which gets slow for the thousands of events of a bulk request
+    await db.execute(insert(models.OrderEvent), rows)
+
+
+def as_dict(event: models.OrderEvent) -> dict[str, Any]:
+    """The OrderEvent schema of a stored event as a plain dict"""
+    return {
+        "seq": event.seq,
+        "type": event.type,
+        "order_id": event.order_id,
+        "occurred_at": event.occurred_at,
+        "order": orjson.loads(event.payload),
+    }
+
+
+async def fetch(db: AsyncSession, since: int, limit: int) -> list[dict[str, Any]]:
+    """Up to limit events after seq since, oldest first"""
+    stored = await db.scalars(
+        select(models.OrderEvent)
+        .where(models.OrderEvent.seq > since)
+        .order_by(models.OrderEvent.seq)
+        .limit(limit)
+    )
+    return [as_dict(event) for event in stored]
+
+
+async def wait_for(db: AsyncSession, since: int, limit: int, wait: float) -> list[dict[str, Any]]:
+    """Events after since; if there are none, wait up to wait seconds for some"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        events = await fetch(db, since, limit)
+        remaining = deadline - loop.time()
+        if events or remaining <= 0:
+            return events
+        # End the read so the connection goes back to the pool while waiting
+        await db.rollback()
+        await notifier.wait(min(remaining, settings.order_events_poll_seconds))
+
+
+def format_sse(event: dict[str, Any]) -> bytes:
+    """One Server-Sent Events message; its id lets clients resume with Last-Event-ID"""
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (
+        event["seq"],
+        event["type"].encode(),
+        _dumps(event),
+    )
+
+
+async def stream(db: AsyncSession, since: int) -> AsyncIterator[bytes]:
+    """Server-Sent Events for everything after since, until the client goes away"""
+    loop = asyncio.get_running_loop()
+    last_sent = loop.time()
+    while True:
+        events = await fetch(db, since, settings.order_events_batch_size)
+        await db.rollback()
+        if events:
+            since = events[-1]["seq"]
+            last_sent = loop.time()
+            yield b"".join(format_sse(event) for event in events)
+            continue
+        if loop.time() - last_sent >= KEEPALIVE_SECONDS:
+            last_sent = loop.time()
+            yield b": keepalive\n\n"
+        await notifier.wait(min(settings.order_events_poll_seconds, KEEPALIVE_SECONDS))
+
+
+class Sink(Protocol):
+    async def publish(self, events: list[dict[str, Any]]): ...
+
+
+class MemorySink:
+    """Puts events on an asyncio.Queue, for tests and in-process consumers"""
+
+    def __init__(self):
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+    async def publish(self, events: list[dict[str, Any]]):
+        for event in events:
+            self.queue.put_nowait(event)
+
+
+class LogSink:
+    """Logs one line per event"""
+
+    async def publish(self, events: list[dict[str, Any]]):
+        for event in events:
+            logger.info("order event %d %s %s", event["seq"], event["type"], event["order_id"])
+
+
+class RedisStreamSink:
+    """Appends events to a Redis stream, with the event JSON in its data field"""
+
+    def __init__(self, client, stream: str = "order-service:order-events"):
+        self.client = client
+        self.stream = stream
+
+    async def publish(self, events: list[dict[str, Any]]):
+        async with self.client.pipeline(transaction=True) as pipe:
+            for event in events:
+                pipe.xadd(self.stream, {"seq": event["seq"], "data": _dumps(event)})
+            await pipe.execute()
+
+
+def create_sink() -> Sink | None:
+    """Build the sink selected by ORDER_EVENTS_SINK; None disables the relay"""
+    name = settings.order_events_sink
+    if name == "none":
+        return None
+    if name == "memory":
+        return MemorySink()
+    if name == "log":
+        return LogSink()
+    if name == "redis":
+        import redis.asyncio
+
+        return RedisStreamSink(redis.asyncio.from_url(settings.cache_redis_url))
+    raise ValueError(f"Unknown order events sink: {name}")
+
+
+class OutboxRelay:
+    """Publishes unpublished events to a sink in seq order"""
+
+    def __init__(self, sink: Sink, session_factory=None, batch_size: int | None = None):
+        self.sink = sink
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.batch_size = batch_size or settings.order_events_batch_size
+
+    async def relay_once(self) -> int:
+        """Publish and mark one batch; returns the number of events published"""
+        table = models.OrderEvent
+        async with self.session_factory() as db:
+            # One relay at a time keeps the sink in seq order across workers
+            if db.get_bind().dialect.name == "postgresql" and not await db.scalar(
+                select(func.pg_try_advisory_xact_lock(RELAY_LOCK))
+            ):
+                return 0
+            pending = list(
+                await db.scalars(
+                    select(table)
+                    .where(table.published_at.is_(None))
+                    .order_by(table.seq)
+                    .limit(self.batch_size)
+                )
+            )
+            if not pending:
+                return 0
+            await self.sink.publish([as_dict(event) for event in pending])
+            await db.execute(
+                update(table)
+                .where(table.seq.in_([event.seq for event in pending]))
+                .values(published_at=datetime.now(timezone.utc))
+            )
+            await db.commit()
+        EVENTS_RELAYED.inc(len(pending))
+        return len(pending)
+
+    async def run(self, interval: float):
+        """Relay until cancelled, waking up on local commits or every interval seconds"""
+        while True:
+            try:
+                published = await self.relay_once()
+            except Exception:
+                logger.exception("Failed to relay order events")
+                published = 0
+            if published < self.batch_size:
+                await notifier.wait(interval)
+
+
+def purge(db: Session, older_than: timedelta, keep_unpublished: bool = True) -> int:
+    """Delete events older than older_than, unpublished ones only if asked; returns how many"""
+    table = models.OrderEvent
+    cutoff = datetime.now(timezone.utc) - older_than
+    stmt = delete(table).where(table.occurred_at < cutoff)
+    if keep_unpublished:
+        stmt = stmt.where(table.published_at.is_not(None))
+    return db.execute(stmt).rowcount
@@ -0,0 +1,72 @@
+"""
+Streaming order export for GET /orders/export.
+
+Rows are selected as plain column tuples and fetched in batches through a server-side
+cursor, then written out as NDJSON or CSV one batch at a time. No ORM objects or
+pydantic models are built and memory use does not grow with the number of rows.
+"""
+
+import csv
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator, Iterable
+from datetime import datetime
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, responses
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def export_query() -> Select:
+    """Base query selecting the columns of OrderResponse, oldest first"""
+    return select(*responses.ORDER_COLUMNS).order_by(models.Order.order_date, models.Order.id)
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _ndjson(rows: Iterable[tuple]) -> bytes:
+    return "".join(
+        json.dumps(
+            dict(zip(responses.ORDER_FIELDS, map(_plain, row), strict=True)), separators=(",", ":")
+        )
+        + "\n"
+        for row in rows
+    ).encode()
+
+
+def _csv(rows: Iterable[tuple], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(responses.ORDER_FIELDS)
+    writer.writerows(tuple(map(_plain, row)) for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def stream(
+    db: AsyncSession, query: Select, fmt: str, batch_size: int, gzip: bool = False
+) -> AsyncIterator[bytes]:
+    """Yield the encoded export one batch of rows at a time"""
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+
+    if fmt == "csv":
+        # The header goes out even when there are no rows
+        chunk = _csv((), header=True)
+        yield compressor.compress(chunk) if compressor else chunk
+
+    async for rows in result.partitions():
+        chunk = _ndjson(rows) if fmt == "ndjson" else _csv(rows, header=False)
+        if compressor:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+
+    if compressor:
+        yield compressor.flush()
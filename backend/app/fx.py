@@ -0,0 +1,154 @@
+"""
+Exchange rates and currency normalization for /orders/summary.
+
+fx_rates stores, per currency and effective date, the value of one major unit in ISK.
+A rate applies from its effective date until the next one. Conversions between any two
+currencies go through ISK and run in SQL against the per-day rows of the summary (see
+app/summary.py), so Python only sees one row per bucket. The rate table itself is
+small and cached in process.
+"""
+
+import time
+from collections.abc import Callable
+from datetime import date
+from decimal import Decimal
+
+from fastapi import HTTPException
+from sqlalchemy import Float, case, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.config import settings
+
+# ISO 4217 minor units for currencies that do not use cents; amounts are stored in
+# the smallest unit, so converting USD cents to ISK krónur also rescales by 100
+MINOR_UNITS = {"ISK": 0, "JPY": 0}
+DEFAULT_MINOR_UNITS = 2
+
+# currency -> [(effective_date, rate)] in ascending date order
+RateTable = dict[str, list[tuple[date, Decimal]]]
+
+_cache: RateTable | None = None
+_loaded_at = 0.0
+
+
+def invalidate():
+    """Drop the cached rate table so the next read reloads it"""
+    global _cache
+    _cache = None
+
+
+async def get_rates(db: AsyncSession) -> RateTable:
+    """Return all rates, reloading when the cache was invalidated or expired"""
+    global _cache, _loaded_at
+    if _cache is None or time.monotonic() - _loaded_at > settings.fx_cache_ttl_seconds:
+        rows = await db.execute(
+            select(
+                models.FxRate.currency, models.FxRate.effective_date, models.FxRate.rate
+            ).order_by(models.FxRate.currency, models.FxRate.effective_date)
+        )
+        table: RateTable = {}
+        for row in rows:
+            table.setdefault(row.currency, []).append((row.effective_date, Decimal(row.rate)))
+        _cache, _loaded_at = table, time.monotonic()
+    return _cache
+
+
+def _scale(currency: str | None) -> int:
+    return 10 ** MINOR_UNITS.get(currency, DEFAULT_MINOR_UNITS)
+
+
+def _rate_on(currency, day):
+    """Scalar subquery for the rate of currency in effect on day"""
+    return (
+        select(models.FxRate.rate)
+        .where(models.FxRate.currency == currency, models.FxRate.effective_date <= day)
+        .order_by(models.FxRate.effective_date.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def converted_rows(db: AsyncSession, target: str, daily):
+    """
+    Subquery of the (day, currency, revenue_sum) rows of daily with revenue_sum
+    converted to target.
+
+    amount is NULL where either currency has no rate on or before the day.
+    """
+    source_scale = case(
+        {currency: _scale(currency) for currency in MINOR_UNITS},
+        value=daily.c.currency,
+        else_=_scale(None),
+    )
+    denominator = _rate_on(target, daily.c.day) * source_scale
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite keeps whole-number NUMERIC values as integers and would truncate
+        denominator = cast(denominator, Float)
+
+    amount = func.round(
+        daily.c.revenue_sum * _rate_on(daily.c.currency, daily.c.day) * _scale(target) / denominator
+    )
+    return select(daily.c.day, daily.c.currency, amount.label("amount")).subquery()
+
+
+async def normalized_summary(
+    db: AsyncSession, target: str, daily, bucket: Callable = lambda day: day
+) -> dict:
+    """
+    Revenue totals and revenue per bucket converted to target, aggregated in SQL.
+
+    Each day converts at its own rate before bucket groups the days.
+    """
+    rates = await get_rates(db)
+    if target not in rates:
+        raise HTTPException(status_code=422, detail=f"No FX rate for {target}")
+
+    rows = converted_rows(db, target, daily)
+    by_currency = (
+        await db.execute(
+            select(
+                rows.c.currency,
+                func.sum(rows.c.amount).label("total"),
+                (func.count() - func.count(rows.c.amount)).label("missing"),
+            )
+            .group_by(rows.c.currency)
+            .order_by(rows.c.currency)
+        )
+    ).all()
+
+    missing = [row.currency for row in by_currency if row.missing]
+    if missing:
+        raise HTTPException(
+            status_code=422,
+            detail=f"No FX rate in effect for some order dates in: {', '.join(missing)}",
+        )
+
+    start = bucket(rows.c.day)
+    by_bucket = await db.execute(
+        select(start.label("start"), func.sum(rows.c.amount).label("revenue"))
+        .group_by(start)
+        .order_by(start.desc())
+    )
+
+    total_by_currency = [{"currency": row.currency, "total": int(row.total)} for row in by_currency]
+    return {
+        "currency": target,
+        "total": sum(item["total"] for item in total_by_currency),
+        "total_by_currency": total_by_currency,
+        "revenue_per_day": [
+            {"date": str(row.start), "revenue": int(row.revenue)} for row in by_bucket
+        ],
+    }
+
+
+def latest_rates(rates: RateTable, on: date | None = None) -> list[dict]:
+    """The rate in effect for each currency on a day, today when not given"""
+    on = on or date.today()
+    latest = []
+    for currency, history in sorted(rates.items()):
+        effective = [entry for entry in history if entry[0] <= on]
+        if effective:
+            effective_date, rate = effective[-1]
+            latest.append({"currency": currency, "effective_date": effective_date, "rate": rate})
+    return latest
@@ -0,0 +1,103 @@
+"""
+Idempotency-Key support for POST /orders/.
+
+A client that may retry an order creation sends the same Idempotency-Key header with
+every attempt. The attempt that creates the order stores its response under the key in
+the same transaction, so the key and the order are committed together or not at all.
+Later attempts find the key with one primary key lookup and get the stored response
+back without touching orders. Reusing a key for a different request body is rejected
+with 422.
+
+Concurrent attempts that all miss the lookup race on the order_id and on the key, and
+the database lets exactly one of them commit. The losers look the key up again and
+replay the winner's response. A loser that no longer finds the key gets 409.
+
+Keys are scoped to the digest of the API key that sent them and kept for at least
+IDEMPOTENCY_KEY_TTL_HOURS; `python -m app.cli idempotency-purge` deletes older ones.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import etag, models
+from app.database import dialect_insert
+
+HEADER = "Idempotency-Key"
+
+
+def fingerprint(body: BaseModel) -> str:
+    """Hash of the validated request body, stable across field order and whitespace"""
+    canonical = json.dumps(body.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+async def lookup(db: AsyncSession, client: str, key: str) -> models.IdempotencyKey | None:
+    return await db.scalar(
+        select(models.IdempotencyKey).where(
+            models.IdempotencyKey.client == client, models.IdempotencyKey.key == key
+        )
+    )
+
+
+async def store(
+    db: AsyncSession, client: str, key: str, request_fingerprint: str, status_code: int, body
+) -> bool:
+    """
+    Record the response for key in the current transaction.
+
+    Returns False if another request stored the key first; its transaction must then
+    be rolled back so that its other writes are discarded.
+    """
+    table = models.IdempotencyKey
+    stmt = (
+        dialect_insert(db)(table)
+        .values(
+            client=client,
+            key=key,
+            fingerprint=request_fingerprint,
+            status_code=status_code,
+            response_body=json.dumps(body),
+        )
+        .on_conflict_do_nothing(index_elements=[table.client, table.key])
+        .returning(table.key)
+    )
+    return await db.scalar(stmt) is not None
+
+
+def replay(record: models.IdempotencyKey | None, request_fingerprint: str) -> JSONResponse:
+    """
+    The stored response, or 422 if the key was used for a different request.
+
+    A record looked up again after losing the race for the key can be gone, e.g. purged
+    in between; that attempt gets a 409 and may be retried.
+    """
+    if record is None:
+        raise HTTPException(
+            status_code=409, detail=f"{HEADER} is in use by a concurrent request, retry"
+        )
+    if record.fingerprint != request_fingerprint:
+        raise HTTPException(
+            status_code=422, detail=f"{HEADER} was already used for a different request"
+        )
+    body = json.loads(record.response_body)
+    headers = {"Idempotent-Replayed": "true"}
+    if "id" in body and "updated_at" in body:
+        headers["ETag"] = etag.order_etag(body["id"], datetime.fromisoformat(body["updated_at"]))
+    return JSONResponse(body, status_code=record.status_code, headers=headers)
+
+
+def purge(db: Session, older_than: timedelta) -> int:
+    """Delete keys first used more than older_than ago; returns how many"""
+    cutoff = datetime.now(timezone.utc) - older_than
+    result = db.execute(
+        delete(models.IdempotencyKey).where(models.IdempotencyKey.created_at < cutoff)
+    )
+    return result.rowcount
@@ -0,0 +1,255 @@
+"""
+Request timing and SQL query instrumentation.
+
+With INSTRUMENTATION_ENABLED set, every request gets a RequestStats in a context
+variable. Cursor events on all engines add each statement's duration to it, and the
+route class records when the endpoint function starts and returns. The middleware turns
+that into a Server-Timing header and per-route histograms on /metrics:
+
+    deps       routing, request validation and dependencies (API key, session checkout)
+    handler    the endpoint function, including its queries
+    serialize  response model validation and JSON encoding
+    db         time spent executing SQL, also counted in deps and handler
+    total      until the response headers are sent
+
+Independently, SLOW_QUERY_MS logs statements slower than the threshold together with
+their query plan. Both are off by default; disabled, the cost is one settings lookup
+per request and one context variable read per query.
+"""
+
+import functools
+import inspect
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from app import metrics
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+REQUEST_SECONDS = metrics.Histogram(
+    "http_request_duration_seconds", "Time from receiving a request to sending the last byte"
+)
+REQUEST_DB_SECONDS = metrics.Histogram(
+    "http_request_db_seconds", "Time spent executing SQL statements per request"
+)
+REQUEST_QUERIES = metrics.Histogram(
+    "http_request_db_queries", "SQL statements executed per request", buckets=QUERY_BUCKETS
+)
+REQUEST_SERIALIZE_SECONDS = metrics.Histogram(
+    "http_request_serialize_seconds", "Time from the endpoint returning to the response start"
+)
+SLOW_QUERIES = metrics.Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS")
+
+# conn.info key holding the start times of statements in flight on a connection
+_STARTED = "instrumentation_started"
+
+
+@dataclass
+class RequestStats:
+    """Timings collected while one request is handled, from time.perf_counter()"""
+
+    started: float
+    queries: int = 0
+    db_seconds: float = 0.0
+    handler_started: float | None = None
+    handler_finished: float | None = None
+    response_started: float | None = None
+
+    def phases(self) -> dict[str, float]:
+        """Durations in seconds of the phases that happened, in request order"""
+        end = self.response_started or time.perf_counter()
+        phases = {}
+        if self.handler_started is not None:
+            phases["deps"] = self.handler_started - self.started
+        if self.handler_finished is not None:
+            phases["handler"] = self.handler_finished - self.handler_started
+            phases["serialize"] = end - self.handler_finished
+        phases["db"] = self.db_seconds
+        phases["total"] = end - self.started
+        return phases
+
+    def server_timing(self) -> str:
+        entries = []
+        for name, seconds in self.phases().items():
+            entry = f"{name};dur={seconds * 1000:.3f}"
+            if name == "db":
+                entry += f';desc="{self.queries} queries"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+class TimingMiddleware:
+    """Collect RequestStats per request and report them as Server-Timing and metrics"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.instrumentation_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(started=time.perf_counter())
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                stats.response_started = time.perf_counter()
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            _observe(scope, stats)
+
+
+def _observe(scope, stats: RequestStats):
+    # Label by route template so /orders/{order_id} is one series, not one per order
+    route = scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    REQUEST_SECONDS.observe(time.perf_counter() - stats.started, method=scope["method"], route=path)
+    REQUEST_DB_SECONDS.observe(stats.db_seconds, route=path)
+    REQUEST_QUERIES.observe(stats.queries, route=path)
+    if stats.handler_finished is not None and stats.response_started is not None:
+        REQUEST_SERIALIZE_SECONDS.observe(
+            stats.response_started - stats.handler_finished, route=path
+        )
+
+
+def _timed(endpoint):
+    """Wrap an endpoint to record when it starts and returns"""
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def timed_async(*args, **kwargs):
+            stats = _current.get()
+            if stats is None:
+                return await endpoint(*args, **kwargs)
+            stats.handler_started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                stats.handler_finished = time.perf_counter()
+
+        return timed_async
+
+    @functools.wraps(endpoint)
+    def timed(*args, **kwargs):
+        # Runs in the threadpool, which copies the context and so shares the stats
+        stats = _current.get()
+        if stats is None:
+            return endpoint(*args, **kwargs)
+        stats.handler_started = time.perf_counter()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            stats.handler_finished = time.perf_counter()
+
+    return timed
+
+
+class InstrumentedRoute(APIRoute):
+    """APIRoute whose endpoint reports its start and end to the request stats"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed(endpoint), **kwargs)
+
+
+def install(app: FastAPI):
+    """Add the middleware and route class to app; call before declaring routes"""
+    app.router.route_class = InstrumentedRoute
+    app.add_middleware(TimingMiddleware)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is None and not settings.slow_query_ms:
+        return
+    conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get(_STARTED)
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+    if settings.slow_query_ms and elapsed * 1000 >= settings.slow_query_ms:
+        _log_slow_query(conn, statement, parameters, executemany, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(_STARTED):
+        connection.info[_STARTED].pop()
+
+
+def _log_slow_query(conn, statement: str, parameters, executemany: bool, elapsed: float):
+    SLOW_QUERIES.inc()
+    plan = None
+    if settings.slow_query_explain and not executemany:
+        plan = explain(conn, statement, parameters)
+    logger.warning(
+        "Slow query (%.1f ms): %s\nParameters: %r%s",
+        elapsed * 1000,
+        statement,
+        parameters,
+        f"\nPlan:\n{plan}" if plan else "",
+    )
+
+
+def explain(conn, statement: str, parameters) -> str | None:
+    """
+    Query plan of an already executed statement, or None if it cannot be explained.
+
+    Runs plain EXPLAIN (EXPLAIN QUERY PLAN on SQLite), which plans without executing,
+    on the raw DBAPI connection so the cursor events do not fire again. On PostgreSQL a
+    savepoint keeps a failing EXPLAIN from aborting the request's transaction.
+    """
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    if keyword not in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE"):
+        return None
+    sqlite = conn.dialect.name == "sqlite"
+    cursor = conn.connection.cursor()
+    try:
+        if not sqlite:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(
+                ("EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN ") + statement, parameters
+            )
+            rows = cursor.fetchall()
+        except Exception:
+            logger.debug("Could not explain slow query", exc_info=True)
+            if not sqlite:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            return None
+        if not sqlite:
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return "\n".join(" ".join(str(column) for column in row) for row in rows)
+    finally:
+        cursor.close()
@@ -0,0 +1,121 @@
+"""
+Adaptive load shedding.
+
+When the service is saturated, queueing more work only makes every request slower and
+eventually times them all out. LoadSheddingMiddleware instead answers 503 with
+Retry-After straight away, before routing, authentication or any database work, while
+either signal is over its threshold:
+
+- requests in flight in this worker (LOAD_SHED_MAX_IN_FLIGHT)
+- the smoothed wait for a pooled database connection (LOAD_SHED_POOL_WAIT_MS), fed by
+  get_async_db
+
+The pool wait is an exponentially weighted average that also decays towards zero while
+no samples arrive. Shedding therefore stops by itself once the pool recovers, even
+though shed requests never check out a connection. / and /metrics are never shed.
+
+GET /orders/changes streams and long polls stay open for as long as their clients
+listen. They are shed like any request but not counted as in flight, so idle
+subscribers cannot use up LOAD_SHED_MAX_IN_FLIGHT and starve everything else.
+"""
+
+import json
+import math
+import time
+from collections.abc import Callable
+
+from app import metrics
+from app.config import settings
+
+SHED_REQUESTS = metrics.Counter(
+    "load_shed_requests_total", "Requests rejected with 503 by the load shedder, by reason"
+)
+IN_FLIGHT = metrics.Gauge("http_requests_in_flight", "Requests being handled by this worker")
+
+EXEMPT_PATHS = frozenset({"/", "/metrics"})
+
+# Admitted like other requests but left out of the in-flight count
+UNCOUNTED_PATHS = frozenset({"/orders/changes"})
+
+
+class LoadShedder:
+    """In-flight request count and smoothed pool wait, checked against the thresholds"""
+
+    # Weight of a new pool wait sample, and the time constant of the decay in seconds
+    ALPHA = 0.3
+    DECAY_SECONDS = 2.0
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.in_flight = 0
+        self._pool_wait = 0.0
+        self._observed = clock()
+
+    def pool_wait(self) -> float:
+        """Smoothed pool checkout wait in seconds, decayed to now"""
+        elapsed = self.clock() - self._observed
+        return self._pool_wait * math.exp(-elapsed / self.DECAY_SECONDS)
+
+    def observe_pool_wait(self, seconds: float):
+        current = self.pool_wait()
+        self._pool_wait = current + self.ALPHA * (seconds - current)
+        self._observed = self.clock()
+
+    def overloaded(self) -> str | None:
+        """The reason to shed a new request, or None to admit it"""
+        max_in_flight = settings.load_shed_max_in_flight
+        if max_in_flight and self.in_flight >= max_in_flight:
+            return "in_flight"
+        threshold = settings.load_shed_pool_wait_ms / 1000
+        if threshold and self.pool_wait() > threshold:
+            return "pool_wait"
+        return None
+
+
+shedder = LoadShedder()
+
+
+class LoadSheddingMiddleware:
+    """Pure ASGI middleware counting requests in flight and shedding when overloaded"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        current = shedder
+        reason = current.overloaded()
+        if reason is not None:
+            SHED_REQUESTS.inc(reason=reason)
+            await self._reject(send)
+            return
+        if scope["path"] in UNCOUNTED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        current.in_flight += 1
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current.in_flight -= 1
+            IN_FLIGHT.dec()
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps({"detail": "Service overloaded, retry later"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(settings.load_shed_retry_after_seconds).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
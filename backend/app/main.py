@@ -1,14 +1,78 @@
-from fastapi import FastAPI, Depends, HTTPException
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from datetime import date, datetime
+from typing import Literal
+
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response, Security
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-from app.auth import verify_api_key
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.auth import ApiKeyPrincipal, verify_api_key
+
+
+from app.config import settings
+from app.cache import cache
+from app.database import dialect_insert, get_async_db
+from app import (
+    auth,
+    bulk,
+    customers,
+    database,
+    etag,
+    events,
+    export,
+    fx,
+    idempotency,
+    instrumentation,
+    loadshed,
+    metrics,
+    models,
+    pagination,
+    responses,
+    rollup,
+    schemas,
+    search,
+    stats,
+    summary,
+    transitions,
+    writes,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Batched API key usage counts, see app/auth.py
+    tasks = [
+        asyncio.create_task(auth.flush_usage_periodically(settings.api_key_usage_flush_seconds))
+    ]
+    # Order events relay, see app/events.py; ORDER_EVENTS_SINK=none leaves it off
+    sink = events.create_sink()
+    if sink is not None:
+        relay = events.OutboxRelay(sink)
+        tasks.append(asyncio.create_task(relay.run(settings.order_events_poll_seconds)))
+    # Read replica health checks, see app/replicas.py
+    if database.router.replicas:
+        interval = settings.replica_health_check_seconds
+        tasks.append(asyncio.create_task(database.router.check_periodically(interval)))
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+
 
+app = FastAPI(title="66°North Order Service", lifespan=lifespan)
 
-from app.database import get_db
-from app import models, schemas
+# Request timing; passes requests straight through unless INSTRUMENTATION_ENABLED is set
+instrumentation.install(app)
 
-app = FastAPI(title="66°North Order Service")
+# 503 with Retry-After while too many requests are in flight or pool waits are long
+app.add_middleware(loadshed.LoadSheddingMiddleware)
 
 # Configure CORS
 app.add_middleware(
@@ -17,6 +81,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    # Pagination cursor for GET /orders/, and where reads go after a write
+    expose_headers=["X-Next-Cursor", "ETag", "X-Read-Primary-Until"],
 )
 
 
@@ -25,138 +91,581 @@ def read_root():
     return {"message": "Welcome to 66°North Order Service API!"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def read_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/orders/", response_model=schemas.OrderResponse, status_code=201)
-def create_order(
+async def create_order(
     order: schemas.OrderCreate,
-    db: Session = Depends(get_db),
-    api_key: str = Depends(verify_api_key),
+    response: Response,
+    idempotency_key: str | None = Header(
+        None,
+        min_length=1,
+        max_length=255,
+        description="Retries with the same key return the original response",
+    ),
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:write"]),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create a new order"""
-    # Check if order_id already exists
-    db_order = db.query(models.Order).filter(models.Order.order_id == order.order_id).first()
-    if db_order:
+    if idempotency_key:
+        client = api_key.key_hash
+        request_fingerprint = idempotency.fingerprint(order)
+        stored = await idempotency.lookup(db, client, idempotency_key)
+        if stored is not None:
+            return idempotency.replay(stored, request_fingerprint)
+
+    # One statement both checks and inserts, so concurrent requests for the same
+    # order_id cannot both pass the check. The response columns, server defaults such
+    # as order_date included, come back with the RETURNING clause.
+    values = order.model_dump(exclude_none=True)
+    values["status"] = order.status.value
+    stmt = dialect_insert(db)(models.Order).values(values).returning(*responses.ORDER_COLUMNS)
+    if db.get_bind().dialect.name == "sqlite":
+        stmt = stmt.on_conflict_do_nothing(index_elements=[models.Order.order_id])
+    try:
+        db_order = (await db.execute(stmt)).first()
+    except IntegrityError:
+        # PostgreSQL enforces order_id through the order_ids trigger (see
+        # app/partitions.py), which ON CONFLICT cannot target. Any other violation
+        # is not a duplicate and is raised as it is.
+        await db.rollback()
+        taken = select(models.Order.id).where(models.Order.order_id == order.order_id)
+        if await db.scalar(taken) is None:
+            raise
+        db_order = None
+
+    if db_order is None:
+        if idempotency_key:
+            # A concurrent retry with the same key may have created it
+            stored = await idempotency.lookup(db, client, idempotency_key)
+            if stored is not None:
+                return idempotency.replay(stored, request_fingerprint)
         raise HTTPException(status_code=400, detail="Order ID already exists")
 
-    # Create order
-    db_order = models.Order(**order.model_dump())
-    db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
+    await rollup.add_order(db, db_order)
+    await customers.add_order(db, db_order)
+    await events.record(db, schemas.OrderEventType.CREATED, [db_order])
+    if idempotency_key:
+        body = schemas.OrderResponse.model_validate(db_order).model_dump(mode="json")
+        if not await idempotency.store(db, client, idempotency_key, request_fingerprint, 201, body):
+            # The same key was used concurrently for a different order_id
+            await db.rollback()
+            stored = await idempotency.lookup(db, client, idempotency_key)
+            return idempotency.replay(stored, request_fingerprint)
+
+    await db.commit()
+    events.notifier.notify()
+    await cache.invalidate("orders")
+    response.headers["ETag"] = etag.order_etag(db_order.id, db_order.updated_at)
     return db_order
 
 
+@app.post(
+    "/orders/bulk",
+    response_model=schemas.BulkOrderResponse,
+    openapi_extra=bulk.OPENAPI_REQUEST_BODY,
+)
+async def create_orders_bulk(
+    request: Request,
+    response: Response,
+    atomic: bool = Query(False, description="Create nothing unless every row can be created"),
+    chunk_size: int | None = Query(None, ge=1, le=10000, description="Rows per INSERT"),
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:write"]),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Create many orders from a JSON array or an NDJSON stream (application/x-ndjson).
+
+    Every input row gets a created/duplicate/invalid result. With atomic=true nothing is
+    created if any row fails, the valid rows are reported as skipped and the response
+    status is 422.
+    """
+    ingest = bulk.BulkIngest(atomic=atomic)
+    size = chunk_size or settings.bulk_chunk_size
+
+    chunk = []
+    async for row in bulk.read_rows(request):
+        chunk.append(row)
+        if len(chunk) >= size:
+            await ingest.process_chunk(db, chunk)
+            chunk = []
+    if chunk:
+        await ingest.process_chunk(db, chunk)
+
+    report = await ingest.finish(db)
+    if ingest.failed:
+        response.status_code = 422
+    return report
+
+
+@app.post("/orders/status-transitions", response_model=schemas.StatusTransitionResponse)
+async def transition_order_status(
+    transition: schemas.StatusTransitionRequest,
+    chunk_size: int | None = Query(None, ge=1, le=50000, description="Orders per UPDATE"),
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:write"]),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Move many orders to one status, selected by order_ids or by a filter.
+
+    Only orders whose current status may move to the new one are changed, see
+    app/transitions.py. Requested order_ids that are already in the status, do not
+    exist or may not move are listed in the response. With a filter, orders that may
+    not move are left alone and not listed.
+    """
+    mover = transitions.StatusTransition(transition.status)
+    return await mover.run(db, transition, chunk_size or settings.status_transition_chunk_size)
+
+
 @app.get("/orders/summary", response_model=schemas.OrderSummary)
-def get_orders_summary(db: Session = Depends(get_db), api_key: str = Depends(verify_api_key)):
+async def get_orders_summary(
+    request: Request,
+    response: Response,
+    normalize_to: str | None = Query(
+        None,
+        min_length=3,
+        max_length=3,
+        description="Also convert all revenue to this currency (e.g., ISK)",
+    ),
+    date_from: date | None = Query(None, alias="from", description="First day, inclusive"),
+    date_to: date | None = Query(None, alias="to", description="Last day, exclusive"),
+    granularity: schemas.SummaryGranularity = Query(
+        schemas.SummaryGranularity.DAY, description="Bucket size of revenue_per_day"
+    ),
+    tz: str = Query("UTC", description="IANA time zone that days are counted in"),
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:read"]),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Get aggregated order data:
     - Total number of orders
     - Total revenue per currency
-    - Revenue per day per currency
+    - Revenue per day (or week or month) per currency
+    - With normalize_to, the same revenue converted at each day's FX rate
+
+    from and to limit the summary to local days in tz; without them it covers every order.
     """
-    # Total orders count
-    total_orders = db.query(func.count(models.Order.id)).scalar() or 0
+    if normalize_to:
+        normalize_to = normalize_to.upper()
+        if normalize_to not in schemas.VALID_CURRENCIES:
+            raise HTTPException(status_code=422, detail=f"Unsupported currency: {normalize_to}")
+    window = summary.parse_window(date_from, date_to, granularity.value, tz)
 
-    # Total revenue by currency
-    revenue_by_currency = (
-        db.query(models.Order.currency, func.sum(models.Order.total_amount).label("total"))
-        .group_by(models.Order.currency)
-        .all()
+    summary_etag = await etag.collection_etag(
+        "summary",
+        ("orders", "fx_rates"),
+        {
+            "normalize_to": normalize_to,
+            "from": window.date_from,
+            "to": window.date_to,
+            "granularity": window.granularity,
+            "tz": window.tz,
+        },
     )
+    if etag.none_match(request, summary_etag):
+        return etag.not_modified(summary_etag)
+    response.headers["ETag"] = summary_etag
 
-    # Format revenue by currency
-    total_revenue = [
-        {"currency": row.currency, "total": int(row.total)} for row in revenue_by_currency
-    ]
+    # Served from the response cache until an order or FX rate write bumps its version
+    return await cache.get_or_compute(
+        "summary",
+        f"{normalize_to or ''}:{window.cache_key()}",
+        scopes=("orders", "fx_rates"),
+        ttl=settings.summary_cache_ttl_seconds,
+        compute=lambda: summary.summarize(db, window, normalize_to),
+    )
 
-    # Revenue per day by currency
-    revenue_by_day_currency = (
-        db.query(
-            func.date(models.Order.order_date).label("date"),
-            models.Order.currency,
-            func.sum(models.Order.total_amount).label("revenue"),
-        )
-        .group_by(func.date(models.Order.order_date), models.Order.currency)
-        .order_by(func.date(models.Order.order_date).desc(), models.Order.currency)
-        .all()
+
+@app.get("/orders/stats", response_model=schemas.OrderStats)
+async def get_order_stats(
+    request: Request,
+    response: Response,
+    date_from: date | None = Query(None, alias="from", description="First day, inclusive"),
+    date_to: date | None = Query(None, alias="to", description="Last day, exclusive"),
+    tz: str = Query("UTC", description="IANA time zone that days are counted in"),
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:read"]),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get dashboard statistics:
+    - Total number of orders and the number placed today
+    - Number of orders per status
+    - Average, smallest and largest order per currency
+
+    from and to limit the statistics to local days in tz; without them they cover every
+    order.
+    """
+    window = summary.parse_window(date_from, date_to, "day", tz)
+    day = stats.today(window)
+
+    stats_etag = await etag.collection_etag(
+        "stats",
+        ("orders",),
+        {"from": window.date_from, "to": window.date_to, "tz": window.tz, "today": day},
+    )
+    if etag.none_match(request, stats_etag):
+        return etag.not_modified(stats_etag)
+    response.headers["ETag"] = stats_etag
+
+    # Keyed by the local date too, so today_orders starts over at midnight
+    return await cache.get_or_compute(
+        "stats",
+        f"{window.cache_key()}:{day}",
+        scopes=("orders",),
+        ttl=settings.order_stats_cache_ttl_seconds,
+        compute=lambda: stats.compute(db, window, day),
     )
 
-    # Format revenue per day
-    revenue_per_day = [
-        {"date": str(row.date), "currency": row.currency, "revenue": int(row.revenue)}
-        for row in revenue_by_day_currency
-    ]
 
-    return {
-        "total_orders": total_orders,
-        "total_revenue": total_revenue,
-        "revenue_per_day": revenue_per_day,
-    }
+@app.get("/orders/export", response_class=StreamingResponse)
+async def export_orders(
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    status: str | None = None,
+    customer_id: str | None = None,
+    date_from: datetime | None = Query(None, alias="from", description="order_date >= from"),
+    date_to: datetime | None = Query(None, alias="to", description="order_date < to"),
+    gzip: bool = Query(False, description="Compress the body (Content-Encoding: gzip)"),
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:read"]),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Stream all matching orders, oldest first, as NDJSON or CSV.
+
+    Rows are read through a server-side cursor and written as they arrive, so the
+    export can be any size.
+    """
+    query = export.export_query()
+    if status:
+        query = query.where(models.Order.status == status)
+    if customer_id:
+        query = query.where(models.Order.customer_id == customer_id)
+    if date_from:
+        query = query.where(models.Order.order_date >= date_from)
+    if date_to:
+        query = query.where(models.Order.order_date < date_to)
+
+    headers = {"Content-Disposition": f'attachment; filename="orders.{fmt}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export.stream(db, query, fmt, settings.export_batch_size, gzip=gzip),
+        media_type=export.MEDIA_TYPES[fmt],
+        headers=headers,
+    )
+
+
+@app.get(
+    "/orders/changes",
+    response_model=schemas.OrderChanges,
+    responses={
+        200: {
+            "content": {
+                "text/event-stream": {
+                    "schema": {"type": "string", "description": "One OrderEvent per message"}
+                }
+            }
+        }
+    },
+)
+async def read_order_changes(
+    request: Request,
+    since: int = Query(0, ge=0, description="Return events after this seq (0 for all)"),
+    limit: int = Query(100, ge=1, le=1000, description="Events per page"),
+    wait: float = Query(
+        0, ge=0, le=60, description="Seconds to wait for new events if there are none yet"
+    ),
+    last_event_id: int | None = Header(
+        None, ge=0, description="Server-Sent Events resume point; overrides since"
+    ),
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:read"]),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get order changes after a sequence number, oldest first.
 
+    Every create, update and delete is one event carrying the order. Pass the next
+    value of a page as since to get the changes after it. With wait, a request that
+    finds no new events waits up to that many seconds for some to arrive.
 
-@app.get("/orders/", response_model=list[schemas.OrderResponse])
-def read_orders(
+    With Accept: text/event-stream the response is a Server-Sent Events stream that
+    stays open and sends events as they are committed. Reconnecting clients resume
+    through the Last-Event-ID header.
+    """
+    if last_event_id is not None:
+        since = last_event_id
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            events.stream(db, since),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    page = await events.wait_for(db, since, limit, wait)
+    return {"events": page, "next": page[-1]["seq"] if page else since}
+
+
+@app.get(
+    "/orders/",
+    response_model=list[schemas.OrderResponse],
+    response_class=responses.ORJSONResponse,
+)
+async def read_orders(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     status: str | None = None,
     customer_id: str | None = None,
-    db: Session = Depends(get_db),
-    api_key: str = Depends(verify_api_key),
+    date_from: datetime | None = Query(None, alias="from", description="order_date >= from"),
+    date_to: datetime | None = Query(None, alias="to", description="order_date < to"),
+    cursor: str | None = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header of the previous page"
+    ),
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:read"]),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get all orders with optional filtering"""
-    query = db.query(models.Order)
+    """
+    Get orders, newest first, with optional filtering.
+
+    When a full page is returned the X-Next-Cursor response header holds a cursor for
+    the next page. Passing it back as ?cursor= seeks directly past the previous page,
+    which stays fast and stable at any depth, unlike skip. from/to bound order_date,
+    which on PostgreSQL limits the scan to the monthly partitions in that range.
+    """
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+
+    list_etag = await etag.collection_etag(
+        "orders",
+        ("orders",),
+        {
+            "skip": skip,
+            "limit": limit,
+            "status": status,
+            "customer_id": customer_id,
+            "from": date_from,
+            "to": date_to,
+            "cursor": cursor,
+        },
+    )
+    if etag.none_match(request, list_etag):
+        return etag.not_modified(list_etag)
+    headers = {"ETag": list_etag}
+
+    # Plain columns, encoded without an OrderResponse per row (see app.responses)
+    query = select(*responses.ORDER_COLUMNS)
 
     # Apply filters if provided
     if status:
-        query = query.filter(models.Order.status == status)
+        query = query.where(models.Order.status == status)
     if customer_id:
-        query = query.filter(models.Order.customer_id == customer_id)
+        query = query.where(models.Order.customer_id == customer_id)
+    if date_from:
+        query = query.where(models.Order.order_date >= date_from)
+    if date_to:
+        query = query.where(models.Order.order_date < date_to)
+
+    if cursor:
+        after_date, after_id = pagination.decode_cursor(cursor)
+        query = query.where(
+            tuple_(models.Order.order_date, models.Order.id) < tuple_(after_date, after_id),
+            # Implied by the row comparison, but only a plain bound prunes partitions
+            models.Order.order_date <= after_date,
+        )
+
+    query = query.order_by(models.Order.order_date.desc(), models.Order.id.desc())
+    rows = (await db.execute(query.offset(skip).limit(limit))).all()
 
-    orders = query.offset(skip).limit(limit).all()
-    return orders
+    if limit and len(rows) == limit:
+        last = rows[-1]
+        headers["X-Next-Cursor"] = pagination.encode_cursor(last.order_date, last.id)
+    return responses.ORJSONResponse(responses.order_rows(rows), headers=headers)
+
+
+@app.get(
+    "/orders/search",
+    response_model=list[schemas.OrderResponse],
+    response_class=responses.ORJSONResponse,
+)
+async def search_orders(
+    q: str = Query(
+        ..., min_length=1, max_length=100, description="Text to find in order_id or customer_id"
+    ),
+    status: str | None = None,
+    limit: int = Query(50, ge=1, le=500, description="Orders per page"),
+    cursor: str | None = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header of the previous page"
+    ),
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:read"]),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Search orders by order_id or customer_id, case-insensitively.
+
+    Exact matches come first, then prefix matches, then matches anywhere in either
+    value, each group newest first. Terms shorter than three characters match exactly
+    or by prefix only. When a full page is returned the X-Next-Cursor response header
+    holds a cursor for the next page, to pass back as ?cursor=.
+    """
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=422, detail="Search term must not be blank")
+    after = pagination.decode_search_cursor(cursor) if cursor else None
+
+    rows = await search.search_orders(db, q, limit, status, after)
+
+    headers = {}
+    if len(rows) == limit:
+        last = rows[-1]
+        headers["X-Next-Cursor"] = pagination.encode_search_cursor(
+            last.rank, last.order_date, last.id
+        )
+    return responses.ORJSONResponse(responses.order_rows(row[:-1] for row in rows), headers=headers)
 
 
 @app.get("/orders/{order_id}", response_model=schemas.OrderResponse)
-def read_order(
-    order_id: str, db: Session = Depends(get_db), api_key: str = Depends(verify_api_key)
+async def read_order(
+    order_id: str,
+    request: Request,
+    response: Response,
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:read"]),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get a specific order by order_id"""
-    order = db.query(models.Order).filter(models.Order.order_id == order_id).first()
+    """
+    Get a specific order by order_id.
+
+    With If-None-Match only id and updated_at are read to decide on a 304.
+    """
+    if request.headers.get("if-none-match"):
+        version = (
+            await db.execute(
+                select(models.Order.id, models.Order.updated_at).where(
+                    models.Order.order_id == order_id
+                )
+            )
+        ).first()
+        if version is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        order_etag = etag.order_etag(version.id, version.updated_at)
+        if etag.none_match(request, order_etag):
+            return etag.not_modified(order_etag)
+
+    order = await db.scalar(select(models.Order).where(models.Order.order_id == order_id))
     if order is None:
         raise HTTPException(status_code=404, detail="Order not found")
+    response.headers["ETag"] = etag.order_etag(order.id, order.updated_at)
     return order
 
 
 @app.patch("/orders/{order_id}", response_model=schemas.OrderResponse)
-def update_order(
+async def update_order(
     order_id: str,
     order_update: schemas.OrderUpdate,
-    db: Session = Depends(get_db),
-    api_key: str = Depends(verify_api_key),
+    request: Request,
+    response: Response,
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:write"]),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Update an existing order"""
-    db_order = db.query(models.Order).filter(models.Order.order_id == order_id).first()
-    if db_order is None:
-        raise HTTPException(status_code=404, detail="Order not found")
+    """Update an existing order; If-Match makes the update conditional on its ETag"""
+    # Update only provided fields, in one UPDATE ... RETURNING (see app/writes.py)
+    row = await writes.update_order(
+        db, request, order_id, order_update.model_dump(exclude_unset=True)
+    )
+    await db.commit()
+    events.notifier.notify()
+    await cache.invalidate("orders")
+    response.headers["ETag"] = etag.order_etag(row.id, row.updated_at)
+    return row
 
-    # Update only provided fields
-    update_data = order_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_order, field, value)
 
-    db.commit()
-    db.refresh(db_order)
-    return db_order
+@app.delete("/orders/{order_id}", status_code=204)
+async def delete_order(
+    order_id: str,
+    request: Request,
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:write"]),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Delete an order; If-Match makes the delete conditional on its ETag"""
+    await writes.delete_order(db, request, order_id)
+    await db.commit()
+    events.notifier.notify()
+    await cache.invalidate("orders")
+    return None
 
 
-@app.delete("/orders/{order_id}", status_code=204)
-def delete_order(
-    order_id: str, db: Session = Depends(get_db), api_key: str = Depends(verify_api_key)
+@app.get("/customers/top", response_model=list[schemas.CustomerRank])
+async def read_top_customers(
+    response: Response,
+    currency: str = Query(
+        ..., min_length=3, max_length=3, description="ISO 4217 currency code to rank in"
+    ),
+    by: schemas.CustomerRanking = Query(
+        schemas.CustomerRanking.REVENUE, description="Rank by revenue or by number of orders"
+    ),
+    limit: int = Query(20, ge=1, le=100, description="Customers per page"),
+    cursor: str | None = Query(
+        None, description="Opaque cursor from the X-Next-Cursor header of the previous page"
+    ),
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:read"]),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Delete an order"""
-    db_order = db.query(models.Order).filter(models.Order.order_id == order_id).first()
-    if db_order is None:
-        raise HTTPException(status_code=404, detail="Order not found")
+    """
+    Get the customers with the most revenue, or orders, in a currency, highest first.
 
-    db.delete(db_order)
-    db.commit()
-    return None
+    When a full page is returned the X-Next-Cursor response header holds a cursor for
+    the next page, to pass back as ?cursor=.
+    """
+    currency = currency.upper()
+    if currency not in schemas.VALID_CURRENCIES:
+        raise HTTPException(status_code=422, detail=f"Unsupported currency: {currency}")
+    after = pagination.decode_rank_cursor(cursor) if cursor else None
+
+    ranked = await customers.top(db, currency, by, limit, after)
+
+    if len(ranked) == limit:
+        last = ranked[-1]
+        value = last["revenue"] if by == schemas.CustomerRanking.REVENUE else last["order_count"]
+        response.headers["X-Next-Cursor"] = pagination.encode_rank_cursor(
+            value, last["customer_id"]
+        )
+    return ranked
+
+
+@app.get("/customers/{customer_id}/summary", response_model=schemas.CustomerSummary)
+async def read_customer_summary(
+    customer_id: str,
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["orders:read"]),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get a customer's number of orders, lifetime revenue per currency and latest order"""
+    customer = await customers.summarize(db, customer_id)
+    if customer is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return customer
+
+
+@app.get("/fx-rates", response_model=list[schemas.FxRate])
+async def read_fx_rates(
+    on: date | None = Query(None, description="Rates in effect on this day (default today)"),
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["fx:read"]),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get the exchange rate in effect for each currency"""
+    return fx.latest_rates(await fx.get_rates(db), on)
+
+
+@app.put("/fx-rates", response_model=schemas.FxRate)
+async def upsert_fx_rate(
+    rate: schemas.FxRate,
+    api_key: ApiKeyPrincipal = Security(verify_api_key, scopes=["fx:write"]),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Create or replace the rate for a currency from an effective date onwards"""
+    db_rate = await db.merge(models.FxRate(**rate.model_dump()))
+    await db.commit()
+    await cache.invalidate("fx_rates")
+    fx.invalidate()
+    return db_rate
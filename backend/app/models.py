@@ -1,8 +1,28 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Column,
+    Date,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Boolean,
+    DateTime,
+    Text,
+    event,
+)
 from sqlalchemy.sql import func
 
 from app.database import Base
 
+# The trigram indexes on orders need pg_trgm; migrations create it in e4a7c2d9b513
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 
 class Order(Base):
     __tablename__ = "orders"
@@ -20,9 +40,9 @@ class Order(Base):
       - updated_at: timestampz updated_at "Record last update timestamp"
     """
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     order_id = Column(String, unique=True, index=True, nullable=False)
-    customer_id = Column(String, index=True, nullable=False)
+    customer_id = Column(String, nullable=False)
     order_date = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     total_amount = Column(Integer, nullable=False)
     currency = Column(String(3), nullable=False)
@@ -31,3 +51,206 @@ class Order(Base):
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
     )
+
+    # On PostgreSQL, migration 5b0e2f4c9a17 partitions this table by month on
+    # order_date (see app/partitions.py). There the primary key is (id, order_date), and
+    # the order_ids table, not ix_orders_order_id, keeps order_id unique. SQLite keeps the
+    # plain table described here.
+    __table_args__ = (
+        # Keyset pagination seeks on (order_date, id), see app/pagination.py
+        Index("ix_orders_order_date_id", "order_date", "id"),
+        # Filtered listings and exports, already in (order_date, id) order per key
+        Index("ix_orders_status_order_date_id", "status", "order_date", "id"),
+        Index("ix_orders_customer_id_order_date_id", "customer_id", "order_date", "id"),
+        # Index-only scans for the per-day totals behind rollup rebuilds and checks;
+        # the expression must match rollup._raw_date_expression
+        Index(
+            "ix_orders_utc_date_currency",
+            func.date(func.timezone("UTC", order_date)),
+            currency,
+            postgresql_include=["total_amount"],
+        ).ddl_if(dialect="postgresql"),
+        # GET /orders/search matches lower() of both IDs, see app/search.py: exact and
+        # prefix matches through text_pattern_ops, substrings through trigrams
+        Index(
+            "ix_orders_order_id_lower_pattern",
+            func.lower(order_id).label("order_id_lower"),
+            postgresql_ops={"order_id_lower": "text_pattern_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_orders_customer_id_lower_pattern",
+            func.lower(customer_id).label("customer_id_lower"),
+            postgresql_ops={"customer_id_lower": "text_pattern_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_orders_order_id_trgm",
+            func.lower(order_id).label("order_id_lower"),
+            postgresql_using="gin",
+            postgresql_ops={"order_id_lower": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_orders_customer_id_trgm",
+            func.lower(customer_id).label("customer_id_lower"),
+            postgresql_using="gin",
+            postgresql_ops={"customer_id_lower": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    # Fetch server-generated columns with RETURNING instead of lazy loads, which
+    # async sessions cannot do
+    __mapper_args__ = {"eager_defaults": True}
+
+
+class DailyRevenue(Base):
+    __tablename__ = "daily_revenue"
+
+    """
+    Rollup of orders per UTC day and currency, maintained by the order endpoints.
+
+    Fields:
+      - date: date date PK "UTC order date"
+      - currency: varchar currency PK "ISO 4217 currency code"
+      - order_count: int order_count "Number of orders"
+      - revenue_sum: bigint revenue_sum "Sum of total_amount"
+    """
+
+    date = Column(Date, primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    revenue_sum = Column(BigInteger, nullable=False, default=0)
+
+
+class CustomerStats(Base):
+    __tablename__ = "customer_stats"
+
+    """
+    Lifetime totals per customer and currency, maintained by the order endpoints, see
+    app/customers.py.
+
+    Fields:
+      - customer_id: varchar customer_id PK "Customer reference"
+      - currency: varchar currency PK "ISO 4217 currency code"
+      - order_count: int order_count "Number of orders"
+      - revenue_sum: bigint revenue_sum "Sum of total_amount"
+      - last_order_at: timestampz last_order_at "order_date of the latest order"
+    """
+
+    customer_id = Column(String, primary_key=True)
+    currency = Column(String(3), primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    revenue_sum = Column(BigInteger, nullable=False, default=0)
+    last_order_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # GET /customers/top reads these backwards from the top of one currency, so a
+        # page costs its own rows instead of a sort of every customer
+        Index("ix_customer_stats_currency_revenue", "currency", "revenue_sum", "customer_id"),
+        Index("ix_customer_stats_currency_orders", "currency", "order_count", "customer_id"),
+    )
+
+
+class FxRate(Base):
+    __tablename__ = "fx_rates"
+
+    """
+    Exchange rates with effective dates, see app/fx.py.
+
+    Fields:
+      - currency: varchar currency PK "ISO 4217 currency code"
+      - effective_date: date effective_date PK "First day the rate applies"
+      - rate: numeric rate "Value of one major unit of currency in ISK"
+    """
+
+    currency = Column(String(3), primary_key=True)
+    effective_date = Column(Date, primary_key=True)
+    rate = Column(Numeric(18, 8), nullable=False)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    """
+    Responses of POST /orders/ requests sent with an Idempotency-Key, see
+    app/idempotency.py.
+
+    Fields:
+      - client: varchar client PK "SHA-256 of the API key that sent the request"
+      - key: varchar key PK "Idempotency-Key header value"
+      - fingerprint: varchar fingerprint "SHA-256 of the request body"
+      - status_code: int status_code "HTTP status of the stored response"
+      - response_body: text response_body "JSON body of the stored response"
+      - created_at: timestampz created_at "When the key was first used"
+    """
+
+    client = Column(String(64), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
+    )
+
+
+class ApiKey(Base):
+    __tablename__ = "api_keys"
+
+    """
+    API keys of the integrations, see app/auth.py.
+
+    Fields:
+      - id: serial ID primary key
+      - name: varchar name UK "Integration the key belongs to"
+      - key_hash: varchar key_hash UK "SHA-256 of the key"
+      - prefix: varchar prefix "First characters of the key, for recognizing it"
+      - scopes: varchar scopes "Space-separated scopes, e.g. orders:read orders:write"
+      - request_count: bigint request_count "Requests made with the key"
+      - last_used_at: timestampz last_used_at "Time of the latest request"
+      - created_at: timestampz created_at "Record creation timestamp"
+      - revoked_at: timestampz revoked_at "When the key stopped being accepted"
+    """
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    key_hash = Column(String(64), unique=True, nullable=False)
+    prefix = Column(String(16), nullable=False)
+    scopes = Column(String, nullable=False)
+    request_count = Column(BigInteger, nullable=False, default=0, server_default="0")
+    last_used_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class OrderEvent(Base):
+    __tablename__ = "order_events"
+
+    """
+    Outbox of order changes, written in the transaction of each change, see
+    app/events.py.
+
+    Fields:
+      - seq: bigserial seq PK "Position in the change stream"
+      - order_id: varchar order_id "Business ID of the changed order"
+      - type: varchar type "created, updated or deleted"
+      - payload: text payload "OrderResponse JSON of the order after the change"
+      - occurred_at: timestampz occurred_at "Time of the change"
+      - published_at: timestampz published_at "When the relay handed it to the sink"
+    """
+
+    # SQLite only assigns rowids to INTEGER PRIMARY KEY columns
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    order_id = Column(String, nullable=False)
+    type = Column(String(16), nullable=False)
+    payload = Column(Text, nullable=False)
+    occurred_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    published_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # The relay's queue: only events not yet handed to the sink
+        Index(
+            "ix_order_events_unpublished",
+            "seq",
+            postgresql_where=published_at.is_(None),
+            sqlite_where=published_at.is_(None),
+        ),
+    )
@@ -0,0 +1,68 @@
+"""
+Opaque keyset cursors for GET /orders/, GET /orders/search and GET /customers/top.
+
+Listings are ordered by (order_date DESC, id DESC). A cursor encodes the sort key of
+the last row on a page so the next page can seek past it with the composite
+ix_orders_order_date_id index instead of walking and discarding skipped rows. Customer
+rankings do the same on (value, customer_id) with the customer_stats indexes, and
+search results on (rank, order_date, id).
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+
+
+def _encode(payload: dict) -> str:
+    data = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def encode_cursor(order_date: datetime, order_pk: int) -> str:
+    """Encode the sort key of the last row on a page"""
+    return _encode({"d": order_date.isoformat(), "i": order_pk})
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor from encode_cursor, raising 400 if it was tampered with"""
+    try:
+        payload = _decode(cursor)
+        return datetime.fromisoformat(payload["d"]), int(payload["i"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def encode_rank_cursor(value: int, customer_id: str) -> str:
+    """Encode the ranking value and customer of the last row on a page"""
+    return _encode({"v": value, "c": customer_id})
+
+
+def decode_rank_cursor(cursor: str) -> tuple[int, str]:
+    """Decode a cursor from encode_rank_cursor, raising 400 if it was tampered with"""
+    try:
+        payload = _decode(cursor)
+        return int(payload["v"]), str(payload["c"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def encode_search_cursor(rank: int, order_date: datetime, order_pk: int) -> str:
+    """Encode the match rank and sort key of the last search result on a page"""
+    return _encode({"r": rank, "d": order_date.isoformat(), "i": order_pk})
+
+
+def decode_search_cursor(cursor: str) -> tuple[int, datetime, int]:
+    """Decode a cursor from encode_search_cursor, raising 400 if it was tampered with"""
+    try:
+        payload = _decode(cursor)
+        return int(payload["r"]), datetime.fromisoformat(payload["d"]), int(payload["i"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
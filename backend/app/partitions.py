@@ -0,0 +1,165 @@
+"""
+Monthly range partitions of the orders table on PostgreSQL.
+
+Migration 5b0e2f4c9a17 partitions orders by RANGE (order_date). Each UTC month gets
+its own partition, named orders_pYYYY_MM, and orders_default catches dates outside
+them. Month bounds line up with the UTC days of the daily_revenue rollup. Queries
+bounded on order_date only touch the partitions they overlap.
+
+PostgreSQL cannot enforce a unique index across partitions unless the index includes
+order_date. A trigger on orders therefore mirrors every order_id into the order_ids
+table, and its primary key rejects duplicates.
+
+Run `python -m app.cli partitions` daily. It creates the partitions for the coming
+months, moves rows that landed in orders_default into partitions of their own, and,
+with a retention period, detaches old months. SQLite keeps the plain table; every
+function here does nothing there.
+"""
+
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import delete, text
+from sqlalchemy.orm import Session
+
+from app import customers, models
+
+DEFAULT_PARTITION = "orders_default"
+_NAME = re.compile(r"^orders_p(\d{4})_(\d{2})$")
+
+# Serializes concurrent maintenance runs; released when the transaction ends
+_LOCK = text("SELECT pg_advisory_xact_lock(hashtext('orders_partitions'))")
+
+
+def month_start(value: date | datetime) -> date:
+    """First day of the UTC month containing value"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        value = value.date()
+    return value.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"orders_p{month:%Y_%m}"
+
+
+def partition_bounds(month: date) -> tuple[str, str]:
+    """FROM and TO timestamps of the month's partition, in UTC"""
+    return f"{month.isoformat()} 00:00:00+00", f"{add_months(month, 1).isoformat()} 00:00:00+00"
+
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.scalar(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+            "WHERE partrelid = to_regclass('orders'))"
+        )
+    )
+
+
+def monthly_partitions(db: Session) -> list[date]:
+    """Months that have an attached partition, oldest first"""
+    names = db.scalars(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'orders'::regclass"
+        )
+    )
+    months = []
+    for name in names:
+        match = _NAME.match(name)
+        if match:
+            months.append(date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+def create_partition(db: Session, month: date):
+    """
+    Create the partition for month, moving its rows out of orders_default first.
+
+    PostgreSQL refuses to attach a range that the default partition has rows for. The
+    rows are parked in a temporary table and inserted again through orders. The delete
+    and insert triggers keep order_ids in step.
+    """
+    name = partition_name(month)
+    start, end = partition_bounds(month)
+    in_range = f"order_date >= '{start}' AND order_date < '{end}'"
+
+    moved = db.scalar(text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {in_range}"))
+    if moved:
+        db.execute(text("CREATE TEMP TABLE orders_moving (LIKE orders)"))
+        db.execute(
+            text(f"INSERT INTO orders_moving SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}")
+        )
+        db.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"))
+    db.execute(
+        text(f"CREATE TABLE {name} PARTITION OF orders FOR VALUES FROM ('{start}') TO ('{end}')")
+    )
+    if moved:
+        db.execute(text("INSERT INTO orders SELECT * FROM orders_moving"))
+        db.execute(text("DROP TABLE orders_moving"))
+
+
+def ensure_partitions(db: Session, ahead: int, today: date | None = None) -> list[str]:
+    """
+    Create missing partitions for this month, the next ahead months and every month
+    that has rows in orders_default. Returns the names of the new partitions.
+    """
+    if not is_partitioned(db):
+        return []
+    db.execute(_LOCK)
+
+    current = month_start(today or datetime.now(timezone.utc))
+    wanted = {add_months(current, offset) for offset in range(ahead + 1)}
+    wanted.update(
+        db.scalars(
+            text(
+                "SELECT DISTINCT date_trunc('month', order_date AT TIME ZONE 'UTC')::date "
+                f"FROM {DEFAULT_PARTITION}"
+            )
+        )
+    )
+
+    created = []
+    for month in sorted(wanted - set(monthly_partitions(db))):
+        create_partition(db, month)
+        created.append(partition_name(month))
+    return created
+
+
+def detach_partitions(db: Session, retain_months: int, today: date | None = None) -> list[str]:
+    """
+    Detach partitions of months ending more than retain_months ago.
+
+    Detached partitions remain as standalone tables for archiving or dropping. Their
+    orders leave the daily_revenue rollup and customer_stats and release their
+    order_ids, as if they had been deleted. Returns the names of the detached partitions.
+    """
+    if retain_months <= 0 or not is_partitioned(db):
+        return []
+    db.execute(_LOCK)
+
+    cutoff = add_months(month_start(today or datetime.now(timezone.utc)), -retain_months)
+    detached = []
+    for month in monthly_partitions(db):
+        if add_months(month, 1) > cutoff:
+            break
+        name = partition_name(month)
+        db.execute(text(f"ALTER TABLE orders DETACH PARTITION {name}"))
+        db.execute(text(f"DELETE FROM order_ids k USING {name} o WHERE k.order_id = o.order_id"))
+        db.execute(
+            delete(models.DailyRevenue).where(
+                models.DailyRevenue.date >= month, models.DailyRevenue.date < add_months(month, 1)
+            )
+        )
+        customers.remove_detached(db, name)
+        detached.append(name)
+    return detached
@@ -0,0 +1,137 @@
+"""
+Token-bucket rate limiting per API key and route.
+
+Each (API key, route) pair has a bucket that holds up to `burst` tokens and refills at
+`rate` tokens per second. A request takes one token. With an empty bucket,
+verify_api_key answers 429 with a Retry-After header before the handler or any query
+runs. RATE_LIMIT_PER_SECOND and RATE_LIMIT_BURST apply to every route, and
+RATE_LIMIT_ROUTES overrides them per route, keyed by method and path template
+(e.g. "POST /orders/bulk").
+
+The memory backend keeps buckets per process, so with N workers a client gets up to N
+times the limit. RATE_LIMIT_BACKEND=redis shares the buckets through Redis (or anything
+speaking its protocol). Buckets there are updated in a WATCH/MULTI transaction rather
+than a Lua script, so servers without scripting work too.
+"""
+
+import math
+import time
+from collections.abc import Callable
+
+from fastapi import HTTPException, Request, status
+
+from app import metrics
+from app.config import settings
+
+RATE_LIMITED = metrics.Counter(
+    "rate_limited_requests_total", "Requests rejected with 429 by the per-key rate limit"
+)
+
+
+class MemoryBucketBackend:
+    """Process-local buckets"""
+
+    # Full buckets are dropped when the table grows past this, as they equal new ones
+    SWEEP_SIZE = 10000
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        # key -> (tokens, time of the last update, time the bucket will be full again)
+        self._buckets: dict[str, tuple[float, float, float]] = {}
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take a token; returns 0 if one was available, else seconds until one is"""
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        tokens = burst if bucket is None else min(burst, bucket[0] + (now - bucket[1]) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        if len(self._buckets) >= self.SWEEP_SIZE:
+            self._buckets = {k: b for k, b in self._buckets.items() if b[2] > now}
+        self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+        return wait
+
+
+class RedisBucketBackend:
+    """Buckets in Redis hashes, shared by all workers"""
+
+    def __init__(self, client, prefix: str = "order-service:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        # Imported here as the redis package is only installed with the redis extra
+        from redis.exceptions import WatchError
+
+        name = self.prefix + key
+        # Idle buckets refill completely after this long and can be forgotten
+        ttl_ms = math.ceil(burst / rate * 1000) + 1000
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(name)
+                    tokens, updated = await pipe.hmget(name, "tokens", "updated")
+                    now = time.time()
+                    tokens = burst if tokens is None else float(tokens)
+                    updated = now if updated is None else float(updated)
+                    tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+                    if tokens >= 1:
+                        tokens, wait = tokens - 1, 0.0
+                    else:
+                        wait = (1 - tokens) / rate
+                    pipe.multi()
+                    pipe.hset(name, mapping={"tokens": tokens, "updated": now})
+                    pipe.pexpire(name, ttl_ms)
+                    await pipe.execute()
+                    return wait
+                except WatchError:
+                    # Another worker updated the bucket in between; read it again
+                    continue
+
+
+def create_backend():
+    """Build the backend selected by RATE_LIMIT_BACKEND"""
+    if settings.rate_limit_backend == "redis":
+        import redis.asyncio
+
+        return RedisBucketBackend(redis.asyncio.from_url(settings.cache_redis_url))
+    if settings.rate_limit_backend == "memory":
+        return MemoryBucketBackend()
+    raise ValueError(f"Unknown rate limit backend: {settings.rate_limit_backend}")
+
+
+class RateLimiter:
+    """Applies the configured limits to (API key, route) buckets"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def limits(route: str) -> tuple[float, int]:
+        """(tokens per second, burst) for route; a rate of 0 means unlimited"""
+        override = settings.rate_limit_routes.get(route)
+        if override is not None:
+            return override
+        return settings.rate_limit_per_second, settings.rate_limit_burst
+
+    async def check(self, request: Request, key_hash: str):
+        """Take a token for the request's route, raising 429 if the bucket is empty"""
+        route = request.scope.get("route")
+        name = f"{request.method} {route.path if route else request.url.path}"
+        rate, burst = self.limits(name)
+        if rate <= 0:
+            return
+        wait = await self.backend.take(f"{key_hash[:16]}:{name}", rate, burst)
+        if wait:
+            RATE_LIMITED.inc(route=name)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+
+limiter = RateLimiter(create_backend())
@@ -0,0 +1,166 @@
+"""
+Read replicas for GET requests.
+
+With DATABASE_REPLICA_URLS set, get_async_db hands GET and HEAD requests a session on
+one of the replicas, taking them in turn, and everything else a session on the primary.
+Replicas apply the primary's changes with some delay, so a client that just wrote
+could read its own write back as missing. Responses to writes therefore carry the
+time until which the client's reads go to the primary, READ_YOUR_WRITES_SECONDS
+ahead, both as a cookie and as the X-Read-Primary-Until header. Browsers send the
+cookie back on their own; other clients echo the header on their next reads.
+
+Listings, the summary and the stats are cached and ETagged under the change versions
+of app/cache.py. A replica read right after a change would be stored and tagged under
+the new version and served until the next change. Those routes therefore read from
+the primary, for every client, until READ_YOUR_WRITES_SECONDS after the last change to
+a scope they read.
+
+A replica that fails a connection is skipped for REPLICA_HEALTH_CHECK_SECONDS and the
+request moves on to the next one. A background task runs SELECT 1 on every replica at
+that interval to take replicas out of rotation, or back in. With no replica available,
+reads go to the primary.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import metrics
+from app.cache import cache
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SESSIONS = metrics.Counter("db_sessions_total", "Request database sessions, by target")
+REPLICA_UP = metrics.Gauge("db_replica_up", "Whether a read replica is in rotation")
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+PRIMARY_UNTIL_COOKIE = "read_primary_until"
+PRIMARY_UNTIL_HEADER = "X-Read-Primary-Until"
+
+# Path -> cache scopes of the GET routes cached and ETagged by change versions
+VERSIONED_READS: dict[str, tuple[str, ...]] = {
+    "/orders/": ("orders",),
+    "/orders/summary": ("orders", "fx_rates"),
+    "/orders/stats": ("orders",),
+}
+
+
+@dataclass
+class Replica:
+    name: str
+    session_factory: async_sessionmaker
+    # Monotonic time before which the replica is out of rotation
+    down_until: float = 0.0
+
+
+def primary_until(request: Request) -> float:
+    """Unix time until which the client asked to read from the primary; 0 if not"""
+    until = 0.0
+    for value in (
+        request.cookies.get(PRIMARY_UNTIL_COOKIE),
+        request.headers.get(PRIMARY_UNTIL_HEADER),
+    ):
+        try:
+            until = max(until, float(value or 0))
+        except ValueError:
+            continue
+    return until
+
+
+def mark_write(response: Response, now: float):
+    """Send the client's reads to the primary for the next READ_YOUR_WRITES_SECONDS"""
+    seconds = settings.read_your_writes_seconds
+    until = str(math.ceil(now + seconds))
+    response.set_cookie(
+        PRIMARY_UNTIL_COOKIE, until, max_age=math.ceil(seconds), httponly=True, samesite="lax"
+    )
+    response.headers[PRIMARY_UNTIL_HEADER] = until
+
+
+class ReplicaRouter:
+    """Picks the primary or a replica session factory for each request"""
+
+    def __init__(
+        self,
+        primary: async_sessionmaker,
+        replicas: list[Replica],
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self._next = 0
+        for replica in replicas:
+            REPLICA_UP.set(1, replica=replica.name)
+
+    async def route(self, request: Request, response: Response) -> Replica | None:
+        """The replica to read from, or None for the primary"""
+        if not self.replicas:
+            return None
+        if request.method not in READ_METHODS:
+            mark_write(response, self.wall_clock())
+            return None
+        if primary_until(request) > self.wall_clock():
+            return None
+        if await self.recently_changed(request):
+            return None
+        return self.next_replica()
+
+    async def recently_changed(self, request: Request) -> bool:
+        """Whether a versioned read comes within READ_YOUR_WRITES_SECONDS of a change"""
+        route = request.scope.get("route")
+        scopes = VERSIONED_READS.get(route.path) if route else None
+        if not scopes:
+            return False
+        changed = await cache.last_changed(scopes)
+        return changed + settings.read_your_writes_seconds > self.wall_clock()
+
+    def next_replica(self) -> Replica | None:
+        """The next replica in rotation, round robin; None if all are down"""
+        now = self.clock()
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if replica.down_until <= now:
+                return replica
+        return None
+
+    def mark_down(self, replica: Replica):
+        replica.down_until = self.clock() + settings.replica_health_check_seconds
+        REPLICA_UP.set(0, replica=replica.name)
+
+    def mark_up(self, replica: Replica):
+        replica.down_until = 0.0
+        REPLICA_UP.set(1, replica=replica.name)
+
+    def count(self, replica: Replica | None):
+        SESSIONS.inc(target="primary" if replica is None else "replica")
+
+    async def check(self, replica: Replica, timeout: float) -> bool:
+        """Run SELECT 1 on a replica and update its state; True if it answered"""
+        try:
+            async with replica.session_factory() as db:
+                await asyncio.wait_for(db.execute(text("SELECT 1")), timeout)
+        except Exception as error:
+            if replica.down_until <= self.clock():
+                logger.warning("Read replica %s is down: %s", replica.name, error)
+            self.mark_down(replica)
+            return False
+        self.mark_up(replica)
+        return True
+
+    async def check_periodically(self, interval: float):
+        """Background task checking every replica each interval seconds"""
+        while True:
+            await asyncio.gather(*(self.check(replica, interval) for replica in self.replicas))
+            await asyncio.sleep(interval)
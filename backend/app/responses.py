@@ -0,0 +1,37 @@
+"""
+Fast JSON responses for order lists.
+
+Returning ORM objects from an endpoint makes FastAPI validate every row into
+OrderResponse, which reruns the input validators of OrderBase on data that came from
+the database, and then serialize each model. For a list of 1000 orders that costs
+more than the query. GET /orders/ instead selects ORDER_COLUMNS as plain tuples, turns
+them into dicts and encodes the list with orjson. The route keeps
+response_model=list[OrderResponse], so the OpenAPI schema is unchanged.
+
+The output is byte for byte what the validated path produces: keys follow the field
+order of OrderResponse and UTC datetimes end in Z, as pydantic writes them.
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+from app import models, schemas
+
+# OrderResponse fields and the matching columns, in schema order
+ORDER_FIELDS = tuple(schemas.OrderResponse.model_fields)
+ORDER_COLUMNS = tuple(getattr(models.Order, field) for field in ORDER_FIELDS)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded by orjson, writing UTC datetimes the way pydantic does"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def order_rows(rows: Iterable[tuple]) -> list[dict[str, Any]]:
+    """Rows of ORDER_COLUMNS as OrderResponse-shaped dicts, without validation"""
+    return [dict(zip(ORDER_FIELDS, row, strict=True)) for row in rows]
@@ -0,0 +1,140 @@
+"""
+Daily revenue rollup maintenance.
+
+The daily_revenue table holds one row per (UTC date, currency) with the number of
+orders and the summed total_amount. Order mutations apply deltas to it in the same
+transaction so /orders/summary never has to scan the orders table.
+"""
+
+from datetime import date, datetime, timezone
+
+from sqlalchemy import delete, func, insert, literal_column, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import dialect_insert
+
+# (date, currency) -> (order_count delta, revenue_sum delta)
+RollupDeltas = dict[tuple[date, str], tuple[int, int]]
+
+
+def rollup_date(value: datetime) -> date:
+    """Return the UTC calendar date an order is bucketed under"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def track(deltas: RollupDeltas, order_date: datetime, currency: str, amount: int, sign: int):
+    """Accumulate the contribution of one order (sign=1) or its removal (sign=-1)"""
+    key = (rollup_date(order_date), currency)
+    count, revenue = deltas.get(key, (0, 0))
+    deltas[key] = (count + sign, revenue + sign * amount)
+
+
+async def apply_deltas(db: AsyncSession, deltas: RollupDeltas):
+    """Upsert all deltas in one statement and drop rows that reached zero orders"""
+    rows = [
+        {"date": day, "currency": currency, "order_count": count, "revenue_sum": revenue}
+        for (day, currency), (count, revenue) in deltas.items()
+        if count or revenue
+    ]
+    if not rows:
+        return
+
+    table = models.DailyRevenue
+    stmt = dialect_insert(db)(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.date, table.currency],
+        set_={
+            "order_count": table.order_count + stmt.excluded.order_count,
+            "revenue_sum": table.revenue_sum + stmt.excluded.revenue_sum,
+        },
+    )
+    await db.execute(stmt)
+
+    emptied = [(row["date"], row["currency"]) for row in rows if row["order_count"] < 0]
+    if emptied:
+        await db.execute(
+            delete(table).where(
+                tuple_(table.date, table.currency).in_(emptied), table.order_count <= 0
+            )
+        )
+
+
+async def add_order(db: AsyncSession, order: models.Order):
+    """Count a newly inserted order in the rollup"""
+    deltas: RollupDeltas = {}
+    track(deltas, order.order_date, order.currency, order.total_amount, 1)
+    await apply_deltas(db, deltas)
+
+
+async def remove_order(db: AsyncSession, order: models.Order):
+    """Remove a deleted order from the rollup"""
+    deltas: RollupDeltas = {}
+    track(deltas, order.order_date, order.currency, order.total_amount, -1)
+    await apply_deltas(db, deltas)
+
+
+def _raw_date_expression(db: Session):
+    """SQL expression for the UTC date of orders.order_date on the bound dialect"""
+    if db.get_bind().dialect.name == "postgresql":
+        # 'UTC' is inlined rather than bound so the planner matches the expression
+        # against ix_orders_utc_date_currency
+        return func.date(func.timezone(literal_column("'UTC'"), models.Order.order_date))
+    return func.date(models.Order.order_date)
+
+
+def _raw_totals(db: Session):
+    day = _raw_date_expression(db)
+    return select(
+        day.label("date"),
+        models.Order.currency,
+        func.count().label("order_count"),
+        func.sum(models.Order.total_amount).label("revenue_sum"),
+    ).group_by(day, models.Order.currency)
+
+
+def _as_date(value) -> date:
+    # SQLite returns date() results as ISO strings
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def find_mismatches(db: Session) -> list[tuple[date, str, tuple[int, int], tuple[int, int]]]:
+    """
+    Compare the rollup against a fresh aggregation of the orders table.
+
+    Returns (date, currency, expected, actual) for every differing key, where expected
+    and actual are (order_count, revenue_sum) pairs.
+    """
+    expected = {
+        (_as_date(row.date), row.currency): (row.order_count, int(row.revenue_sum))
+        for row in db.execute(_raw_totals(db))
+    }
+    table = models.DailyRevenue
+    actual = {
+        (row.date, row.currency): (row.order_count, int(row.revenue_sum))
+        for row in db.execute(
+            select(table.date, table.currency, table.order_count, table.revenue_sum)
+        )
+    }
+
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys()):
+        want, have = expected.get(key, (0, 0)), actual.get(key, (0, 0))
+        if want != have:
+            mismatches.append((key[0], key[1], want, have))
+    return mismatches
+
+
+def rebuild(db: Session):
+    """Recompute the whole rollup from the orders table"""
+    db.execute(delete(models.DailyRevenue))
+    totals = _raw_totals(db).subquery()
+    db.execute(
+        insert(models.DailyRevenue).from_select(
+            ["date", "currency", "order_count", "revenue_sum"],
+            select(totals.c.date, totals.c.currency, totals.c.order_count, totals.c.revenue_sum),
+        )
+    )
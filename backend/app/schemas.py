@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from enum import Enum
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Optional
 
 
@@ -114,13 +114,41 @@ class CurrencyTotal(BaseModel):
 
 
 class DailyRevenueByCurrency(BaseModel):
-    """Revenue for a specific day and currency"""
+    """Revenue for a specific day (or week or month) and currency"""
 
-    date: str = Field(..., description="Date in YYYY-MM-DD format")
+    date: str = Field(..., description="Date, or first day of the bucket, in YYYY-MM-DD format")
     currency: str = Field(..., description="ISO 4217 currency code")
     revenue: int = Field(..., description="Total revenue for this day in this currency")
 
 
+class DailyRevenueTotal(BaseModel):
+    """Revenue for a specific day (or week or month) in a single currency"""
+
+    date: str = Field(..., description="Date, or first day of the bucket, in YYYY-MM-DD format")
+    revenue: int = Field(..., description="Total revenue for this day")
+
+
+class NormalizedRevenue(BaseModel):
+    """Revenue converted to one currency using the rate in effect on each day"""
+
+    currency: str = Field(..., description="ISO 4217 currency code all amounts are in")
+    total: int = Field(..., description="Total revenue in smallest currency unit")
+    total_by_currency: list[CurrencyTotal] = Field(
+        ..., description="Converted total for each original currency"
+    )
+    revenue_per_day: list[DailyRevenueTotal] = Field(
+        ..., description="Converted revenue per day (or bucket) across all currencies"
+    )
+
+
+class SummaryGranularity(str, Enum):
+    """Bucket sizes for revenue_per_day in /orders/summary"""
+
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
 class OrderSummary(BaseModel):
     """Aggregated order summary data with multi-currency support"""
 
@@ -129,5 +157,229 @@ class OrderSummary(BaseModel):
         ..., description="Total revenue broken down by currency"
     )
     revenue_per_day: list[DailyRevenueByCurrency] = Field(
-        ..., description="Daily revenue breakdown by currency"
+        ..., description="Daily (or weekly or monthly) revenue breakdown by currency"
+    )
+    normalized: Optional[NormalizedRevenue] = Field(
+        default=None, description="Revenue converted to the normalize_to currency, if requested"
+    )
+    granularity: SummaryGranularity = Field(
+        default=SummaryGranularity.DAY, description="Bucket size of revenue_per_day"
+    )
+    tz: str = Field(default="UTC", description="IANA time zone the days are counted in")
+    date_from: Optional[date] = Field(
+        default=None, alias="from", description="First day covered, if limited"
+    )
+    date_to: Optional[date] = Field(
+        default=None, alias="to", description="Day after the last day covered, if limited"
+    )
+
+
+class StatusCount(BaseModel):
+    """Number of orders in one status"""
+
+    status: OrderStatus = Field(..., description="Order status")
+    count: int = Field(..., description="Number of orders in this status")
+
+
+class CurrencyOrderStats(BaseModel):
+    """Order values in one currency"""
+
+    currency: str = Field(..., description="ISO 4217 currency code")
+    order_count: int = Field(..., description="Number of orders in this currency")
+    average_amount: float = Field(..., description="Mean total_amount, smallest currency unit")
+    min_amount: int = Field(..., description="Smallest total_amount")
+    max_amount: int = Field(..., description="Largest total_amount")
+
+
+class OrderStats(BaseModel):
+    """Dashboard statistics over all orders, or the orders in a period"""
+
+    total_orders: int = Field(..., description="Number of orders in the period")
+    today_orders: int = Field(..., description="Number of orders placed today in tz")
+    by_status: list[StatusCount] = Field(
+        ..., description="Number of orders per status, every status included"
+    )
+    by_currency: list[CurrencyOrderStats] = Field(
+        ..., description="Average, smallest and largest order per currency"
+    )
+    tz: str = Field(default="UTC", description="IANA time zone the days are counted in")
+    date_from: Optional[date] = Field(
+        default=None, alias="from", description="First day covered, if limited"
+    )
+    date_to: Optional[date] = Field(
+        default=None, alias="to", description="Day after the last day covered, if limited"
     )
+
+
+class FxRate(BaseModel):
+    """Exchange rate for a currency from an effective date onwards"""
+
+    currency: str = Field(
+        ..., min_length=3, max_length=3, description="ISO 4217 currency code (e.g., ISK, USD)"
+    )
+    effective_date: date = Field(..., description="First day the rate applies")
+    rate: Decimal = Field(
+        ..., gt=0, max_digits=18, decimal_places=8, description="Value of one unit in ISK"
+    )
+
+    model_config = {"from_attributes": True}
+
+    @field_validator("currency")
+    @classmethod
+    def validate_currency(cls, v: str) -> str:
+        """Validate currency is a known ISO 4217 code"""
+        v_upper = v.upper()
+        if v_upper not in VALID_CURRENCIES:
+            raise ValueError(
+                f"Currency must be a valid ISO 4217 code. Supported: {', '.join(sorted(VALID_CURRENCIES))}"
+            )
+        return v_upper
+
+
+class BulkRowStatus(str, Enum):
+    """Outcome of a single row in a bulk ingestion request"""
+
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    INVALID = "invalid"
+    SKIPPED = "skipped"
+
+
+class BulkOrderRowResult(BaseModel):
+    """Result for one input row of POST /orders/bulk"""
+
+    index: int = Field(..., description="Zero-based position of the row in the request")
+    order_id: Optional[str] = Field(default=None, description="Business order ID, if present")
+    status: BulkRowStatus = Field(..., description="Outcome for this row")
+    id: Optional[int] = Field(default=None, description="Database ID of a created order")
+    detail: Optional[str] = Field(default=None, description="Why the row was not created")
+
+
+class BulkOrderResponse(BaseModel):
+    """Per-row report for a bulk ingestion request"""
+
+    created: int = Field(..., description="Number of orders created")
+    duplicates: int = Field(..., description="Rows whose order_id already existed")
+    invalid: int = Field(..., description="Rows that failed validation")
+    skipped: int = Field(
+        ..., description="Valid rows not created because an atomic request was rejected"
+    )
+    results: list[BulkOrderRowResult] = Field(..., description="One result per input row")
+
+
+class StatusTransitionFilter(BaseModel):
+    """Selects the orders of a status transition by their fields"""
+
+    status: Optional[OrderStatus] = Field(default=None, description="Current status")
+    customer_id: Optional[str] = Field(default=None, min_length=1, description="Customer")
+    date_from: Optional[datetime] = Field(
+        default=None, alias="from", description="order_date >= from"
+    )
+    date_to: Optional[datetime] = Field(default=None, alias="to", description="order_date < to")
+
+    @model_validator(mode="after")
+    def check_criteria(self) -> "StatusTransitionFilter":
+        """Require at least one criterion, so an empty filter cannot select every order"""
+        if all(value is None for value in self.__dict__.values()):
+            raise ValueError("Give at least one of status, customer_id, from and to")
+        return self
+
+
+class StatusTransitionRequest(BaseModel):
+    """Moves many orders to one status, selected by order_id or by a filter"""
+
+    status: OrderStatus = Field(..., description="Status to move the orders to")
+    order_ids: Optional[list[str]] = Field(
+        default=None, min_length=1, max_length=100_000, description="Business order IDs"
+    )
+    filter: Optional[StatusTransitionFilter] = Field(
+        default=None, description="Move every order matching these fields instead"
+    )
+
+    @model_validator(mode="after")
+    def check_selection(self) -> "StatusTransitionRequest":
+        """Require exactly one of order_ids and filter"""
+        if (self.order_ids is None) == (self.filter is None):
+            raise ValueError("Give either order_ids or filter")
+        return self
+
+
+class RejectedTransition(BaseModel):
+    """An order whose current status does not allow the transition"""
+
+    order_id: str = Field(..., description="Business order ID")
+    status: str = Field(..., description="Current status of the order")
+
+
+class StatusTransitionResponse(BaseModel):
+    """Outcome of a status transition request"""
+
+    status: OrderStatus = Field(..., description="Status the orders were moved to")
+    updated: int = Field(..., description="Number of orders moved to status")
+    unchanged: list[str] = Field(..., description="Requested orders already in status")
+    not_found: list[str] = Field(..., description="Requested order IDs that do not exist")
+    not_allowed: list[RejectedTransition] = Field(
+        ..., description="Requested orders whose current status cannot move to status"
+    )
+
+
+class OrderEventType(str, Enum):
+    """Kinds of change in the order change stream"""
+
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+
+class OrderEvent(BaseModel):
+    """One change to an order, see GET /orders/changes"""
+
+    seq: int = Field(..., description="Position in the change stream, increasing")
+    type: OrderEventType = Field(..., description="What happened to the order")
+    order_id: str = Field(..., description="Business order ID")
+    occurred_at: datetime = Field(..., description="Time of the change")
+    order: OrderResponse = Field(
+        ..., description="The order after the change, or as it was when deleted"
+    )
+
+
+class OrderChanges(BaseModel):
+    """A page of the order change stream"""
+
+    events: list[OrderEvent] = Field(..., description="Events after since, oldest first")
+    next: int = Field(..., description="Pass as since to continue after these events")
+
+
+class CustomerCurrencyStats(BaseModel):
+    """A customer's orders in one currency"""
+
+    currency: str = Field(..., description="ISO 4217 currency code")
+    order_count: int = Field(..., description="Number of orders")
+    revenue: int = Field(..., description="Lifetime revenue in smallest currency unit")
+    last_order_date: Optional[datetime] = Field(..., description="order_date of the latest order")
+
+
+class CustomerSummary(BaseModel):
+    """Lifetime totals of one customer"""
+
+    customer_id: str = Field(..., description="Customer reference")
+    order_count: int = Field(..., description="Number of orders across all currencies")
+    last_order_date: Optional[datetime] = Field(
+        ..., description="order_date of the latest order in any currency"
+    )
+    by_currency: list[CustomerCurrencyStats] = Field(
+        ..., description="Totals per currency the customer ordered in"
+    )
+
+
+class CustomerRanking(str, Enum):
+    """Sort orders of GET /customers/top"""
+
+    REVENUE = "revenue"
+    ORDERS = "orders"
+
+
+class CustomerRank(CustomerCurrencyStats):
+    """A customer's totals in the currency of GET /customers/top"""
+
+    customer_id: str = Field(..., description="Customer reference")
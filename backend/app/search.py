@@ -0,0 +1,105 @@
+"""
+Server-side search over order_id and customer_id.
+
+GET /orders/search matches a term against both columns, case-insensitively, and
+ranks the matches: exact matches first, then prefix matches, then matches anywhere
+in the value, each group newest first. The term is lowercased and its LIKE wildcards
+escaped here, so the database sees lower(column) LIKE 'term%' or LIKE '%term%'.
+
+The patterns are rendered into the SQL as constants (literal_execute), not sent as
+bound parameters. Drivers that prepare statements, asyncpg among them, switch to a
+generic plan after five executions. That plan is made without the parameter values,
+and PostgreSQL cannot use a text_pattern_ops index for LIKE $1 because it cannot tell
+that the pattern has a fixed prefix.
+
+On PostgreSQL those predicates are served by indexes on lower(order_id) and
+lower(customer_id): text_pattern_ops b-trees for the prefix searches and pg_trgm GIN
+indexes for the substring ones. Trigram indexes cannot narrow down terms shorter than
+three characters, so shorter terms only match exactly or by prefix. SQLite has no such
+indexes and scans the table with the same LIKE predicates.
+
+Only the matching rows are sorted, so a page costs the index lookups plus a sort of
+the matches, not a scan of the table.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Select, String, and_, case, func, literal, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, responses
+
+# Shortest term matched anywhere in a value; pg_trgm needs three characters
+MIN_SUBSTRING_LENGTH = 3
+
+# Match ranks, best first
+EXACT, PREFIX, SUBSTRING = 0, 1, 2
+
+SEARCHED_COLUMNS = (models.Order.order_id, models.Order.customer_id)
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards in term, using backslash as the escape character"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _like(pattern: str):
+    # Inlined at execution, so the planner sees the pattern even in a generic plan
+    constant = literal(pattern, String, literal_execute=True)
+    return or_(*(func.lower(column).like(constant, escape="\\") for column in SEARCHED_COLUMNS))
+
+
+def _rank(term: str, prefix: str):
+    lowered = [func.lower(column) for column in SEARCHED_COLUMNS]
+    return case(
+        (or_(*(value == term for value in lowered)), literal(EXACT)),
+        (_like(prefix), literal(PREFIX)),
+        else_=literal(SUBSTRING),
+    )
+
+
+def search_query(
+    q: str,
+    limit: int,
+    status: str | None = None,
+    after: tuple[int, datetime, int] | None = None,
+) -> Select:
+    """
+    Orders whose order_id or customer_id contains q, best matches first.
+
+    Selects responses.ORDER_COLUMNS followed by the match rank. after is the
+    (rank, order_date, id) of the last row of the previous page.
+    """
+    term = q.lower()
+    escaped = escape_like(term)
+    prefix = f"{escaped}%"
+    pattern = f"%{escaped}%" if len(term) >= MIN_SUBSTRING_LENGTH else prefix
+
+    order = models.Order
+    rank = _rank(term, prefix).label("rank")
+    query = select(*responses.ORDER_COLUMNS, rank).where(_like(pattern))
+    if status:
+        query = query.where(order.status == status)
+    if after is not None:
+        after_rank, after_date, after_id = after
+        query = query.where(
+            or_(
+                rank > after_rank,
+                and_(
+                    rank == after_rank,
+                    tuple_(order.order_date, order.id) < tuple_(after_date, after_id),
+                ),
+            )
+        )
+    return query.order_by(rank, order.order_date.desc(), order.id.desc()).limit(limit)
+
+
+async def search_orders(
+    db: AsyncSession,
+    q: str,
+    limit: int,
+    status: str | None = None,
+    after: tuple[int, datetime, int] | None = None,
+) -> list[tuple]:
+    """Rows of search_query(), each ORDER_COLUMNS and the rank"""
+    return (await db.execute(search_query(q, limit, status, after))).all()
@@ -0,0 +1,78 @@
+"""
+Dashboard statistics for /orders/stats.
+
+One aggregation over orders, grouped by currency, computes everything at once: the
+count, mean, smallest and largest total_amount per currency, and through FILTER
+clauses the number of orders in each OrderStatus and of those placed today. Totals
+across currencies add up the few per-currency rows afterwards, as in summary.py.
+
+Today is the local calendar day in the requested time zone; its bounds are computed
+here and compared with order_date, like the from/to range of the summary.
+"""
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.summary import SummaryWindow, local_midnight
+
+
+def today(window: SummaryWindow) -> date:
+    """The current local date in the window's time zone"""
+    return datetime.now(window.zone).date()
+
+
+async def compute(db: AsyncSession, window: SummaryWindow, day: date) -> dict:
+    """The OrderStats of the orders in window as a dict, with day as today"""
+    order = models.Order
+    today_start = local_midnight(day, window.zone)
+    today_end = local_midnight(day + timedelta(days=1), window.zone)
+    status_counts = [
+        func.count().filter(order.status == status.value).label(status.value)
+        for status in schemas.OrderStatus
+    ]
+    query = (
+        select(
+            order.currency,
+            func.count().label("order_count"),
+            func.count()
+            .filter(order.order_date >= today_start, order.order_date < today_end)
+            .label("today"),
+            func.avg(order.total_amount).label("average"),
+            func.min(order.total_amount).label("min"),
+            func.max(order.total_amount).label("max"),
+            *status_counts,
+        )
+        .group_by(order.currency)
+        .order_by(order.currency)
+    )
+    if window.date_from:
+        query = query.where(order.order_date >= local_midnight(window.date_from, window.zone))
+    if window.date_to:
+        query = query.where(order.order_date < local_midnight(window.date_to, window.zone))
+    rows = (await db.execute(query)).all()
+
+    return {
+        "total_orders": sum(row.order_count for row in rows),
+        "today_orders": sum(row.today for row in rows),
+        "by_status": [
+            {"status": status.value, "count": sum(getattr(row, status.value) for row in rows)}
+            for status in schemas.OrderStatus
+        ],
+        "by_currency": [
+            {
+                "currency": row.currency,
+                "order_count": row.order_count,
+                # Plain JSON values, as the response cache stores the result as JSON
+                "average_amount": round(float(row.average), 2),
+                "min_amount": int(row.min),
+                "max_amount": int(row.max),
+            }
+            for row in rows
+        ],
+        "tz": window.tz,
+        "from": window.date_from and window.date_from.isoformat(),
+        "to": window.date_to and window.date_to.isoformat(),
+    }
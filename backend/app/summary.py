@@ -0,0 +1,179 @@
+"""
+Date ranges, time zones and bucketing for /orders/summary.
+
+A summary covers the local calendar days from `from` (inclusive) to `to` (exclusive) in
+the requested time zone, and groups revenue into day, week or month buckets. Weeks
+start on Monday; the first and last bucket are clipped to the range.
+
+Every figure starts from a per-day subquery of (day, currency, order_count,
+revenue_sum). For zones that have always been at UTC+0, such as UTC and
+Atlantic/Reykjavik, the local day is the UTC day and the subquery reads the
+daily_revenue rollup. Other zones aggregate orders by their local day instead,
+bounded on order_date so that only the partitions in the range are scanned. SQLite has
+no time zone database, so there such zones are limited to those with a constant
+offset.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import HTTPException
+from sqlalchemy import Date, DateTime, cast, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import fx, models
+
+# The first year sampled when checking whether a zone ever changed its offset
+_HISTORY_START = 1970
+
+
+@dataclass(frozen=True)
+class SummaryWindow:
+    """Range, bucket size and time zone of one summary request"""
+
+    date_from: date | None = None
+    date_to: date | None = None
+    granularity: str = "day"
+    tz: str = "UTC"
+
+    @property
+    def zone(self) -> ZoneInfo:
+        return ZoneInfo(self.tz)
+
+    def cache_key(self) -> str:
+        return f"{self.date_from or ''}:{self.date_to or ''}:{self.granularity}:{self.tz}"
+
+
+def parse_window(
+    date_from: date | None, date_to: date | None, granularity: str, tz: str
+) -> SummaryWindow:
+    """Validate the query parameters, raising 422 for an unknown zone or empty range"""
+    try:
+        zone = ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"Unknown time zone: {tz}") from e
+    if date_from and date_to and date_from >= date_to:
+        raise HTTPException(status_code=422, detail="from must be before to")
+    return SummaryWindow(date_from, date_to, granularity, zone.key)
+
+
+@lru_cache(maxsize=64)
+def constant_offset(tz: str) -> timedelta | None:
+    """The UTC offset of tz if it has not changed since 1970 and is not about to"""
+    zone = ZoneInfo(tz)
+    offsets = {
+        datetime(year, month, day, tzinfo=zone).utcoffset()
+        for year in range(_HISTORY_START, date.today().year + 2)
+        for month in range(1, 13)
+        for day in (1, 15)
+    }
+    return offsets.pop() if len(offsets) == 1 else None
+
+
+def local_midnight(day: date, zone: ZoneInfo) -> datetime:
+    """The instant, in UTC, at which day starts in zone"""
+    return datetime.combine(day, time(), tzinfo=zone).astimezone(timezone.utc)
+
+
+def daily_rows(db: AsyncSession, window: SummaryWindow):
+    """Subquery of (day, currency, order_count, revenue_sum) for the local days in window"""
+    offset = constant_offset(window.tz)
+    if offset == timedelta(0):
+        rollup = models.DailyRevenue
+        query = select(
+            rollup.date.label("day"),
+            rollup.currency,
+            rollup.order_count,
+            rollup.revenue_sum,
+        )
+        if window.date_from:
+            query = query.where(rollup.date >= window.date_from)
+        if window.date_to:
+            query = query.where(rollup.date < window.date_to)
+        return query.subquery()
+
+    order_date = models.Order.order_date
+    if db.get_bind().dialect.name == "postgresql":
+        # Inlined like the bucket unit below; zone keys are validated by ZoneInfo and
+        # contain no quotes
+        day = func.date(func.timezone(literal_column(f"'{window.tz}'"), order_date))
+    elif offset is not None:
+        minutes = int(offset.total_seconds()) // 60
+        day = func.date(order_date, f"{minutes:+d} minutes")
+    else:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Time zone {window.tz} changes its UTC offset; only PostgreSQL supports it",
+        )
+
+    query = select(
+        day.label("day"),
+        models.Order.currency,
+        func.count().label("order_count"),
+        func.sum(models.Order.total_amount).label("revenue_sum"),
+    ).group_by(day, models.Order.currency)
+    if window.date_from:
+        query = query.where(order_date >= local_midnight(window.date_from, window.zone))
+    if window.date_to:
+        query = query.where(order_date < local_midnight(window.date_to, window.zone))
+    return query.subquery()
+
+
+def bucketer(db: AsyncSession, granularity: str) -> Callable:
+    """Return a function mapping a day column to the first day of its bucket"""
+    if granularity == "day":
+        return lambda day: day
+    if db.get_bind().dialect.name == "postgresql":
+        # Inlined so that GROUP BY and the select list are the same expression
+        unit = literal_column(f"'{granularity}'")
+        return lambda day: cast(func.date_trunc(unit, cast(day, DateTime)), Date)
+    if granularity == "week":
+        # Forward to Sunday (a no-op on Sundays), then back to the Monday before it
+        return lambda day: func.date(day, "weekday 0", "-6 days")
+    return lambda day: func.date(day, "start of month")
+
+
+async def summarize(db: AsyncSession, window: SummaryWindow, normalize_to: str | None) -> dict:
+    """Compute the summary for window in a single aggregation over its buckets"""
+    rows = daily_rows(db, window)
+    bucket = bucketer(db, window.granularity)
+    start = bucket(rows.c.day)
+    by_bucket = (
+        await db.execute(
+            select(
+                start.label("start"),
+                rows.c.currency,
+                func.sum(rows.c.order_count).label("orders"),
+                func.sum(rows.c.revenue_sum).label("revenue"),
+            )
+            .group_by(start, rows.c.currency)
+            .order_by(start.desc(), rows.c.currency)
+        )
+    ).all()
+
+    # The totals add up the few bucket rows rather than aggregating the days again
+    totals: dict[str, int] = {}
+    for row in by_bucket:
+        totals[row.currency] = totals.get(row.currency, 0) + int(row.revenue)
+
+    return {
+        "total_orders": sum(int(row.orders) for row in by_bucket),
+        "total_revenue": [
+            {"currency": currency, "total": total} for currency, total in sorted(totals.items())
+        ],
+        "revenue_per_day": [
+            {"date": str(row.start), "currency": row.currency, "revenue": int(row.revenue)}
+            for row in by_bucket
+        ],
+        "normalized": (
+            await fx.normalized_summary(db, normalize_to, rows, bucket) if normalize_to else None
+        ),
+        "granularity": window.granularity,
+        "tz": window.tz,
+        # Plain JSON values, as the response cache stores the result as JSON
+        "from": window.date_from and window.date_from.isoformat(),
+        "to": window.date_to and window.date_to.isoformat(),
+    }
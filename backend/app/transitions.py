@@ -0,0 +1,151 @@
+"""
+Bulk status transitions for POST /orders/status-transitions.
+
+Orders move through OrderStatus in one direction, along ALLOWED_TRANSITIONS. A request
+moves many orders to one status, selected by order_id or by a filter, in chunks: each
+chunk is one UPDATE ... RETURNING whose WHERE clause only matches orders in a status
+that may move to the target, so the rule is enforced by the database, against the
+status the row has when it is written. Only the order_ids the UPDATE did not return are
+looked up again, to report them as already in the target status, not allowed or not
+found. Each chunk is committed with its change events.
+
+A status change does not touch the daily_revenue rollup or customer_stats, which
+depend on the amount, currency, customer and date only.
+"""
+
+from sqlalchemy import ARRAY, String, any_, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import events, models, responses, schemas
+from app.cache import cache
+
+Status = schemas.OrderStatus
+
+# Statuses each status may move to; completed and cancelled are final
+ALLOWED_TRANSITIONS: dict[Status, frozenset[Status]] = {
+    Status.PENDING: frozenset({Status.CONFIRMED, Status.PROCESSING, Status.CANCELLED}),
+    Status.CONFIRMED: frozenset({Status.PROCESSING, Status.SHIPPED, Status.CANCELLED}),
+    Status.PROCESSING: frozenset({Status.SHIPPED, Status.CANCELLED}),
+    Status.SHIPPED: frozenset({Status.DELIVERED}),
+    Status.DELIVERED: frozenset({Status.COMPLETED}),
+    Status.COMPLETED: frozenset(),
+    Status.CANCELLED: frozenset(),
+}
+
+
+def sources(target: Status) -> list[str]:
+    """The statuses that may move to target"""
+    return [status.value for status, targets in ALLOWED_TRANSITIONS.items() if target in targets]
+
+
+def _order_id_in(db: AsyncSession, order_ids: list[str]):
+    """order_id = ANY(:array) on PostgreSQL, one bound array however many IDs; IN elsewhere"""
+    if db.get_bind().dialect.name == "postgresql":
+        return models.Order.order_id == any_(literal(order_ids, ARRAY(String)))
+    return models.Order.order_id.in_(order_ids)
+
+
+def _filter_conditions(selection: schemas.StatusTransitionFilter) -> list:
+    order = models.Order
+    conditions = []
+    if selection.status:
+        conditions.append(order.status == selection.status.value)
+    if selection.customer_id:
+        conditions.append(order.customer_id == selection.customer_id)
+    if selection.date_from:
+        conditions.append(order.order_date >= selection.date_from)
+    if selection.date_to:
+        conditions.append(order.order_date < selection.date_to)
+    return conditions
+
+
+class StatusTransition:
+    """Per-request state of one status transition, shared by all of its chunks"""
+
+    def __init__(self, target: Status):
+        self.target = target
+        self.sources = sources(target)
+        self.updated = 0
+        self.unchanged: list[str] = []
+        self.not_found: list[str] = []
+        self.not_allowed: list[schemas.RejectedTransition] = []
+
+    async def _update(self, db: AsyncSession, *conditions) -> list:
+        """Move the allowed orders matching conditions and commit; returns their rows"""
+        order = models.Order
+        rows = (
+            await db.execute(
+                update(order)
+                .where(*conditions, order.status.in_(self.sources))
+                .values(status=self.target.value)
+                .returning(*responses.ORDER_COLUMNS)
+            )
+        ).all()
+        if rows:
+            await events.record(db, schemas.OrderEventType.UPDATED, rows)
+        await db.commit()
+        if rows:
+            # Per chunk, so the committed ones are visible even if a later chunk fails
+            events.notifier.notify()
+            await cache.invalidate("orders")
+        self.updated += len(rows)
+        return rows
+
+    async def move_ids(self, db: AsyncSession, order_ids: list[str]):
+        """Move one chunk of order_ids and classify the ones that did not move"""
+        moved = {row.order_id for row in await self._update(db, _order_id_in(db, order_ids))}
+        rest = [order_id for order_id in order_ids if order_id not in moved]
+        if not rest:
+            return
+
+        order = models.Order
+        found = dict(
+            (await db.execute(select(order.order_id, order.status).where(_order_id_in(db, rest))))
+            .tuples()
+            .all()
+        )
+        for order_id in rest:
+            status = found.get(order_id)
+            if status is None:
+                self.not_found.append(order_id)
+            elif status == self.target.value:
+                self.unchanged.append(order_id)
+            else:
+                self.not_allowed.append(
+                    schemas.RejectedTransition(order_id=order_id, status=status)
+                )
+
+    async def move_matching(
+        self, db: AsyncSession, selection: schemas.StatusTransitionFilter, chunk_size: int
+    ):
+        """Move every allowed order matching selection, chunk_size orders per UPDATE"""
+        order = models.Order
+        while True:
+            chunk = (
+                select(order.id)
+                .where(*_filter_conditions(selection), order.status.in_(self.sources))
+                .limit(chunk_size)
+                .scalar_subquery()
+            )
+            # Moved orders no longer match, so each pass picks up the next chunk
+            if len(await self._update(db, order.id.in_(chunk))) < chunk_size:
+                return
+
+    async def run(
+        self, db: AsyncSession, request: schemas.StatusTransitionRequest, chunk_size: int
+    ) -> schemas.StatusTransitionResponse:
+        if request.order_ids is not None:
+            # Repeated IDs would otherwise be reported as unchanged after the first
+            order_ids = list(dict.fromkeys(request.order_ids))
+            for start in range(0, len(order_ids), chunk_size):
+                await self.move_ids(db, order_ids[start : start + chunk_size])
+        else:
+            await self.move_matching(db, request.filter, chunk_size)
+
+        return schemas.StatusTransitionResponse(
+            status=self.target,
+            updated=self.updated,
+            unchanged=self.unchanged,
+            not_found=self.not_found,
+            not_allowed=self.not_allowed,
+        )
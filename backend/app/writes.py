@@ -0,0 +1,124 @@
+"""
+Single-statement writes of one order for PATCH and DELETE /orders/{order_id}.
+
+Each write is one UPDATE or DELETE ... RETURNING keyed on order_id that hands back the
+response columns, so the order is neither loaded before the write nor read again after
+it. An empty result means the order does not exist.
+
+A PATCH that changes the amount, currency, customer or date also needs the order as it
+was, to take its old contribution out of the daily_revenue rollup and customer_stats,
+and so does If-Match, which is checked against the old updated_at. On PostgreSQL the
+UPDATE then joins a SELECT ... FOR UPDATE of the order and returns its columns next to
+the new ones, still in one statement. The locking SELECT sees the latest committed
+version, which is the one the UPDATE writes over. SQLite cannot return columns of a
+joined table, so there the old values are read first, as before.
+
+A DELETE returns the order it removed, which is its last version, so If-Match is
+checked afterwards and a mismatch rolls the transaction back.
+"""
+
+from types import SimpleNamespace
+
+from fastapi import HTTPException, Request
+from sqlalchemy import Row, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import customers, etag, events, models, responses, rollup, schemas
+
+# Fields of the old order returned as old_<field>: its key, the fields the rollup and
+# customer_stats depend on, and the updated_at of its ETag
+OLD_FIELDS = ("id", "order_date", "customer_id", "currency", "total_amount", "updated_at")
+
+# Updated fields that move the order in the rollup or in customer_stats
+COUNTED_FIELDS = frozenset({"customer_id", "currency", "total_amount", "order_date"})
+
+
+def _not_found() -> HTTPException:
+    return HTTPException(status_code=404, detail="Order not found")
+
+
+async def _check_if_match(db: AsyncSession, request: Request, order_pk: int, updated_at):
+    """check_if_match() against a version already written over; rolls back on 412"""
+    try:
+        etag.check_if_match(request, etag.order_etag(order_pk, updated_at))
+    except HTTPException:
+        await db.rollback()
+        raise
+
+
+async def _apply_stats(db: AsyncSession, row):
+    """Move an updated order from its old to its new place in the rollup and customer_stats"""
+    deltas: rollup.RollupDeltas = {}
+    rollup.track(deltas, row.old_order_date, row.old_currency, row.old_total_amount, -1)
+    rollup.track(deltas, row.order_date, row.currency, row.total_amount, 1)
+    await rollup.apply_deltas(db, deltas)
+
+    old = (row.old_customer_id, row.old_currency, row.old_total_amount, row.old_order_date)
+    # Status changes, the common case, leave the customer's stats alone
+    if customers.counted(row) != old:
+        stats: customers.StatsDeltas = {}
+        customers.track(stats, *old, -1)
+        customers.track_order(stats, row, 1)
+        await customers.apply_deltas(db, stats)
+
+
+async def update_order(db: AsyncSession, request: Request, order_id: str, values: dict):
+    """Apply values to an order and record the event; returns a row of its new ORDER_COLUMNS"""
+    order = models.Order
+    stmt = (
+        update(order)
+        .values(values)
+        .returning(*responses.ORDER_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    current = select(*(getattr(order, field).label(f"old_{field}") for field in OLD_FIELDS))
+    current = current.where(order.order_id == order_id)
+    if_match = request.headers.get("if-match")
+    needs_old = bool(if_match) or not COUNTED_FIELDS.isdisjoint(values)
+
+    if not needs_old:
+        row = (await db.execute(stmt.where(order.order_id == order_id))).first()
+    elif db.get_bind().dialect.name == "postgresql":
+        old = current.with_for_update().subquery("old")
+        stmt = stmt.where(order.id == old.c.old_id, order.order_date == old.c.old_order_date)
+        row = (await db.execute(stmt.returning(*old.c))).first()
+    else:
+        row = None
+        old = (await db.execute(current)).first()
+        if old is not None:
+            new = (await db.execute(stmt.where(order.id == old.old_id))).first()
+            if new is None:
+                # Deleted between the read and the update
+                raise _not_found()
+            row = SimpleNamespace(**old._asdict(), **new._asdict())
+    if row is None:
+        raise _not_found()
+
+    if needs_old:
+        if if_match:
+            await _check_if_match(db, request, row.old_id, row.old_updated_at)
+        await _apply_stats(db, row)
+    await events.record(db, schemas.OrderEventType.UPDATED, [row])
+    return row
+
+
+async def delete_order(db: AsyncSession, request: Request, order_id: str) -> Row:
+    """Delete an order and record the event; returns the ORDER_COLUMNS it had"""
+    order = models.Order
+    row = (
+        await db.execute(
+            delete(order)
+            .where(order.order_id == order_id)
+            .returning(*responses.ORDER_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+    ).first()
+    if row is None:
+        raise _not_found()
+    await _check_if_match(db, request, row.id, row.updated_at)
+
+    await rollup.remove_order(db, row)
+    # The delete has already run, as customers.remove_order requires
+    await customers.remove_order(db, row)
+    await events.record(db, schemas.OrderEventType.DELETED, [row])
+    return row
@@ -0,0 +1,337 @@
+"""
+In-process benchmark of the order endpoints.
+
+Seeds a database with synthetic orders (see seed.py), then drives the FastAPI app
+through httpx's ASGI transport and reports latency percentiles and throughput per
+endpoint. No server or network is involved, so the numbers cover routing, validation,
+the database and serialization only. Results are written as JSON and can be checked
+against a baseline file; the run fails when an endpoint got slower than the threshold.
+
+Usage:
+    PYTHONPATH=. uv run python benchmarks/bench.py --rows 10000 100000 --output bench.json
+    PYTHONPATH=. uv run python benchmarks/bench.py --baseline benchmarks/baseline.json
+"""
+
+import os
+
+# Settings are read at import time; the benchmark supplies its own engines
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("API_KEY", "benchmark")
+
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import sqlalchemy
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.auth import SCOPES, ApiKeyPrincipal, verify_api_key
+from app.cache import MemoryBackend, cache
+from app.config import settings
+from app.database import Base, async_database_url, engine_options, get_async_db
+from app.main import app
+from benchmarks import seed as seeding
+
+DATA_DIR = Path(__file__).resolve().parent / ".data"
+
+
+@dataclass
+class Context:
+    """State shared by the request builders of one run"""
+
+    rows: int
+    factory: seeding.OrderFactory
+    rng: random.Random
+    created: int = 0
+
+    def existing_order_id(self) -> str:
+        return f"BENCH-{self.rng.randrange(self.rows):08d}"
+
+    def new_order(self) -> dict:
+        self.created += 1
+        order = self.factory.order(f"BENCH-NEW-{self.created:08d}-{self.rng.getrandbits(32):08x}")
+        order["order_date"] = order["order_date"].isoformat()
+        return order
+
+
+@dataclass
+class Scenario:
+    """One benchmarked endpoint: a label and a builder for (method, path, json body)"""
+
+    name: str
+    build: Callable[[Context], tuple[str, str, dict | None]]
+
+
+SCENARIOS = [
+    Scenario("POST /orders/", lambda ctx: ("POST", "/orders/", ctx.new_order())),
+    Scenario("GET /orders/{id}", lambda ctx: ("GET", f"/orders/{ctx.existing_order_id()}", None)),
+    Scenario("GET /orders/", lambda ctx: ("GET", "/orders/?limit=100", None)),
+    Scenario(
+        "GET /orders/?status",
+        lambda ctx: ("GET", "/orders/?status=pending&limit=100", None),
+    ),
+    Scenario(
+        "GET /orders/?customer_id",
+        lambda ctx: ("GET", f"/orders/?customer_id=CUST-{ctx.rng.randrange(100):06d}", None),
+    ),
+    Scenario("GET /orders/summary", lambda ctx: ("GET", "/orders/summary", None)),
+]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies_ms: list[float], elapsed_s: float) -> dict:
+    return {
+        "count": len(latencies_ms),
+        "mean_ms": round(sum(latencies_ms) / len(latencies_ms), 3),
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "requests_per_s": round(len(latencies_ms) / elapsed_s, 1),
+    }
+
+
+async def measure(client: httpx.AsyncClient, scenario: Scenario, ctx: Context, args) -> dict:
+    """
+    Run warmup and measured requests for one scenario with fixed concurrency.
+
+    The measurement is repeated and the best value of each statistic is kept, which
+    filters out interference from other processes on a shared machine.
+    """
+    for _ in range(args.warmup):
+        method, path, body = scenario.build(ctx)
+        (await client.request(method, path, json=body)).raise_for_status()
+
+    rounds = [await measure_round(client, scenario, ctx, args) for _ in range(args.repeat)]
+    best = {key: min(stats[key] for stats in rounds) for key in rounds[0]}
+    best["requests_per_s"] = max(stats["requests_per_s"] for stats in rounds)
+    return best
+
+
+async def measure_round(client: httpx.AsyncClient, scenario: Scenario, ctx: Context, args):
+    gc.collect()
+    latencies: list[float] = []
+    remaining = args.requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, path, body = scenario.build(ctx)
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def database_url(target: str, rows: int) -> str:
+    """Map the 'sqlite' shorthand onto a cached file per row count"""
+    if target == "sqlite":
+        DATA_DIR.mkdir(exist_ok=True)
+        return f"sqlite:///{DATA_DIR / f'orders-{rows}.db'}"
+    return target
+
+
+def prepare(url: str, rows: int, reuse: bool) -> tuple[seeding.OrderFactory, float]:
+    """Create the schema and seed rows orders unless a matching seed can be reused"""
+    engine = create_engine(url)
+    try:
+        with sessionmaker(bind=engine)() as db:
+            if reuse:
+                Base.metadata.create_all(engine)
+                if seeding.reset(db) == rows:
+                    return seeding.OrderFactory(rows), 0.0
+            Base.metadata.drop_all(engine)
+            Base.metadata.create_all(engine)
+            started = time.perf_counter()
+            factory = seeding.seed(db, rows)
+            return factory, time.perf_counter() - started
+    finally:
+        engine.dispose()
+
+
+async def run_endpoints(url: str, ctx: Context, args, scenarios: list[Scenario]) -> dict:
+    async_url = async_database_url(url)
+    async_engine = create_async_engine(async_url, **engine_options(async_url))
+    session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[verify_api_key] = lambda: ApiKeyPrincipal(
+        key_hash="benchmark", name="benchmark", scopes=frozenset(SCOPES)
+    )
+    cache.backend = MemoryBackend()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return {
+                scenario.name: await measure(client, scenario, ctx, args) for scenario in scenarios
+            }
+    finally:
+        app.dependency_overrides.clear()
+        await async_engine.dispose()
+
+
+def run(args, scenarios: list[Scenario] = SCENARIOS) -> dict:
+    """Benchmark every database target at every row count"""
+    if not args.cache:
+        # Measure the real work behind the summary, not cache hits
+        settings.summary_cache_ttl_seconds = 0
+
+    runs = []
+    for target in args.database_url:
+        for rows in args.rows:
+            url = database_url(target, rows)
+            backend = make_url(url).get_backend_name()
+            print(f"[{backend}] seeding {rows} orders...", flush=True)
+            factory, seed_s = prepare(url, rows, reuse=target == "sqlite" and not args.reseed)
+            ctx = Context(rows=rows, factory=factory, rng=random.Random(args.seed))
+            endpoints = asyncio.run(run_endpoints(url, ctx, args, scenarios))
+            runs.append(
+                {
+                    "database": backend,
+                    "rows": rows,
+                    "seed_s": round(seed_s, 2),
+                    "endpoints": endpoints,
+                }
+            )
+            print_run(runs[-1])
+
+    return {"meta": metadata(args), "runs": runs}
+
+
+def metadata(args) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "requests": args.requests,
+        "repeat": args.repeat,
+        "concurrency": args.concurrency,
+    }
+
+
+def compare(
+    report: dict, baseline: dict, threshold: float, metrics: list[str], floor_ms: float
+) -> list[str]:
+    """
+    Return one message per metric that regressed beyond threshold against baseline.
+
+    Only (database, rows, endpoint) combinations present in both reports are compared.
+    Differences below floor_ms are ignored as noise.
+    """
+    previous = {
+        (run["database"], run["rows"], name): stats
+        for run in baseline["runs"]
+        for name, stats in run["endpoints"].items()
+    }
+    regressions = []
+    for run in report["runs"]:
+        for name, stats in run["endpoints"].items():
+            old = previous.get((run["database"], run["rows"], name))
+            if old is None:
+                continue
+            for metric in metrics:
+                before, after = old[metric], stats[metric]
+                if after > before * (1 + threshold) and after - before > floor_ms:
+                    regressions.append(
+                        f"{run['database']} {run['rows']} rows {name}: {metric} "
+                        f"{before} -> {after} (+{(after / before - 1) * 100:.0f}%)"
+                    )
+    return regressions
+
+
+def print_run(run: dict):
+    seeded = f"seeded in {run['seed_s']} s" if run["seed_s"] else "reused seed"
+    print(f"{run['database']}, {run['rows']} rows ({seeded})")
+    for name, stats in run["endpoints"].items():
+        print(
+            f"  {name:<26} p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  "
+            f"p99 {stats['p99_ms']:>8} ms  {stats['requests_per_s']:>8} req/s"
+        )
+
+
+def parse_args(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10000], help="Row counts, e.g. 10000 100000 1000000"
+    )
+    parser.add_argument(
+        "--database-url",
+        nargs="+",
+        default=["sqlite"]
+        + ([os.environ["BENCH_POSTGRES_URL"]] if "BENCH_POSTGRES_URL" in os.environ else []),
+        help="'sqlite' (cached file under benchmarks/.data) and/or scratch database URLs, "
+        "whose tables are dropped. Defaults to sqlite plus $BENCH_POSTGRES_URL if set.",
+    )
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds per endpoint, best kept")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=66, help="Random seed for request parameters")
+    parser.add_argument("--reseed", action="store_true", help="Do not reuse cached SQLite seeds")
+    parser.add_argument("--cache", action="store_true", help="Keep the summary cache enabled")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Fail if slower than this JSON report")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="Allowed slowdown (0.2 = 20%%)"
+    )
+    parser.add_argument("--metrics", nargs="+", default=["p50_ms", "p95_ms"])
+    parser.add_argument("--floor-ms", type=float, default=0.5, help="Ignore smaller differences")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    report = run(args)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(report, baseline, args.threshold, args.metrics, args.floor_ms)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
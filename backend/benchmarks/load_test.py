@@ -0,0 +1,153 @@
+"""
+HTTP load test for the order endpoints.
+
+Seeds a set of orders through the API, then fires a mixed read/write workload at a
+running server with a fixed concurrency and reports requests/sec and latency
+percentiles per endpoint.
+
+Usage:
+    python benchmarks/load_test.py --url http://localhost:5000 --api-key KEY \\
+        --requests 4000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+CURRENCIES = ["ISK", "ISK", "ISK", "EUR", "USD", "GBP", "SEK", "NOK"]
+STATUSES = ["pending", "confirmed", "shipped", "delivered", "cancelled"]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def random_order(prefix: str) -> dict:
+    return {
+        "order_id": f"{prefix}-{uuid.uuid4().hex[:12]}",
+        "customer_id": f"CUST-{random.randint(1, 500):04d}",
+        "order_date": f"2025-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}T12:00:00Z",
+        "total_amount": random.randint(500, 200000),
+        "currency": random.choice(CURRENCIES),
+        "status": random.choice(STATUSES),
+    }
+
+
+async def seed(client: httpx.AsyncClient, count: int) -> list[str]:
+    order_ids = []
+    for _ in range(count):
+        order = random_order("SEED")
+        response = await client.post("/orders/", json=order)
+        response.raise_for_status()
+        order_ids.append(order["order_id"])
+    return order_ids
+
+
+def build_workload(order_ids: list[str], total: int) -> list[tuple[str, str, str, dict | None]]:
+    """Return (label, method, path, body) tuples in a fixed read-heavy mix"""
+    workload = []
+    for i in range(total):
+        roll = i % 10
+        if roll < 4:
+            workload.append(
+                ("GET /orders/{id}", "GET", f"/orders/{random.choice(order_ids)}", None)
+            )
+        elif roll < 6:
+            workload.append(("GET /orders/", "GET", "/orders/?limit=50", None))
+        elif roll < 8:
+            workload.append(("GET /orders/summary", "GET", "/orders/summary", None))
+        elif roll < 9:
+            workload.append(("POST /orders/", "POST", "/orders/", random_order("LOAD")))
+        else:
+            body = {"status": random.choice(STATUSES)}
+            path = f"/orders/{random.choice(order_ids)}"
+            workload.append(("PATCH /orders/{id}", "PATCH", path, body))
+    random.shuffle(workload)
+    return workload
+
+
+async def run(args) -> dict:
+    headers = {"X-API-Key": args.api_key}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.url, headers=headers, limits=limits, timeout=60
+    ) as client:
+        order_ids = await seed(client, args.seed)
+        workload = build_workload(order_ids, args.requests)
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in workload:
+            queue.put_nowait(item)
+
+        latencies: dict[str, list[float]] = defaultdict(list)
+        errors: dict[str, int] = defaultdict(int)
+
+        async def worker():
+            while not queue.empty():
+                label, method, path, body = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.request(method, path, json=body)
+                latencies[label].append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    errors[label] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    report = {
+        "url": args.url,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(args.requests / elapsed, 1),
+        "p50_ms": round(percentile(all_latencies, 50), 2),
+        "p99_ms": round(percentile(all_latencies, 99), 2),
+        "endpoints": {
+            label: {
+                "count": len(values),
+                "errors": errors[label],
+                "p50_ms": round(percentile(values, 50), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+            }
+            for label, values in sorted(latencies.items())
+        },
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--api-key", required=True)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=200, help="Orders to create before the run")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    print(f"{report['requests']} requests, concurrency {report['concurrency']}")
+    print(f"{report['requests_per_s']} req/s  p50 {report['p50_ms']} ms  p99 {report['p99_ms']} ms")
+    for label, stats in report["endpoints"].items():
+        print(
+            f"  {label:<22} n={stats['count']:<5} p50 {stats['p50_ms']:>8} ms  "
+            f"p99 {stats['p99_ms']:>8} ms  errors {stats['errors']}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Query plans of the order queries before and after the query-pattern indexes.
+
+Seeds a benchmark database like bench.py, then runs each query with the indexes of
+migration 7642c4e8a7d3 ("before") and of 093a794fca95 ("after"). For both it prints the
+plan and the median execution time. Plans come from EXPLAIN (ANALYZE, BUFFERS) on
+PostgreSQL and from EXPLAIN QUERY PLAN on SQLite. The database is left in the "after"
+state, which matches the models.
+
+Usage:
+    PYTHONPATH=. uv run python benchmarks/plans.py --rows 100000
+    PYTHONPATH=. uv run python benchmarks/plans.py --database-url "$BENCH_POSTGRES_URL"
+"""
+
+import os
+
+# Settings are read at import time; the benchmark supplies its own engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("API_KEY", "benchmark")
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from sqlalchemy import Select, create_engine, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app import export, models, rollup
+from benchmarks import bench
+
+# Index name -> definition, per schema state
+BEFORE = {
+    "ix_orders_id": "orders (id)",
+    "ix_orders_customer_id": "orders (customer_id)",
+}
+AFTER = {
+    "ix_orders_status_order_date_id": "orders (status, order_date, id)",
+    "ix_orders_customer_id_order_date_id": "orders (customer_id, order_date, id)",
+}
+AFTER_POSTGRES = {
+    "ix_orders_utc_date_currency": (
+        "orders (date(timezone('UTC', order_date)), currency) INCLUDE (total_amount)"
+    ),
+}
+
+
+def _newest(query: Select) -> Select:
+    return query.order_by(models.Order.order_date.desc(), models.Order.id.desc()).limit(100)
+
+
+QUERIES: dict[str, Callable[[Session], Select]] = {
+    "GET /orders/?status=shipped": lambda db: _newest(
+        select(models.Order).where(models.Order.status == "shipped")
+    ),
+    "GET /orders/?status=cancelled": lambda db: _newest(
+        select(models.Order).where(models.Order.status == "cancelled")
+    ),
+    "GET /orders/?customer_id": lambda db: _newest(
+        select(models.Order).where(models.Order.customer_id == "CUST-000042")
+    ),
+    "GET /orders/export?status=cancelled": lambda db: export.export_query().where(
+        models.Order.status == "cancelled"
+    ),
+    "rollup rebuild totals": rollup._raw_totals,
+}
+
+
+def set_indexes(db: Session, state: str):
+    """Switch the orders indexes to the 'before' or 'after' state and refresh statistics"""
+    postgres = db.get_bind().dialect.name == "postgresql"
+    after = {**AFTER, **(AFTER_POSTGRES if postgres else {})}
+    create, drop = (BEFORE, after) if state == "before" else (after, BEFORE)
+    for name in drop:
+        db.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for name, definition in create.items():
+        db.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}"))
+    db.execute(text("ANALYZE orders"))
+    db.commit()
+
+
+def explain(db: Session, query: Select) -> str:
+    dialect = db.get_bind().dialect
+    sql = str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "postgresql":
+        rows = db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))
+        return "\n".join(row[0] for row in rows)
+    rows = db.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+    return "\n".join(row[-1] for row in rows)
+
+
+def time_query(db: Session, query: Select, repeat: int) -> float:
+    """Median milliseconds to execute query and fetch every row"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.execute(query).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def run(url: str, rows: int, repeat: int, reuse: bool) -> dict:
+    bench.prepare(url, rows, reuse=reuse)
+    engine = create_engine(url)
+    results: dict[str, dict] = {name: {} for name in QUERIES}
+    try:
+        with Session(engine) as db:
+            for state in ("before", "after"):
+                set_indexes(db, state)
+                for name, build in QUERIES.items():
+                    query = build(db)
+                    results[name][state] = {
+                        "plan": explain(db, query),
+                        "median_ms": time_query(db, query, repeat),
+                    }
+    finally:
+        engine.dispose()
+    return results
+
+
+def print_results(results: dict):
+    for name, states in results.items():
+        before, after = states["before"]["median_ms"], states["after"]["median_ms"]
+        print(f"\n== {name}: {before} ms -> {after} ms")
+        for state in ("before", "after"):
+            print(f"-- {state}")
+            print(states[state]["plan"])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument(
+        "--database-url",
+        default="sqlite",
+        help="'sqlite' (cached file under benchmarks/.data) or a scratch database URL",
+    )
+    parser.add_argument("--repeat", type=int, default=20, help="Executions per query and state")
+    parser.add_argument("--reseed", action="store_true", help="Do not reuse a cached SQLite seed")
+    parser.add_argument("--output", help="Write the plans and timings as JSON to this file")
+    args = parser.parse_args(argv)
+
+    url = bench.database_url(args.database_url, args.rows)
+    backend = make_url(url).get_backend_name()
+    print(f"[{backend}] {args.rows} orders", flush=True)
+    results = run(
+        url, args.rows, args.repeat, reuse=args.database_url == "sqlite" and not args.reseed
+    )
+    print_results(results)
+    if args.output:
+        report = {"database": backend, "rows": args.rows, "queries": results}
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
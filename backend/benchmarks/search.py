@@ -0,0 +1,168 @@
+"""
+Query plans and timings of GET /orders/search.
+
+Seeds a benchmark database like bench.py and runs the search query of app/search.py for
+an exact order_id, an exact customer_id, prefixes and a substring, printing each plan
+and the median execution time. On PostgreSQL every query runs without the search
+indexes of migration e4a7c2d9b513 ("before") and with them ("after"). SQLite has no
+equivalent indexes, so it only runs the "after" state, a LIKE scan. The database is
+left in the "after" state, which matches the models.
+
+The plans above are of the query with every value inlined. On PostgreSQL, each term is
+also prepared the way the app sends it and explained under a forced generic plan, which
+is what drivers that prepare statements end up with. The report states whether that
+plan still uses a search index.
+
+Usage:
+    PYTHONPATH=. uv run python benchmarks/search.py --rows 1000000
+    PYTHONPATH=. uv run python benchmarks/search.py --database-url "$BENCH_POSTGRES_URL"
+"""
+
+import os
+
+# Settings are read at import time; the benchmark supplies its own engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("API_KEY", "benchmark")
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+from sqlalchemy import Select, create_engine, literal, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app import search
+from benchmarks import bench, plans
+
+# Index name -> definition of the search indexes, PostgreSQL only
+SEARCH_INDEXES = {
+    "ix_orders_order_id_lower_pattern": "orders (lower(order_id) text_pattern_ops)",
+    "ix_orders_customer_id_lower_pattern": "orders (lower(customer_id) text_pattern_ops)",
+    "ix_orders_order_id_trgm": "orders USING gin (lower(order_id) gin_trgm_ops)",
+    "ix_orders_customer_id_trgm": "orders USING gin (lower(customer_id) gin_trgm_ops)",
+}
+
+# Label -> search term, against the order_ids and customer_ids of benchmarks/seed.py
+TERMS = {
+    "exact order_id": "bench-00424242",
+    "exact customer_id": "cust-000042",
+    "order_id prefix": "BENCH-004242",
+    "short prefix": "cu",
+    "substring": "0424242",
+}
+
+LIMIT = 50
+
+
+def set_indexes(db: Session, state: str):
+    """Drop the search indexes ('before') or create them ('after') and refresh statistics"""
+    db.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for name, definition in SEARCH_INDEXES.items():
+        if state == "before":
+            db.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        else:
+            db.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}"))
+    db.execute(text("ANALYZE orders"))
+    db.commit()
+
+
+def generic_plan(db: Session, query: Select) -> str:
+    """EXPLAIN of query as the app sends it, prepared and planned without its parameters"""
+    dialect = db.get_bind().dialect
+    compiled = query.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    names: list[str] = []
+
+    def placeholder(match: re.Match) -> str:
+        names.append(match.group(1))
+        return f"${len(names)}"
+
+    # Bound parameters become $n; what is left inline is what the planner always sees
+    sql = re.sub(r"%\((\w+)\)s", placeholder, compiled.string).replace("%%", "%")
+    values = ", ".join(
+        str(literal(compiled.params[name]).compile(compile_kwargs={"literal_binds": True}))
+        for name in names
+    )
+    conn = db.connection().execution_options(no_parameters=True)
+    conn.exec_driver_sql("SET plan_cache_mode = force_generic_plan")
+    conn.exec_driver_sql(f"PREPARE search_check AS {sql}")
+    try:
+        rows = conn.exec_driver_sql(f"EXPLAIN EXECUTE search_check({values})")
+        return "\n".join(row[0] for row in rows)
+    finally:
+        conn.exec_driver_sql("DEALLOCATE search_check")
+        conn.exec_driver_sql("RESET plan_cache_mode")
+
+
+def run(url: str, rows: int, repeat: int, reuse: bool) -> dict:
+    bench.prepare(url, rows, reuse=reuse)
+    engine = create_engine(url)
+    results: dict[str, dict] = {label: {} for label in TERMS}
+    try:
+        with Session(engine) as db:
+            postgres = db.get_bind().dialect.name == "postgresql"
+            for state in ("before", "after") if postgres else ("after",):
+                if postgres:
+                    set_indexes(db, state)
+                for label, term in TERMS.items():
+                    query = search.search_query(term, LIMIT)
+                    results[label][state] = {
+                        "plan": plans.explain(db, query),
+                        "median_ms": plans.time_query(db, query, repeat),
+                        "matches": len(db.execute(query).all()),
+                    }
+                    if postgres and state == "after":
+                        plan = generic_plan(db, query)
+                        results[label]["generic"] = {
+                            "plan": plan,
+                            "uses_index": any(name in plan for name in SEARCH_INDEXES),
+                        }
+    finally:
+        engine.dispose()
+    return results
+
+
+def print_results(results: dict):
+    for label, states in results.items():
+        timed = [state for state in ("before", "after") if state in states]
+        timings = " -> ".join(f"{states[state]['median_ms']} ms" for state in timed)
+        print(f"\n== {label} ({TERMS[label]!r}, {states['after']['matches']} rows): {timings}")
+        for state, result in states.items():
+            if state == "generic":
+                uses = "uses" if result["uses_index"] else "does NOT use"
+                print(f"-- generic plan, {uses} a search index")
+            else:
+                print(f"-- {state}")
+            print(result["plan"])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument(
+        "--database-url",
+        default="sqlite",
+        help="'sqlite' (cached file under benchmarks/.data) or a scratch database URL",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Executions per query and state")
+    parser.add_argument("--reseed", action="store_true", help="Do not reuse a cached SQLite seed")
+    parser.add_argument("--output", help="Write the plans and timings as JSON to this file")
+    args = parser.parse_args(argv)
+
+    url = bench.database_url(args.database_url, args.rows)
+    backend = make_url(url).get_backend_name()
+    print(f"[{backend}] {args.rows} orders", flush=True)
+    results = run(
+        url, args.rows, args.repeat, reuse=args.database_url == "sqlite" and not args.reseed
+    )
+    print_results(results)
+    if args.output:
+        report = {"database": backend, "rows": args.rows, "queries": results}
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
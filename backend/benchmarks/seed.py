@@ -0,0 +1,85 @@
+"""
+Synthetic order data for benchmarks.
+
+Orders follow the currency mix, status mix and per-currency amounts of
+utils/dummy-data.json, spread over a year of order dates. Generation is seeded, so the
+same row count always produces the same data.
+"""
+
+import json
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app import customers, models, rollup
+
+DUMMY_DATA = Path(__file__).resolve().parents[2] / "utils" / "dummy-data.json"
+
+# Newest order date in the synthetic data; fixed so results do not drift over time
+END_DATE = datetime(2025, 12, 31, 23, 59, 59, tzinfo=timezone.utc)
+DAYS = 365
+
+# Roughly twenty orders per customer
+ORDERS_PER_CUSTOMER = 20
+
+
+class OrderFactory:
+    """Deterministic generator of order rows shaped like the dummy data"""
+
+    def __init__(self, rows: int, seed: int = 66, profile: Path = DUMMY_DATA):
+        sample = json.loads(profile.read_text())
+        self.rng = random.Random(seed)
+        currencies = Counter(order["currency"] for order in sample)
+        statuses = Counter(order["status"] for order in sample)
+        self.currencies, self.currency_weights = zip(*sorted(currencies.items()), strict=True)
+        self.statuses, self.status_weights = zip(*sorted(statuses.items()), strict=True)
+        self.amounts: dict[str, list[int]] = {}
+        for order in sample:
+            self.amounts.setdefault(order["currency"], []).append(order["total_amount"])
+        self.customers = max(1, rows // ORDERS_PER_CUSTOMER)
+
+    def order(self, order_id: str) -> dict:
+        """One order as a dict of OrderCreate fields"""
+        rng = self.rng
+        currency = rng.choices(self.currencies, self.currency_weights)[0]
+        amount = int(rng.choice(self.amounts[currency]) * rng.uniform(0.5, 1.5))
+        return {
+            "order_id": order_id,
+            "customer_id": f"CUST-{rng.randrange(self.customers):06d}",
+            "order_date": END_DATE - timedelta(seconds=rng.randrange(DAYS * 86400)),
+            "total_amount": max(100, amount),
+            "currency": currency,
+            "status": rng.choices(self.statuses, self.status_weights)[0],
+        }
+
+
+def seed(db: Session, rows: int, batch_size: int = 10000, seed: int = 66) -> OrderFactory:
+    """Insert rows synthetic orders with executemany batches and rebuild the aggregates"""
+    factory = OrderFactory(rows, seed)
+    for start in range(0, rows, batch_size):
+        batch = [
+            factory.order(f"BENCH-{i:08d}") for i in range(start, min(rows, start + batch_size))
+        ]
+        db.execute(insert(models.Order), batch)
+    rollup.rebuild(db)
+    customers.rebuild(db)
+    db.commit()
+    return factory
+
+
+def reset(db: Session) -> int:
+    """
+    Drop orders created by earlier benchmark runs and return the remaining row count.
+
+    Seeded orders are never modified by the benchmark, so what is left matches a fresh
+    seed of that size.
+    """
+    db.execute(delete(models.Order).where(models.Order.order_id.like("BENCH-NEW-%")))
+    rollup.rebuild(db)
+    customers.rebuild(db)
+    db.commit()
+    return db.scalar(select(func.count()).select_from(models.Order))
@@ -0,0 +1,130 @@
+"""
+GET /orders/ list serialization: validated ORM rows against plain columns and orjson.
+
+Seeds a benchmark database like bench.py, then builds the response body of a page of
+orders both ways for each --limit. "validated" is what FastAPI does for a
+response_model: load ORM objects, validate each into OrderResponse and serialize the
+list with pydantic. "fast" is what read_orders does now: select the columns as tuples,
+turn them into dicts and encode with orjson (app.responses). The two bodies are
+checked to be identical before timing. Times are the median of --repeat runs and
+include the query.
+
+Usage:
+    PYTHONPATH=. uv run python benchmarks/serialization.py --rows 100000
+    PYTHONPATH=. uv run python benchmarks/serialization.py --database-url "$BENCH_POSTGRES_URL"
+"""
+
+import os
+
+# Settings are read at import time; the benchmark supplies its own engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("API_KEY", "benchmark")
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import models, responses, schemas
+from app.database import async_database_url
+from benchmarks import bench
+
+ORDER_LIST = TypeAdapter(list[schemas.OrderResponse])
+
+
+def _newest(query, limit: int):
+    return query.order_by(models.Order.order_date.desc(), models.Order.id.desc()).limit(limit)
+
+
+async def validated(db: AsyncSession, limit: int) -> bytes:
+    orders = (await db.scalars(_newest(select(models.Order), limit))).all()
+    return ORDER_LIST.dump_json(ORDER_LIST.validate_python(orders, from_attributes=True))
+
+
+async def fast(db: AsyncSession, limit: int) -> bytes:
+    rows = (await db.execute(_newest(select(*responses.ORDER_COLUMNS), limit))).all()
+    return responses.ORJSONResponse(responses.order_rows(rows)).body
+
+
+PATHS: dict[str, Callable[[AsyncSession, int], Awaitable[bytes]]] = {
+    "validated": validated,
+    "fast": fast,
+}
+
+
+async def time_path(db: AsyncSession, path, limit: int, repeat: int) -> float:
+    """Median milliseconds to query a page and build its body"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await path(db, limit)
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+async def measure(url: str, limits: list[int], repeat: int) -> dict:
+    engine = create_async_engine(async_database_url(url))
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    results: dict[str, dict] = {}
+    try:
+        async with session_factory() as db:
+            for limit in limits:
+                bodies = {name: await path(db, limit) for name, path in PATHS.items()}
+                if bodies["validated"] != bodies["fast"]:
+                    raise AssertionError(f"Response bodies differ at limit={limit}")
+                results[str(limit)] = {
+                    name: await time_path(db, path, limit, repeat) for name, path in PATHS.items()
+                }
+                results[str(limit)]["bytes"] = len(bodies["fast"])
+    finally:
+        await engine.dispose()
+    return results
+
+
+def print_results(results: dict):
+    print(f"{'limit':>8} {'validated ms':>14} {'fast ms':>10} {'speedup':>8} {'bytes':>10}")
+    for limit, timings in results.items():
+        speedup = timings["validated"] / timings["fast"] if timings["fast"] else 0
+        print(
+            f"{limit:>8} {timings['validated']:>14} {timings['fast']:>10} "
+            f"{speedup:>7.1f}x {timings['bytes']:>10}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument(
+        "--database-url",
+        default="sqlite",
+        help="'sqlite' (cached file under benchmarks/.data) or a scratch database URL",
+    )
+    parser.add_argument("--limit", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=50, help="Runs per path and limit")
+    parser.add_argument("--reseed", action="store_true", help="Do not reuse a cached SQLite seed")
+    parser.add_argument("--output", help="Write the timings as JSON to this file")
+    args = parser.parse_args(argv)
+
+    url = bench.database_url(args.database_url, args.rows)
+    backend = make_url(url).get_backend_name()
+    print(f"[{backend}] {args.rows} orders", flush=True)
+    bench.prepare(url, args.rows, reuse=args.database_url == "sqlite" and not args.reseed)
+    results = asyncio.run(measure(url, args.limit, args.repeat))
+    print_results(results)
+    if args.output:
+        report = {"database": backend, "rows": args.rows, "limits": results}
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
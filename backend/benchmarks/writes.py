@@ -0,0 +1,153 @@
+"""
+Database round trips and latency of the single-order write endpoints.
+
+Seeds a benchmark database like bench.py, then creates --requests orders through
+POST /orders/ and updates and deletes each of them through PATCH and DELETE
+/orders/{order_id}, driving the FastAPI app through httpx's ASGI transport. Every
+request's statements and COMMIT are counted as round trips. In-process SQLite has no
+network, so --latency-ms delays every round trip by that much to stand in for the hop
+to a database server; with it, each round trip saved shows up in the request time.
+
+Usage:
+    PYTHONPATH=. uv run python benchmarks/writes.py --rows 100000 --latency-ms 1
+    PYTHONPATH=. uv run python benchmarks/writes.py --database-url "$BENCH_POSTGRES_URL"
+"""
+
+import os
+
+# Settings are read at import time; the benchmark supplies its own engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("API_KEY", "benchmark")
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.auth import SCOPES, ApiKeyPrincipal, verify_api_key
+from app.cache import MemoryBackend, cache
+from app.database import async_database_url, engine_options, get_async_db
+from app.main import app
+from benchmarks import bench
+
+# Label -> (method, JSON body, whether to send If-Match), applied to every created order
+# in this order, so the last one deletes them again
+WRITES = {
+    "PATCH status": ("PATCH", {"status": "shipped"}, False),
+    "PATCH status, If-Match": ("PATCH", {"status": "delivered"}, True),
+    "PATCH total_amount": ("PATCH", {"total_amount": 4242}, False),
+    "DELETE": ("DELETE", None, False),
+}
+
+
+class RoundTrips:
+    """Counts the statements and COMMITs sent on an engine, delaying each by latency_s"""
+
+    def __init__(self, engine: AsyncEngine, latency_s: float):
+        self.count = 0
+        self.latency_s = latency_s
+        event.listen(engine.sync_engine, "before_cursor_execute", self.trip)
+        event.listen(engine.sync_engine, "commit", self.trip)
+
+    def trip(self, *args):
+        self.count += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+
+async def measure(url: str, ctx: bench.Context, requests: int, latency_ms: float) -> dict:
+    async_url = async_database_url(url)
+    engine = create_async_engine(async_url, **engine_options(async_url))
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    trips = RoundTrips(engine, latency_ms / 1000)
+    samples: dict[str, list[tuple[int, float]]] = {}
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    async def timed(client: httpx.AsyncClient, label: str, method: str, path: str, **kwargs):
+        trips.count = 0
+        started = time.perf_counter()
+        (await client.request(method, path, **kwargs)).raise_for_status()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        samples.setdefault(label, []).append((trips.count, elapsed_ms))
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[verify_api_key] = lambda: ApiKeyPrincipal(
+        key_hash="benchmark", name="benchmark", scopes=frozenset(SCOPES)
+    )
+    cache.backend = MemoryBackend()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            order_ids = []
+            for _ in range(requests):
+                order = ctx.new_order()
+                order_ids.append(order["order_id"])
+                await timed(client, "POST /orders/", "POST", "/orders/", json=order)
+            for label, (method, body, if_match) in WRITES.items():
+                for order_id in order_ids:
+                    path = f"/orders/{order_id}"
+                    headers = {}
+                    if if_match:
+                        headers["If-Match"] = (await client.get(path)).headers["ETag"]
+                    await timed(client, label, method, path, json=body, headers=headers)
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    return {
+        label: {
+            "round_trips": statistics.median_low(count for count, _ in values),
+            "median_ms": round(statistics.median(ms for _, ms in values), 2),
+        }
+        for label, values in samples.items()
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument(
+        "--database-url",
+        default="sqlite",
+        help="'sqlite' (cached file under benchmarks/.data) or a scratch database URL",
+    )
+    parser.add_argument("--requests", type=int, default=200, help="Orders written per endpoint")
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Delay added to every round trip"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--reseed", action="store_true", help="Do not reuse a cached SQLite seed")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    url = bench.database_url(args.database_url, args.rows)
+    backend = make_url(url).get_backend_name()
+    print(f"[{backend}] {args.rows} orders, {args.latency_ms} ms per round trip", flush=True)
+    factory, _ = bench.prepare(
+        url, args.rows, reuse=args.database_url == "sqlite" and not args.reseed
+    )
+    ctx = bench.Context(rows=args.rows, factory=factory, rng=random.Random(args.seed))
+    results = asyncio.run(measure(url, ctx, args.requests, args.latency_ms))
+
+    for label, result in results.items():
+        print(f"{label:<24} {result['round_trips']:>4} round trips {result['median_ms']:>8} ms")
+    if args.output:
+        report = {"database": backend, "rows": args.rows, "latency_ms": args.latency_ms}
+        Path(args.output).write_text(json.dumps({**report, "writes": results}, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,57 +5,85 @@ Pytest configuration and fixtures for testing
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
-from app.database import Base, get_db
+from app import auth
+from app.cache import MemoryBackend, cache
+from app.database import Base, get_async_db, get_session_factory
 from app.main import app
-from app.auth import verify_api_key
+from app.auth import SCOPES, ApiKeyPrincipal, hash_key, verify_api_key
 
-# Use in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@pytest.fixture(scope="function")
+def database_path(tmp_path):
+    """SQLite file shared by the sync test session and the async app session"""
+    return tmp_path / "test.db"
 
 
 @pytest.fixture(scope="function")
-def db_session():
+def db_session(database_path):
     """Create a fresh database for each test"""
+    engine = create_engine(f"sqlite:///{database_path}")
     Base.metadata.create_all(bind=engine)
-    session = TestingSessionLocal()
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
     try:
         yield session
     finally:
         session.close()
-        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
 
 
 @pytest.fixture(scope="function")
-def client(db_session):
-    """Create a test client with the test database"""
-
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
+def client(db_session, database_path):
+    """Create a test client whose handlers use aiosqlite on the test database"""
+    # NullPool keeps no connections around between the TestClient's event loops
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+    TestingAsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
 
     def override_verify_api_key():
         """Mock API key verification for tests"""
-        return "test-api-key"
+        return ApiKeyPrincipal(
+            key_hash=hash_key("test-api-key"), name="test", scopes=frozenset(SCOPES)
+        )
+
+    # Every test starts with an empty response cache and fresh version counters
+    cache.backend = MemoryBackend()
 
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_session_factory] = lambda: TestingAsyncSessionLocal
     app.dependency_overrides[verify_api_key] = override_verify_api_key
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def async_session_factory(database_path):
+    """Async sessions on the test database, for code that opens its own sessions"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.fixture
+def create_key(db_session):
+    """Helper fixture to store an API key and return it in plain text"""
+
+    def _create(name="warehouse", scopes=auth.DEFAULT_SCOPES):
+        api_key = auth.create_key(db_session, name, scopes)
+        db_session.commit()
+        return api_key
+
+    return _create
+
+
 @pytest.fixture
 def sample_order_data():
     """Sample order data for testing"""
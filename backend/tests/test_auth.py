@@ -0,0 +1,200 @@
+"""
+Tests for API key verification, scopes, caching and usage counters
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app import auth, models
+from app.config import settings
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    """Every test starts with an empty key cache and no pending usage"""
+    auth.key_cache.clear()
+    auth.usage = auth.UsageCounter()
+    yield
+    auth.key_cache.clear()
+
+
+@pytest.fixture
+def auth_client(client):
+    """Test client that verifies API keys for real"""
+    app.dependency_overrides.pop(auth.verify_api_key)
+    yield client
+    # Nothing left for the shutdown flush, which would use the real database
+    auth.usage = auth.UsageCounter()
+
+
+class TestVerifyApiKey:
+    """Tests for the X-API-Key header on the endpoints"""
+
+    def test_missing_key(self, auth_client):
+        """Test requests without a key get 401"""
+        assert auth_client.get("/orders/").status_code == 401
+
+    def test_unknown_key(self, auth_client):
+        """Test an unknown key gets 403"""
+        response = auth_client.get("/orders/", headers={"X-API-Key": "osk_unknown"})
+
+        assert response.status_code == 403
+        assert response.json()["detail"] == "Invalid API key"
+
+    def test_settings_key_has_every_scope(self, auth_client, sample_order_data):
+        """Test the API_KEY setting still works for reads and writes"""
+        headers = {"X-API-Key": settings.api_key}
+        rate = {"currency": "USD", "effective_date": "2025-01-01", "rate": "140"}
+
+        created = auth_client.post("/orders/", json=sample_order_data, headers=headers)
+        updated = auth_client.put("/fx-rates", json=rate, headers=headers)
+
+        assert created.status_code == 201
+        assert updated.status_code == 200
+
+    def test_stored_key(self, auth_client, create_key):
+        """Test a key from the api_keys table is accepted"""
+        api_key = create_key()
+
+        response = auth_client.get("/orders/", headers={"X-API-Key": api_key})
+
+        assert response.status_code == 200
+
+    def test_scopes_enforced(self, auth_client, create_key, sample_order_data):
+        """Test a read-only key cannot write"""
+        headers = {"X-API-Key": create_key(scopes=["orders:read"])}
+
+        assert auth_client.get("/orders/summary", headers=headers).status_code == 200
+        response = auth_client.post("/orders/", json=sample_order_data, headers=headers)
+        assert response.status_code == 403
+        assert response.json()["detail"] == "API key lacks scope: orders:write"
+        assert auth_client.get("/fx-rates", headers=headers).status_code == 403
+
+    def test_revoked_key(self, auth_client, create_key, db_session):
+        """Test a revoked key is rejected once its cache entry is gone"""
+        api_key = create_key()
+        headers = {"X-API-Key": api_key}
+        assert auth_client.get("/orders/", headers=headers).status_code == 200
+
+        assert auth.revoke_key(db_session, "warehouse")
+        db_session.commit()
+        # Cached until the TTL passes
+        assert auth_client.get("/orders/", headers=headers).status_code == 200
+
+        auth.key_cache.discard(auth.hash_key(api_key))
+        assert auth_client.get("/orders/", headers=headers).status_code == 403
+
+    def test_unknown_scope_rejected(self, db_session):
+        """Test keys can only be created with known scopes"""
+        with pytest.raises(ValueError, match="admin"):
+            auth.create_key(db_session, "partner", ["admin"])
+
+    def test_only_digest_stored(self, create_key, db_session):
+        """Test the key itself is not stored"""
+        api_key = create_key()
+
+        row = db_session.query(models.ApiKey).one()
+        assert row.key_hash == auth.hash_key(api_key)
+        assert api_key not in (row.key_hash, row.prefix)
+        assert api_key.startswith(row.prefix)
+
+
+class TestKeyCache:
+    """Tests for the in-process cache of verified keys"""
+
+    def test_lookup_once(self, auth_client, create_key, monkeypatch):
+        """Test repeated requests with a key query the database once"""
+        lookups = []
+        original = auth.lookup
+
+        async def counting_lookup(db, key_hash):
+            lookups.append(key_hash)
+            return await original(db, key_hash)
+
+        monkeypatch.setattr(auth, "lookup", counting_lookup)
+        headers = {"X-API-Key": create_key()}
+        for _ in range(3):
+            auth_client.get("/orders/", headers=headers)
+        for _ in range(3):
+            auth_client.get("/orders/", headers={"X-API-Key": "osk_unknown"})
+
+        assert len(lookups) == 2
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first"""
+        cache = auth.KeyCache(maxsize=2, ttl=60)
+        cache.put("a", None)
+        cache.put("b", None)
+        cache.get("a")
+        cache.put("c", None)
+
+        assert cache.get("a")[0]
+        assert not cache.get("b")[0]
+        assert len(cache) == 2
+
+    def test_ttl(self):
+        """Test entries expire after the TTL"""
+        now = [0.0]
+        cache = auth.KeyCache(maxsize=10, ttl=30, clock=lambda: now[0])
+        principal = auth.ApiKeyPrincipal("h", "warehouse", frozenset())
+        cache.put("h", principal)
+
+        now[0] = 29
+        assert cache.get("h") == (True, principal)
+        now[0] = 30
+        assert cache.get("h") == (False, None)
+
+    def test_cached_verification_is_fast(self, create_key, async_session_factory):
+        """Test a cached key verifies in microseconds"""
+        api_key = create_key()
+
+        async def measure():
+            await auth.authenticate(async_session_factory, api_key)
+            started = time.perf_counter()
+            for _ in range(1000):
+                await auth.authenticate(async_session_factory, api_key)
+            return (time.perf_counter() - started) / 1000
+
+        # Typically a few microseconds; the bound only catches database lookups
+        assert asyncio.run(measure()) < 100e-6
+
+
+class TestUsageCounter:
+    """Tests for batched per-key usage counts"""
+
+    def test_counts_flushed_in_batch(
+        self, auth_client, create_key, db_session, async_session_factory
+    ):
+        """Test requests are counted in memory and written by flush"""
+        headers = {"X-API-Key": create_key()}
+        for _ in range(3):
+            auth_client.get("/orders/", headers=headers)
+        key_id = db_session.query(models.ApiKey.id).scalar()
+        assert auth.usage.pending() == {key_id: 3}
+
+        assert asyncio.run(auth.usage.flush(async_session_factory)) == 1
+
+        row = db_session.query(models.ApiKey).one()
+        assert row.request_count == 3
+        assert row.last_used_at is not None
+        assert auth.usage.pending() == {}
+
+    def test_settings_key_not_counted(self, auth_client):
+        """Test the API_KEY setting has no row to count against"""
+        auth_client.get("/orders/", headers={"X-API-Key": settings.api_key})
+
+        assert auth.usage.pending() == {}
+
+    def test_failed_flush_keeps_counts(self, async_session_factory):
+        """Test counts survive a failed flush"""
+        auth.usage.record(1)
+
+        def broken_factory():
+            raise RuntimeError("database down")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(auth.usage.flush(broken_factory))
+        assert auth.usage.pending() == {1: 1}
@@ -0,0 +1,144 @@
+"""
+Tests for the benchmark harness helpers
+"""
+
+import asyncio
+import json
+import random
+from collections import Counter
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import search
+from benchmarks.bench import Context, compare
+from benchmarks.plans import QUERIES, explain, set_indexes
+from benchmarks.search import TERMS
+from benchmarks.seed import OrderFactory, seed
+from benchmarks.serialization import PATHS
+from benchmarks.writes import WRITES, measure
+
+
+def report(p50, p95, rows=10000, endpoint="GET /orders/"):
+    return {
+        "runs": [
+            {
+                "database": "sqlite",
+                "rows": rows,
+                "endpoints": {endpoint: {"p50_ms": p50, "p95_ms": p95}},
+            }
+        ]
+    }
+
+
+class TestOrderFactory:
+    """Tests for synthetic order generation"""
+
+    def test_deterministic(self):
+        """Test the same seed produces the same orders"""
+        first = OrderFactory(1000, seed=1)
+        second = OrderFactory(1000, seed=1)
+
+        assert [first.order(f"O-{i}") for i in range(50)] == [
+            second.order(f"O-{i}") for i in range(50)
+        ]
+
+    def test_mix_follows_dummy_data(self):
+        """Test currencies and statuses come from the dummy data, ISK most common"""
+        factory = OrderFactory(1000)
+        orders = [factory.order(f"O-{i}") for i in range(2000)]
+
+        currencies = Counter(order["currency"] for order in orders)
+        assert set(currencies) <= set(factory.currencies)
+        assert currencies.most_common(1)[0][0] == "ISK"
+        assert {order["status"] for order in orders} <= set(factory.statuses)
+        assert all(order["total_amount"] > 0 for order in orders)
+
+
+class TestCompare:
+    """Tests for the baseline threshold check"""
+
+    def test_regression_beyond_threshold(self):
+        """Test a slowdown beyond the threshold is reported"""
+        regressions = compare(report(13, 20), report(10, 20), 0.2, ["p50_ms", "p95_ms"], 0.5)
+
+        assert len(regressions) == 1
+        assert "p50_ms 10 -> 13" in regressions[0]
+
+    def test_within_threshold_or_noise_floor(self):
+        """Test small slowdowns and sub-floor differences pass"""
+        assert compare(report(11, 20), report(10, 20), 0.2, ["p50_ms"], 0.5) == []
+        assert compare(report(0.3, 1), report(0.1, 1), 0.2, ["p50_ms"], 0.5) == []
+
+    def test_only_shared_runs_compared(self):
+        """Test runs missing from the baseline are skipped"""
+        current = report(100, 100, rows=100000)
+
+        assert compare(current, report(1, 1), 0.2, ["p50_ms"], 0.5) == []
+
+
+class TestQueryPlans:
+    """Tests for the before/after index plans"""
+
+    def test_filtered_listings_use_new_indexes(self, db_session):
+        """Test the status and customer listings switch to the composite indexes"""
+        status = QUERIES["GET /orders/?status=cancelled"](db_session)
+        customer = QUERIES["GET /orders/?customer_id"](db_session)
+
+        set_indexes(db_session, "before")
+        assert "ix_orders_status" not in explain(db_session, status)
+        assert "TEMP B-TREE FOR ORDER BY" in explain(db_session, customer)
+
+        set_indexes(db_session, "after")
+        assert "ix_orders_status_order_date_id" in explain(db_session, status)
+        customer_plan = explain(db_session, customer)
+        assert "ix_orders_customer_id_order_date_id" in customer_plan
+        assert "TEMP B-TREE" not in customer_plan
+
+
+class TestSearch:
+    """Tests for the search benchmark"""
+
+    def test_terms_fit_seeded_ids(self, db_session):
+        """Test search finds seeded orders by ID and prefix, scanning on SQLite"""
+        seed(db_session, 50)
+        exact = search.search_query("bench-00000042", 50)
+        short = search.search_query(TERMS["short prefix"], 50)
+
+        assert [(row.order_id, row.rank) for row in db_session.execute(exact)] == [
+            ("BENCH-00000042", search.EXACT)
+        ]
+        assert {row.rank for row in db_session.execute(short)} == {search.PREFIX}
+        assert "SCAN orders" in explain(db_session, short)
+
+
+class TestSerialization:
+    """Tests for the list serialization comparison"""
+
+    def test_paths_build_identical_bodies(self, db_session, database_path):
+        """Test the validated and fast paths produce the same bytes"""
+        seed(db_session, 50)
+        engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+
+        async def bodies():
+            async with AsyncSession(engine) as db:
+                return [await path(db, 20) for path in PATHS.values()]
+
+        validated, fast = asyncio.run(bodies())
+
+        assert validated == fast
+        assert len(json.loads(fast)) == 20
+
+
+class TestWrites:
+    """Tests for the write round trip benchmark"""
+
+    def test_counts_round_trips(self, db_session, database_path):
+        """Test every write is measured and a status change is one UPDATE, event and COMMIT"""
+        factory = seed(db_session, 50)
+        ctx = Context(rows=50, factory=factory, rng=random.Random(1))
+
+        results = asyncio.run(measure(f"sqlite:///{database_path}", ctx, 3, 0.0))
+
+        assert list(results) == ["POST /orders/", *WRITES]
+        assert results["PATCH status"]["round_trips"] == 3
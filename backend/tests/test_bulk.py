@@ -0,0 +1,163 @@
+"""
+Tests for POST /orders/bulk
+"""
+
+import json
+
+from sqlalchemy.exc import IntegrityError
+
+from app import rollup
+from app.bulk import BulkIngest
+
+
+def make_orders(sample_order_data, count, prefix="ORD-BULK"):
+    return [
+        {**sample_order_data, "order_id": f"{prefix}-{i:03d}", "total_amount": 1000 + i}
+        for i in range(count)
+    ]
+
+
+class TestBulkCreate:
+    """Tests for bulk ingestion from JSON arrays and NDJSON"""
+
+    def test_bulk_json_array(self, client, sample_order_data):
+        """Test creating orders from a JSON array"""
+        orders = make_orders(sample_order_data, 5)
+
+        response = client.post("/orders/bulk", json=orders)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 5
+        assert [row["status"] for row in data["results"]] == ["created"] * 5
+        assert [row["index"] for row in data["results"]] == list(range(5))
+        assert all(row["id"] is not None for row in data["results"])
+        assert len(client.get("/orders/").json()) == 5
+
+    def test_bulk_ndjson(self, client, sample_order_data):
+        """Test creating orders from an NDJSON body with a malformed line"""
+        orders = make_orders(sample_order_data, 3)
+        lines = [json.dumps(order) for order in orders]
+        lines.insert(1, "{not json")
+        body = "\n".join(lines) + "\n"
+
+        response = client.post(
+            "/orders/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 3
+        assert data["invalid"] == 1
+        assert data["results"][1] == {
+            "index": 1,
+            "order_id": None,
+            "status": "invalid",
+            "id": None,
+            "detail": "Invalid JSON",
+        }
+
+    def test_bulk_reports_duplicates_and_invalid_rows(
+        self, client, sample_order_data, create_sample_order
+    ):
+        """Test existing, repeated and invalid rows are reported per row"""
+        create_sample_order()
+        orders = [
+            sample_order_data,
+            {**sample_order_data, "order_id": "ORD-NEW-001"},
+            {**sample_order_data, "order_id": "ORD-NEW-001"},
+            {**sample_order_data, "order_id": "ORD-BAD-001", "currency": "XXX"},
+        ]
+
+        response = client.post("/orders/bulk", json=orders)
+
+        data = response.json()
+        assert [row["status"] for row in data["results"]] == [
+            "duplicate",
+            "created",
+            "duplicate",
+            "invalid",
+        ]
+        assert data["results"][3]["order_id"] == "ORD-BAD-001"
+        assert "Currency must be a valid ISO 4217 code" in data["results"][3]["detail"]
+        assert (data["created"], data["duplicates"], data["invalid"]) == (1, 2, 1)
+
+    def test_bulk_small_chunks(self, client, db_session, sample_order_data):
+        """Test chunked ingestion creates every row and keeps the rollup in sync"""
+        orders = make_orders(sample_order_data, 7)
+        orders.append(orders[0])
+
+        response = client.post("/orders/bulk?chunk_size=2", json=orders)
+
+        data = response.json()
+        assert data["created"] == 7
+        assert data["results"][7]["status"] == "duplicate"
+        assert rollup.find_mismatches(db_session) == []
+
+    def test_bulk_atomic_rejects_whole_batch(self, client, sample_order_data):
+        """Test atomic mode creates nothing when one row fails"""
+        orders = make_orders(sample_order_data, 3)
+        orders[2]["total_amount"] = -1
+
+        response = client.post("/orders/bulk?atomic=true&chunk_size=2", json=orders)
+
+        assert response.status_code == 422
+        data = response.json()
+        assert [row["status"] for row in data["results"]] == ["skipped", "skipped", "invalid"]
+        assert data["created"] == 0
+        assert client.get("/orders/").json() == []
+
+    def test_bulk_atomic_success(self, client, sample_order_data):
+        """Test atomic mode commits when every row is valid"""
+        response = client.post("/orders/bulk?atomic=true", json=make_orders(sample_order_data, 3))
+
+        assert response.status_code == 200
+        assert response.json()["created"] == 3
+
+    def test_bulk_rejects_non_array_body(self, client, sample_order_data):
+        """Test a JSON object body is rejected"""
+        response = client.post("/orders/bulk", json=sample_order_data)
+
+        assert response.status_code == 422
+
+
+class TestConcurrentInserts:
+    """Tests for order_ids another writer creates between the duplicate check and the insert"""
+
+    def test_repeated_races_reported_as_duplicates(
+        self, client, monkeypatch, create_sample_order, sample_order_data
+    ):
+        """Test the recheck and retry repeat until the insert goes through"""
+        create_sample_order()
+        create_sample_order({**sample_order_data, "order_id": "ORD-BULK-001"})
+        # The first check misses both existing orders and the recheck misses one of them
+        stale = [set(), {"ORD-2025-001"}]
+        existing = BulkIngest._existing
+
+        async def racing_existing(self, db, order_ids):
+            return stale.pop(0) if stale else await existing(self, db, order_ids)
+
+        monkeypatch.setattr(BulkIngest, "_existing", racing_existing)
+        orders = [sample_order_data, *make_orders(sample_order_data, 3)[1:]]
+
+        response = client.post("/orders/bulk", json=orders)
+
+        assert response.status_code == 200
+        statuses = [row["status"] for row in response.json()["results"]]
+        assert statuses == ["duplicate", "duplicate", "created"]
+        assert len(client.get("/orders/").json()) == 3
+
+    def test_other_conflicts_skip_the_chunk(self, client, monkeypatch, sample_order_data):
+        """Test a failed insert with no order_id conflict skips its rows instead of looping"""
+
+        async def failing_insert(self, db, rows):
+            raise IntegrityError("INSERT", {}, Exception("CHECK constraint failed"))
+
+        monkeypatch.setattr(BulkIngest, "_insert", failing_insert)
+
+        response = client.post("/orders/bulk", json=make_orders(sample_order_data, 2))
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["skipped"] == 2
+        assert data["results"][0]["detail"] == "Conflicting concurrent write"
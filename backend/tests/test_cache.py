@@ -0,0 +1,196 @@
+"""
+Tests for the versioned response cache and the cached summary endpoint
+"""
+
+import asyncio
+from datetime import date
+
+import fakeredis
+import pytest
+
+from app import models
+from app.cache import CACHE_REQUESTS, MemoryBackend, RedisBackend, ResponseCache
+from app.config import settings
+
+
+@pytest.fixture(params=["memory", "redis"])
+def response_cache(request):
+    """A cache on each backend; Redis is simulated with fakeredis"""
+    if request.param == "redis":
+        return ResponseCache(RedisBackend(fakeredis.FakeAsyncRedis()))
+    return ResponseCache(MemoryBackend())
+
+
+def counting(value):
+    """Compute function that records how often it ran"""
+
+    async def compute():
+        compute.calls += 1
+        return value
+
+    compute.calls = 0
+    return compute
+
+
+class TestResponseCache:
+    """Tests for ResponseCache on the memory and Redis backends"""
+
+    @pytest.mark.asyncio
+    async def test_hit_after_miss(self, response_cache):
+        """Test a second lookup is served from the cache"""
+        compute = counting({"total": 1})
+
+        first = await response_cache.get_or_compute("t", "k", ("orders",), 60, compute)
+        second = await response_cache.get_or_compute("t", "k", ("orders",), 60, compute)
+
+        assert first == second == {"total": 1}
+        assert compute.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_bumps_version(self, response_cache):
+        """Test a write to any scope of an entry makes it unreachable"""
+        compute = counting([1, 2])
+        await response_cache.get_or_compute("t", "k", ("orders", "fx"), 60, compute)
+
+        await response_cache.invalidate("fx")
+        await response_cache.get_or_compute("t", "k", ("orders", "fx"), 60, compute)
+
+        assert compute.calls == 2
+        assert await response_cache.version("fx") == 1
+        assert await response_cache.version("orders") == 0
+
+    @pytest.mark.asyncio
+    async def test_last_changed(self, response_cache):
+        """Test invalidate records when each scope last changed"""
+        response_cache.wall_clock = lambda: 1234.5
+
+        assert await response_cache.last_changed(("orders", "fx")) == 0
+        await response_cache.invalidate("fx")
+
+        assert await response_cache.last_changed(("orders", "fx")) == 1234.5
+        assert await response_cache.last_changed(("orders",)) == 0
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self, response_cache):
+        """Test entries expire after the TTL even without writes"""
+        compute = counting("value")
+        await response_cache.get_or_compute("t", "k", ("orders",), 0.05, compute)
+
+        await asyncio.sleep(0.1)
+        await response_cache.get_or_compute("t", "k", ("orders",), 0.05, compute)
+
+        assert compute.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_zero_ttl_disables(self, response_cache):
+        """Test a TTL of zero always computes"""
+        compute = counting("value")
+
+        for _ in range(3):
+            await response_cache.get_or_compute("t", "k", ("orders",), 0, compute)
+
+        assert compute.calls == 3
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_coalesce(self, response_cache):
+        """Test concurrent misses for one key run a single computation"""
+        release = asyncio.Event()
+        calls = 0
+
+        async def slow_compute():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"total": 42}
+
+        tasks = [
+            asyncio.create_task(
+                response_cache.get_or_compute("t", "k", ("orders",), 60, slow_compute)
+            )
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert calls == 1
+        assert results == [{"total": 42}] * 5
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self, response_cache):
+        """Test a failed computation is retried on the next lookup"""
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await response_cache.get_or_compute("t", "k", ("orders",), 60, failing)
+
+        assert (
+            await response_cache.get_or_compute("t", "k", ("orders",), 60, counting("ok")) == "ok"
+        )
+
+
+class TestSummaryCache:
+    """Tests for caching of GET /orders/summary"""
+
+    def test_cached_until_write(self, client, db_session, sample_order_data):
+        """Test the summary is cached and invalidated by order writes"""
+        client.post("/orders/", json=sample_order_data)
+        assert client.get("/orders/summary").json()["total_orders"] == 1
+
+        # A row written behind the API's back is not seen while the entry is valid
+        db_session.add(
+            models.DailyRevenue(
+                date=date(2020, 1, 1),
+                currency="EUR",
+                order_count=5,
+                revenue_sum=500,
+            )
+        )
+        db_session.commit()
+        assert client.get("/orders/summary").json()["total_orders"] == 1
+
+        second_order = {**sample_order_data, "order_id": "ORD-2025-002"}
+        client.post("/orders/", json=second_order)
+        assert client.get("/orders/summary").json()["total_orders"] == 7
+
+    @pytest.mark.parametrize(
+        "method, path, body",
+        [
+            ("PATCH", "/orders/ORD-2025-001", {"total_amount": 100}),
+            ("DELETE", "/orders/ORD-2025-001", None),
+        ],
+    )
+    def test_update_and_delete_invalidate(self, client, sample_order_data, method, path, body):
+        """Test updates and deletes are reflected immediately"""
+        client.post("/orders/", json=sample_order_data)
+        before = client.get("/orders/summary").json()
+
+        assert client.request(method, path, json=body).status_code in (200, 204)
+        after = client.get("/orders/summary").json()
+
+        assert after != before
+
+    def test_hit_and_miss_counters(self, client, sample_order_data):
+        """Test lookups are counted and exposed on /metrics"""
+        hits = CACHE_REQUESTS.value(cache="summary", result="hit")
+        misses = CACHE_REQUESTS.value(cache="summary", result="miss")
+
+        client.get("/orders/summary")
+        client.get("/orders/summary")
+
+        assert CACHE_REQUESTS.value(cache="summary", result="miss") == misses + 1
+        assert CACHE_REQUESTS.value(cache="summary", result="hit") == hits + 1
+        assert 'cache_requests_total{cache="summary",result="hit"}' in client.get("/metrics").text
+
+    def test_disabled_with_zero_ttl(self, client, db_session, monkeypatch, sample_order_data):
+        """Test SUMMARY_CACHE_TTL_SECONDS=0 always reads the rollup"""
+        monkeypatch.setattr(settings, "summary_cache_ttl_seconds", 0)
+        client.post("/orders/", json=sample_order_data)
+        client.get("/orders/summary")
+
+        db_session.query(models.DailyRevenue).delete()
+        db_session.commit()
+
+        assert client.get("/orders/summary").json()["total_orders"] == 0
@@ -0,0 +1,214 @@
+"""
+Tests for customer_stats and the /customers endpoints
+"""
+
+from app import customers
+from app.models import CustomerStats, Order
+
+
+def stats_rows(db_session):
+    """Return customer_stats as {(customer_id, currency): (order_count, revenue_sum)}"""
+    db_session.expire_all()
+    return {
+        (row.customer_id, row.currency): (row.order_count, row.revenue_sum)
+        for row in db_session.query(CustomerStats).all()
+    }
+
+
+def last_order_at(db_session, customer_id, currency="ISK"):
+    db_session.expire_all()
+    row = db_session.get(CustomerStats, (customer_id, currency))
+    return row.last_order_at.strftime("%Y-%m-%d")
+
+
+def order(sample_order_data, order_id, **fields):
+    return {**sample_order_data, "order_id": order_id, **fields}
+
+
+class TestStatsMaintenance:
+    """Tests for customer_stats updates on create, update and delete"""
+
+    def test_create_accumulates(self, client, db_session, sample_order_data):
+        """Test orders add up per customer and currency, bulk ones included"""
+        client.post("/orders/", json=order(sample_order_data, "A", total_amount=100))
+        client.post("/orders/", json=order(sample_order_data, "B", total_amount=50))
+        client.post(
+            "/orders/bulk",
+            json=[
+                order(sample_order_data, "C", currency="EUR", total_amount=7),
+                order(sample_order_data, "D", customer_id="CUST-2", total_amount=1),
+            ],
+        )
+
+        assert stats_rows(db_session) == {
+            ("CUST-123", "ISK"): (2, 150),
+            ("CUST-123", "EUR"): (1, 7),
+            ("CUST-2", "ISK"): (1, 1),
+        }
+
+    def test_update_moves_order(self, client, db_session, sample_order_data):
+        """Test changing customer_id or amount moves the order between rows"""
+        client.post("/orders/", json=order(sample_order_data, "A", total_amount=100))
+        client.post("/orders/", json=order(sample_order_data, "B", total_amount=50))
+
+        client.patch("/orders/A", json={"customer_id": "CUST-2", "total_amount": 80})
+
+        assert stats_rows(db_session) == {("CUST-123", "ISK"): (1, 50), ("CUST-2", "ISK"): (1, 80)}
+
+    def test_last_order_at(self, client, db_session, sample_order_data):
+        """Test last_order_at follows the latest order through updates and deletes"""
+        for order_id, day in (("A", "2025-01-10"), ("B", "2025-03-01"), ("C", "2025-02-01")):
+            client.post(
+                "/orders/", json=order(sample_order_data, order_id, order_date=f"{day}T12:00:00Z")
+            )
+        assert last_order_at(db_session, "CUST-123") == "2025-03-01"
+
+        client.delete("/orders/B")
+        assert last_order_at(db_session, "CUST-123") == "2025-02-01"
+        client.patch("/orders/C", json={"order_date": "2024-12-01T12:00:00Z"})
+        assert last_order_at(db_session, "CUST-123") == "2025-01-10"
+        client.patch("/orders/C", json={"order_date": "2025-06-01T12:00:00Z"})
+        assert last_order_at(db_session, "CUST-123") == "2025-06-01"
+
+    def test_status_update_leaves_stats(self, client, db_session, sample_order_data):
+        """Test updates that do not touch the counted fields keep the row"""
+        client.post("/orders/", json=sample_order_data)
+
+        client.patch("/orders/ORD-2025-001", json={"status": "shipped"})
+
+        assert stats_rows(db_session) == {("CUST-123", "ISK"): (1, 25990)}
+
+    def test_delete_last_order_removes_row(self, client, db_session, sample_order_data):
+        """Test a customer without orders left has no row"""
+        client.post("/orders/", json=sample_order_data)
+
+        client.delete("/orders/ORD-2025-001")
+
+        assert stats_rows(db_session) == {}
+
+
+class TestStatsCheck:
+    """Tests for comparing and rebuilding customer_stats"""
+
+    def test_no_mismatches_after_mutations(self, client, db_session, sample_order_data):
+        """Test the maintained stats match a fresh aggregation"""
+        client.post("/orders/", json=order(sample_order_data, "A"))
+        client.post("/orders/", json=order(sample_order_data, "B", currency="EUR"))
+        client.patch("/orders/A", json={"total_amount": 5})
+        client.delete("/orders/B")
+
+        assert customers.find_mismatches(db_session) == []
+
+    def test_detects_and_rebuilds_drift(self, db_session):
+        """Test rebuild recomputes stats written outside the endpoints"""
+        db_session.add(
+            Order(
+                order_id="RAW-1",
+                customer_id="CUST-1",
+                total_amount=100,
+                currency="ISK",
+                status="pending",
+            )
+        )
+        db_session.add(CustomerStats(customer_id="GONE", currency="ISK", order_count=1))
+        db_session.commit()
+
+        assert customers.find_mismatches(db_session) == [
+            ("CUST-1", "ISK", (1, 100), (0, 0)),
+            ("GONE", "ISK", (0, 0), (1, 0)),
+        ]
+        customers.rebuild(db_session)
+        db_session.commit()
+        assert customers.find_mismatches(db_session) == []
+        assert stats_rows(db_session) == {("CUST-1", "ISK"): (1, 100)}
+
+
+class TestCustomerEndpoints:
+    """Tests for GET /customers/{customer_id}/summary and GET /customers/top"""
+
+    def test_summary(self, client, sample_order_data):
+        """Test the summary totals each currency and the customer as a whole"""
+        client.post(
+            "/orders/", json=order(sample_order_data, "A", order_date="2025-01-01T00:00:00Z")
+        )
+        client.post(
+            "/orders/",
+            json=order(sample_order_data, "B", currency="EUR", order_date="2025-02-01T00:00:00Z"),
+        )
+
+        response = client.get("/customers/CUST-123/summary")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["customer_id"], body["order_count"]) == ("CUST-123", 2)
+        # SQLite hands back naive datetimes, PostgreSQL UTC ones
+        assert body["last_order_date"].startswith("2025-02-01T00:00:00")
+        assert [
+            (c["currency"], c["order_count"], c["revenue"], c["last_order_date"][:10])
+            for c in body["by_currency"]
+        ] == [("EUR", 1, 25990, "2025-02-01"), ("ISK", 1, 25990, "2025-01-01")]
+
+    def test_summary_unknown_customer(self, client):
+        """Test a customer without orders is 404"""
+        assert client.get("/customers/NOBODY/summary").status_code == 404
+
+    def test_top_pages(self, client, sample_order_data):
+        """Test customers come highest first, a page at a time, in one currency"""
+        amounts = {"C-1": [10], "C-2": [500], "C-3": [200, 200], "C-4": [30]}
+        for customer_id, totals in amounts.items():
+            for i, amount in enumerate(totals):
+                client.post(
+                    "/orders/",
+                    json=order(
+                        sample_order_data,
+                        f"{customer_id}-{i}",
+                        customer_id=customer_id,
+                        total_amount=amount,
+                    ),
+                )
+        client.post(
+            "/orders/", json=order(sample_order_data, "X", customer_id="C-9", currency="EUR")
+        )
+
+        first = client.get("/customers/top", params={"currency": "isk", "limit": 3})
+        second = client.get(
+            "/customers/top",
+            params={"currency": "ISK", "limit": 3, "cursor": first.headers["X-Next-Cursor"]},
+        )
+
+        assert [(c["customer_id"], c["revenue"]) for c in first.json()] == [
+            ("C-2", 500),
+            ("C-3", 400),
+            ("C-4", 30),
+        ]
+        assert [c["customer_id"] for c in second.json()] == ["C-1"]
+        assert "X-Next-Cursor" not in second.headers
+        by_orders = client.get("/customers/top", params={"currency": "ISK", "by": "orders"})
+        assert [c["customer_id"] for c in by_orders.json()] == ["C-3", "C-4", "C-2", "C-1"]
+
+    def test_top_ties_across_pages(self, client, sample_order_data):
+        """Test customers with equal values are neither skipped nor repeated"""
+        for i in range(5):
+            client.post(
+                "/orders/",
+                json=order(sample_order_data, f"T-{i}", customer_id=f"C-{i}", total_amount=100),
+            )
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"currency": "ISK", "limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/customers/top", params=params)
+            seen += [c["customer_id"] for c in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+        assert seen == ["C-4", "C-3", "C-2", "C-1", "C-0"]
+
+    def test_top_rejects_bad_input(self, client):
+        """Test unknown currencies and damaged cursors are rejected"""
+        assert client.get("/customers/top", params={"currency": "XYZ"}).status_code == 422
+        assert client.get("/customers/top").status_code == 422
+        response = client.get("/customers/top", params={"currency": "ISK", "cursor": "%%%"})
+        assert response.status_code == 400
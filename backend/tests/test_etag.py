@@ -0,0 +1,141 @@
+"""
+Tests for ETags and conditional requests
+"""
+
+from datetime import datetime
+
+from app import models
+
+ORDER_PATH = "/orders/ORD-2025-001"
+
+
+def touch(db_session, order_id="ORD-2025-001"):
+    """Change updated_at behind the API, like a write from another process"""
+    order = db_session.query(models.Order).filter_by(order_id=order_id).one()
+    order.updated_at = datetime(2030, 1, 1, 12, 0, 0)
+    db_session.commit()
+
+
+class TestOrderETag:
+    """Tests for conditional GET /orders/{order_id}"""
+
+    def test_etag_on_create_and_read(self, client, sample_order_data):
+        """Test create and read return the same strong ETag"""
+        created = client.post("/orders/", json=sample_order_data)
+        read = client.get(ORDER_PATH)
+
+        assert read.headers["ETag"].startswith('"')
+        assert read.headers["ETag"] == created.headers["ETag"]
+
+    def test_if_none_match(self, client, create_sample_order):
+        """Test a matching If-None-Match gets an empty 304"""
+        create_sample_order()
+        current = client.get(ORDER_PATH).headers["ETag"]
+
+        response = client.get(ORDER_PATH, headers={"If-None-Match": current})
+        weak = client.get(ORDER_PATH, headers={"If-None-Match": f'"other", W/{current}'})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == current
+        assert weak.status_code == 304
+
+    def test_changed_order(self, client, db_session, create_sample_order):
+        """Test a changed updated_at yields the full order and a new ETag"""
+        create_sample_order()
+        previous = client.get(ORDER_PATH).headers["ETag"]
+        touch(db_session)
+
+        response = client.get(ORDER_PATH, headers={"If-None-Match": previous})
+
+        assert response.status_code == 200
+        assert response.json()["order_id"] == "ORD-2025-001"
+        assert response.headers["ETag"] != previous
+
+    def test_missing_order(self, client):
+        """Test If-None-Match does not hide a 404"""
+        response = client.get("/orders/NOPE", headers={"If-None-Match": "*"})
+
+        assert response.status_code == 404
+
+
+class TestCollectionETag:
+    """Tests for conditional GET /orders/ and /orders/summary"""
+
+    def test_list_not_modified_until_write(self, client, sample_order_data):
+        """Test the list ETag changes only when an order is written"""
+        client.post("/orders/", json=sample_order_data)
+        first = client.get("/orders/").headers["ETag"]
+
+        unchanged = client.get("/orders/", headers={"If-None-Match": first})
+        client.post("/orders/", json={**sample_order_data, "order_id": "ORD-2025-002"})
+        changed = client.get("/orders/", headers={"If-None-Match": first})
+
+        assert unchanged.status_code == 304
+        assert changed.status_code == 200
+        assert len(changed.json()) == 2
+        assert changed.headers["ETag"] != first
+
+    def test_list_etag_depends_on_query(self, client):
+        """Test different filters get different ETags"""
+        all_orders = client.get("/orders/").headers["ETag"]
+        pending = client.get("/orders/", params={"status": "pending"}).headers["ETag"]
+
+        assert all_orders != pending
+        response = client.get(
+            "/orders/", params={"status": "pending"}, headers={"If-None-Match": all_orders}
+        )
+        assert response.status_code == 200
+
+    def test_summary_not_modified_until_write(self, client, sample_order_data):
+        """Test the summary ETag follows order and FX rate writes"""
+        client.post("/orders/", json=sample_order_data)
+        first = client.get("/orders/summary").headers["ETag"]
+
+        unchanged = client.get("/orders/summary", headers={"If-None-Match": first})
+        client.put(
+            "/fx-rates", json={"currency": "USD", "effective_date": "2025-01-01", "rate": "140"}
+        )
+        changed = client.get("/orders/summary", headers={"If-None-Match": first})
+
+        assert unchanged.status_code == 304
+        assert changed.status_code == 200
+        assert changed.json()["total_orders"] == 1
+
+
+class TestIfMatch:
+    """Tests for optimistic concurrency on PATCH and DELETE"""
+
+    def test_patch_with_current_etag(self, client, create_sample_order):
+        """Test an update with the current ETag succeeds and returns the new one"""
+        create_sample_order()
+        current = client.get(ORDER_PATH).headers["ETag"]
+
+        response = client.patch(
+            ORDER_PATH, json={"status": "shipped"}, headers={"If-Match": current}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "shipped"
+        assert "ETag" in response.headers
+
+    def test_patch_with_stale_etag(self, client, db_session, create_sample_order):
+        """Test an update based on an old version is rejected with 412"""
+        create_sample_order()
+        stale = client.get(ORDER_PATH).headers["ETag"]
+        touch(db_session)
+
+        response = client.patch(ORDER_PATH, json={"status": "shipped"}, headers={"If-Match": stale})
+
+        assert response.status_code == 412
+        assert client.get(ORDER_PATH).json()["status"] == "pending"
+
+    def test_delete_with_stale_etag(self, client, db_session, create_sample_order):
+        """Test a delete based on an old version is rejected with 412"""
+        create_sample_order()
+        stale = client.get(ORDER_PATH).headers["ETag"]
+        touch(db_session)
+
+        assert client.delete(ORDER_PATH, headers={"If-Match": stale}).status_code == 412
+        assert client.delete(ORDER_PATH, headers={"If-Match": "*"}).status_code == 204
+        assert client.get(ORDER_PATH).status_code == 404
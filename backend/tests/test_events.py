@@ -0,0 +1,248 @@
+"""
+Tests for the order events outbox, GET /orders/changes and the relay
+"""
+
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import fakeredis
+import pytest
+
+from app import events, models, schemas
+from app.config import settings
+
+
+@pytest.fixture
+def create_orders(client, sample_order_data):
+    def _create(count):
+        for i in range(count):
+            response = client.post("/orders/", json={**sample_order_data, "order_id": f"ORD-{i}"})
+            assert response.status_code == 201
+
+    return _create
+
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+NEW_ORDER = {
+    "order_id": "ORD-9",
+    "customer_id": "CUST-1",
+    "total_amount": 100,
+    "currency": "ISK",
+    "status": "pending",
+    "order_date": NOW,
+    "created_at": NOW,
+    "updated_at": NOW,
+}
+
+
+def stored_events(db_session):
+    return db_session.query(models.OrderEvent).order_by(models.OrderEvent.seq).all()
+
+
+class TestOutbox:
+    """Tests for events written by the order mutations"""
+
+    def test_create_update_delete(self, client, db_session, sample_order_data):
+        """Test each mutation writes one event with the order as the API returns it"""
+        created = client.post("/orders/", json=sample_order_data).json()
+        updated = client.patch("/orders/ORD-2025-001", json={"status": "shipped"}).json()
+        client.delete("/orders/ORD-2025-001")
+
+        stored = stored_events(db_session)
+        assert [(event.type, event.order_id) for event in stored] == [
+            ("created", "ORD-2025-001"),
+            ("updated", "ORD-2025-001"),
+            ("deleted", "ORD-2025-001"),
+        ]
+        assert json.loads(stored[0].payload) == created
+        assert json.loads(stored[1].payload) == updated
+        assert json.loads(stored[2].payload)["status"] == "shipped"
+        assert stored[0].seq < stored[1].seq < stored[2].seq
+
+    def test_failed_create_writes_nothing(self, client, db_session, sample_order_data):
+        """Test a rejected duplicate leaves no event behind"""
+        client.post("/orders/", json=sample_order_data)
+
+        response = client.post("/orders/", json=sample_order_data)
+
+        assert response.status_code == 400
+        assert len(stored_events(db_session)) == 1
+
+    def test_bulk(self, client, db_session, sample_order_data):
+        """Test bulk creation writes an event per created order only"""
+        rows = [{**sample_order_data, "order_id": f"B-{i}"} for i in range(3)]
+
+        client.post("/orders/bulk", json=[*rows, rows[0]])
+
+        stored = stored_events(db_session)
+        assert [event.order_id for event in stored] == ["B-0", "B-1", "B-2"]
+        assert json.loads(stored[1].payload) == client.get("/orders/B-1").json()
+
+    def test_rejected_atomic_bulk_writes_nothing(self, client, db_session, sample_order_data):
+        """Test an atomic bulk request that fails leaves no events"""
+        rows = [{**sample_order_data, "order_id": "B-0"}, {"order_id": "B-1"}]
+
+        response = client.post("/orders/bulk", params={"atomic": True}, json=rows)
+
+        assert response.status_code == 422
+        assert stored_events(db_session) == []
+
+
+class TestOrderChanges:
+    """Tests for GET /orders/changes"""
+
+    def test_pages(self, client, create_orders):
+        """Test since and limit page through the events in order"""
+        create_orders(3)
+
+        first = client.get("/orders/changes", params={"limit": 2}).json()
+        second = client.get("/orders/changes", params={"since": first["next"]}).json()
+
+        assert [event["order_id"] for event in first["events"]] == ["ORD-0", "ORD-1"]
+        assert [event["order_id"] for event in second["events"]] == ["ORD-2"]
+        assert second["events"][0]["type"] == "created"
+        assert second["events"][0]["order"]["order_id"] == "ORD-2"
+        third = client.get("/orders/changes", params={"since": second["next"]}).json()
+        assert third == {"events": [], "next": second["next"]}
+
+    def test_last_event_id(self, client, create_orders):
+        """Test Last-Event-ID overrides since"""
+        create_orders(2)
+        first = client.get("/orders/changes").json()["events"][0]["seq"]
+
+        response = client.get("/orders/changes", headers={"Last-Event-ID": str(first)})
+
+        assert [event["order_id"] for event in response.json()["events"]] == ["ORD-1"]
+
+    def test_wait_times_out(self, client, monkeypatch):
+        """Test a waiting request with nothing to return gives up after wait seconds"""
+        monkeypatch.setattr(settings, "order_events_poll_seconds", 0.05)
+        started = time.perf_counter()
+
+        response = client.get("/orders/changes", params={"since": 5, "wait": 0.3})
+
+        assert response.json() == {"events": [], "next": 5}
+        assert 0.3 <= time.perf_counter() - started < 2
+
+    def test_wait_woken_by_commit(self, client, sample_order_data):
+        """Test a waiting request returns as soon as this process commits an order"""
+        result = {}
+
+        def wait():
+            started = time.perf_counter()
+            result["body"] = client.get("/orders/changes", params={"wait": 30}).json()
+            result["elapsed"] = time.perf_counter() - started
+
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        time.sleep(0.3)
+        client.post("/orders/", json=sample_order_data)
+        waiter.join(timeout=10)
+
+        assert [event["order_id"] for event in result["body"]["events"]] == ["ORD-2025-001"]
+        assert result["elapsed"] < 10
+
+    def test_server_sent_events(self, client, create_orders, async_session_factory):
+        """Test the stream sends existing events, then new ones as they are committed"""
+        create_orders(2)
+
+        async def read():
+            async with async_session_factory() as db:
+                stream = events.stream(db, 0)
+                first = await anext(stream)
+                later = asyncio.ensure_future(anext(stream))
+                await asyncio.sleep(0.1)
+                assert not later.done()
+                order = models.Order(id=99, **NEW_ORDER)
+                await events.record(db, schemas.OrderEventType.CREATED, [order])
+                await db.commit()
+                events.notifier.notify()
+                second = await asyncio.wait_for(later, 5)
+                await stream.aclose()
+                return first, second
+
+        first, second = asyncio.run(read())
+
+        messages = first.decode().strip().split("\n\n")
+        assert len(messages) == 2
+        lines = messages[0].split("\n")
+        assert lines[0] == "id: 1"
+        assert lines[1] == "event: created"
+        assert json.loads(lines[2].removeprefix("data: "))["order"]["order_id"] == "ORD-0"
+        assert second.startswith(b"id: 3\nevent: created\n")
+
+
+class TestRelay:
+    """Tests for publishing the outbox to a sink"""
+
+    def test_publishes_in_order_once(self, create_orders, db_session, async_session_factory):
+        """Test events reach the sink in seq order and are then marked published"""
+        create_orders(3)
+        sink = events.MemorySink()
+        relay = events.OutboxRelay(sink, async_session_factory, batch_size=2)
+
+        async def drain():
+            counts = [await relay.relay_once() for _ in range(3)]
+            return counts, [sink.queue.get_nowait() for _ in range(sink.queue.qsize())]
+
+        counts, published = asyncio.run(drain())
+
+        assert counts == [2, 1, 0]
+        assert [event["order_id"] for event in published] == ["ORD-0", "ORD-1", "ORD-2"]
+        assert all(event.published_at is not None for event in stored_events(db_session))
+
+    def test_failed_publish_retried(self, create_orders, db_session, async_session_factory):
+        """Test events stay unpublished when the sink fails"""
+        create_orders(1)
+
+        class BrokenSink:
+            async def publish(self, events):
+                raise ConnectionError("sink down")
+
+        relay = events.OutboxRelay(BrokenSink(), async_session_factory)
+        with pytest.raises(ConnectionError):
+            asyncio.run(relay.relay_once())
+
+        assert stored_events(db_session)[0].published_at is None
+
+    def test_redis_stream_sink(self, create_orders, async_session_factory):
+        """Test the Redis sink appends each event to the stream"""
+        create_orders(2)
+        client = fakeredis.FakeAsyncRedis()
+        relay = events.OutboxRelay(events.RedisStreamSink(client), async_session_factory)
+
+        async def publish():
+            await relay.relay_once()
+            return await client.xrange("order-service:order-events")
+
+        entries = asyncio.run(publish())
+
+        assert [fields[b"seq"] for _, fields in entries] == [b"1", b"2"]
+        assert json.loads(entries[0][1][b"data"])["order_id"] == "ORD-0"
+
+    def test_unknown_sink(self, monkeypatch):
+        """Test a misspelled ORDER_EVENTS_SINK fails loudly"""
+        monkeypatch.setattr(settings, "order_events_sink", "kafka")
+
+        with pytest.raises(ValueError, match="kafka"):
+            events.create_sink()
+
+
+class TestPurge:
+    """Tests for deleting old events"""
+
+    def test_keeps_unpublished(self, create_orders, db_session):
+        """Test only old published events are deleted unless asked otherwise"""
+        create_orders(3)
+        old = datetime.now(timezone.utc) - timedelta(days=10)
+        stored = stored_events(db_session)
+        for event in stored:
+            event.occurred_at = old
+        stored[0].published_at = old
+        db_session.commit()
+
+        assert events.purge(db_session, timedelta(days=7)) == 1
+        assert events.purge(db_session, timedelta(days=7), keep_unpublished=False) == 2
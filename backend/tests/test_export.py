@@ -0,0 +1,107 @@
+"""
+Tests for GET /orders/export
+"""
+
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from app.config import settings
+
+
+@pytest.fixture
+def seed_orders(client, sample_order_data):
+    """Create five orders on consecutive days, alternating status"""
+    for i in range(5):
+        order_data = {
+            **sample_order_data,
+            "order_id": f"ORD-EXP-{i}",
+            "customer_id": "CUST-A" if i < 3 else "CUST-B",
+            "status": "pending" if i % 2 else "shipped",
+            "order_date": f"2025-03-0{i + 1}T10:00:00Z",
+        }
+        assert client.post("/orders/", json=order_data).status_code == 201
+
+
+class TestExport:
+    """Tests for streaming NDJSON and CSV exports"""
+
+    def test_ndjson(self, client, seed_orders):
+        """Test every order is exported as one JSON object per line, oldest first"""
+        response = client.get("/orders/export")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["order_id"] for row in rows] == [f"ORD-EXP-{i}" for i in range(5)]
+        assert set(rows[0]) == {
+            "id",
+            "order_id",
+            "customer_id",
+            "total_amount",
+            "currency",
+            "status",
+            "order_date",
+            "created_at",
+            "updated_at",
+        }
+
+    def test_csv(self, client, seed_orders):
+        """Test CSV export has a header row and one row per order"""
+        response = client.get("/orders/export", params={"format": "csv"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="orders.csv"' in response.headers["content-disposition"]
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 5
+        assert rows[0]["order_id"] == "ORD-EXP-0"
+        assert rows[0]["total_amount"] == "25990"
+
+    def test_csv_empty(self, client):
+        """Test an empty CSV export still has its header"""
+        response = client.get("/orders/export", params={"format": "csv"})
+
+        assert response.text.splitlines() == [
+            "order_id,customer_id,total_amount,currency,status,order_date,id,created_at,updated_at"
+        ]
+
+    def test_filters_and_date_range(self, client, seed_orders):
+        """Test status, customer and from/to filters are applied"""
+        response = client.get(
+            "/orders/export",
+            params={
+                "customer_id": "CUST-A",
+                "status": "shipped",
+                "from": "2025-03-01T12:00:00Z",
+                "to": "2025-03-04T00:00:00Z",
+            },
+        )
+
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["order_id"] for row in rows] == ["ORD-EXP-2"]
+
+    def test_batches(self, client, seed_orders, monkeypatch):
+        """Test exports spanning several cursor batches are complete"""
+        monkeypatch.setattr(settings, "export_batch_size", 2)
+
+        response = client.get("/orders/export")
+
+        assert len(response.text.splitlines()) == 5
+
+    def test_gzip(self, client, seed_orders):
+        """Test gzip=true compresses the body with Content-Encoding: gzip"""
+        with client.stream("GET", "/orders/export", params={"gzip": "true"}) as response:
+            raw = b"".join(response.iter_raw())
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(gzip.decompress(raw).decode().splitlines()) == 5
+
+    def test_invalid_format(self, client):
+        """Test unknown formats are rejected"""
+        response = client.get("/orders/export", params={"format": "xml"})
+
+        assert response.status_code == 422
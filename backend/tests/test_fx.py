@@ -0,0 +1,169 @@
+"""
+Tests for FX rates and normalized summary totals
+"""
+
+import pytest
+
+from app import fx
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_cache():
+    """Each test has its own database, so never reuse cached rates"""
+    fx.invalidate()
+    yield
+    fx.invalidate()
+
+
+@pytest.fixture
+def set_rate(client):
+    """Helper fixture to store an FX rate"""
+
+    def _set_rate(currency, effective_date, rate):
+        response = client.put(
+            "/fx-rates",
+            json={"currency": currency, "effective_date": effective_date, "rate": rate},
+        )
+        assert response.status_code == 200
+        return response
+
+    return _set_rate
+
+
+@pytest.fixture
+def create_order(client, sample_order_data):
+    """Helper fixture to create an order on a given day"""
+
+    def _create_order(order_id, currency, amount, day):
+        order_data = {
+            **sample_order_data,
+            "order_id": order_id,
+            "currency": currency,
+            "total_amount": amount,
+            "order_date": f"{day}T12:00:00Z",
+        }
+        assert client.post("/orders/", json=order_data).status_code == 201
+
+    return _create_order
+
+
+class TestFxRates:
+    """Tests for GET and PUT /fx-rates"""
+
+    def test_put_and_read_rate(self, client, set_rate):
+        """Test a stored rate is returned as the rate in effect"""
+        set_rate("usd", "2025-01-01", "138.5")
+
+        response = client.get("/fx-rates", params={"on": "2025-06-01"})
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {"currency": "USD", "effective_date": "2025-01-01", "rate": "138.50000000"}
+        ]
+
+    def test_rate_in_effect_on_day(self, client, set_rate):
+        """Test the latest rate on or before the requested day is returned"""
+        set_rate("EUR", "2025-01-01", "150")
+        set_rate("EUR", "2025-03-01", "155")
+
+        february = client.get("/fx-rates", params={"on": "2025-02-15"}).json()
+        march = client.get("/fx-rates", params={"on": "2025-03-01"}).json()
+
+        assert float(february[0]["rate"]) == 150
+        assert float(march[0]["rate"]) == 155
+
+    def test_put_invalidates_cache(self, client, set_rate):
+        """Test an update is visible immediately despite the cached table"""
+        set_rate("GBP", "2025-01-01", "170")
+        client.get("/fx-rates", params={"on": "2025-06-01"})
+        set_rate("GBP", "2025-01-01", "175")
+
+        rates = client.get("/fx-rates", params={"on": "2025-06-01"}).json()
+
+        assert float(rates[0]["rate"]) == 175
+
+    def test_invalid_rate(self, client):
+        """Test non-positive rates and unknown currencies are rejected"""
+        zero = client.put(
+            "/fx-rates", json={"currency": "USD", "effective_date": "2025-01-01", "rate": "0"}
+        )
+        unknown = client.put(
+            "/fx-rates", json={"currency": "XYZ", "effective_date": "2025-01-01", "rate": "1"}
+        )
+
+        assert zero.status_code == 422
+        assert unknown.status_code == 422
+
+
+class TestNormalizedSummary:
+    """Tests for GET /orders/summary?normalize_to="""
+
+    def test_not_requested(self, client):
+        """Test normalized is null unless normalize_to is given"""
+        response = client.get("/orders/summary")
+
+        assert response.json()["normalized"] is None
+
+    def test_converts_at_daily_rate(self, client, set_rate, create_order):
+        """Test each day is converted at the rate in effect on that day"""
+        set_rate("ISK", "2025-01-01", "1")
+        set_rate("USD", "2025-01-01", "140")
+        set_rate("USD", "2025-02-01", "130")
+        create_order("ORD-ISK", "ISK", 10000, "2025-01-10")
+        create_order("ORD-USD-JAN", "USD", 1000, "2025-01-10")
+        create_order("ORD-USD-FEB", "USD", 1000, "2025-02-10")
+
+        response = client.get("/orders/summary", params={"normalize_to": "isk"})
+
+        assert response.status_code == 200
+        normalized = response.json()["normalized"]
+        # USD amounts are cents: $10 is 1400 ISK in January and 1300 in February
+        assert normalized["currency"] == "ISK"
+        assert normalized["total"] == 10000 + 1400 + 1300
+        assert normalized["total_by_currency"] == [
+            {"currency": "ISK", "total": 10000},
+            {"currency": "USD", "total": 2700},
+        ]
+        assert normalized["revenue_per_day"] == [
+            {"date": "2025-02-10", "revenue": 1300},
+            {"date": "2025-01-10", "revenue": 11400},
+        ]
+
+    def test_cross_rate(self, client, set_rate, create_order):
+        """Test conversion between two non-base currencies goes through the base"""
+        set_rate("USD", "2025-01-01", "140")
+        set_rate("EUR", "2025-01-01", "150")
+        create_order("ORD-EUR", "EUR", 14000, "2025-01-10")
+
+        response = client.get("/orders/summary", params={"normalize_to": "USD"})
+
+        assert response.json()["normalized"]["total"] == 15000
+
+    def test_zero_decimal_target(self, client, set_rate, create_order):
+        """Test amounts are rescaled between currencies with different minor units"""
+        set_rate("USD", "2025-01-01", "150")
+        set_rate("JPY", "2025-01-01", "1")
+        create_order("ORD-USD", "USD", 1050, "2025-01-10")
+
+        response = client.get("/orders/summary", params={"normalize_to": "JPY"})
+
+        assert response.json()["normalized"]["total"] == 1575
+
+    def test_missing_rate(self, client, set_rate, create_order):
+        """Test orders dated before any rate for their currency are reported"""
+        set_rate("ISK", "2025-01-01", "1")
+        set_rate("USD", "2025-06-01", "140")
+        create_order("ORD-USD", "USD", 1000, "2025-01-10")
+
+        response = client.get("/orders/summary", params={"normalize_to": "ISK"})
+
+        assert response.status_code == 422
+        assert "USD" in response.json()["detail"]
+
+    def test_unknown_target(self, client):
+        """Test an unsupported or rate-less target currency is rejected"""
+        unsupported = client.get("/orders/summary", params={"normalize_to": "XYZ"})
+        no_rate = client.get("/orders/summary", params={"normalize_to": "CHF"})
+
+        assert unsupported.status_code == 422
+        assert no_rate.status_code == 422
@@ -0,0 +1,151 @@
+"""
+Tests for idempotent order creation with the Idempotency-Key header
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app import idempotency, models
+
+
+class TestCreateOrderConflicts:
+    """Tests for duplicate order_ids without an Idempotency-Key"""
+
+    def test_concurrent_duplicates(self, client, sample_order_data):
+        """Test concurrent creates of one order_id give one 201 and 400s, never a 500"""
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(
+                pool.map(lambda _: client.post("/orders/", json=sample_order_data), range(4))
+            )
+
+        assert sorted(response.status_code for response in responses) == [201, 400, 400, 400]
+        assert len(client.get("/orders/").json()) == 1
+        assert client.get("/orders/summary").json()["total_orders"] == 1
+
+    def test_other_violations_not_reported_as_duplicates(
+        self, client, db_session, sample_order_data
+    ):
+        """Test a constraint failure on a new order_id is raised, not turned into a 400"""
+        db_session.execute(
+            text(
+                "CREATE TRIGGER reject_order BEFORE INSERT ON orders "
+                "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+            )
+        )
+        db_session.commit()
+
+        with pytest.raises(IntegrityError, match="rejected"):
+            client.post("/orders/", json=sample_order_data)
+
+
+class TestIdempotencyKey:
+    """Tests for POST /orders/ with an Idempotency-Key header"""
+
+    def test_retry_replays_response(self, client, sample_order_data):
+        """Test a retry gets the original response back"""
+        headers = {"Idempotency-Key": "retry-1"}
+        first = client.post("/orders/", json=sample_order_data, headers=headers)
+        retry = client.post("/orders/", json=sample_order_data, headers=headers)
+
+        assert first.status_code == 201
+        assert retry.status_code == 201
+        assert retry.json() == first.json()
+        assert retry.headers["ETag"] == first.headers["ETag"]
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+
+    def test_replay_survives_later_changes(self, client, sample_order_data):
+        """Test the replay is the original response, not the current order"""
+        headers = {"Idempotency-Key": "retry-2"}
+        first = client.post("/orders/", json=sample_order_data, headers=headers)
+        client.put(f"/orders/{first.json()['id']}", json={"status": "shipped"})
+
+        retry = client.post("/orders/", json=sample_order_data, headers=headers)
+
+        assert retry.json()["status"] == "pending"
+
+    def test_different_body_rejected(self, client, sample_order_data):
+        """Test a key cannot be reused for a different request"""
+        headers = {"Idempotency-Key": "retry-3"}
+        client.post("/orders/", json=sample_order_data, headers=headers)
+        changed = {**sample_order_data, "total_amount": 1}
+
+        response = client.post("/orders/", json=changed, headers=headers)
+
+        assert response.status_code == 422
+        assert "different request" in response.json()["detail"]
+
+    def test_same_body_is_same_request(self, client, sample_order_data):
+        """Test whitespace and key order do not change the fingerprint"""
+        headers = {"Idempotency-Key": "retry-4"}
+        client.post("/orders/", json=sample_order_data, headers=headers)
+        reordered = dict(reversed(list(sample_order_data.items())))
+        reordered["order_id"] = f"  {reordered['order_id']} "
+
+        response = client.post("/orders/", json=reordered, headers=headers)
+
+        assert response.status_code == 201
+
+    def test_duplicate_order_id_with_new_key(self, client, sample_order_data):
+        """Test a new key does not bypass the order_id check"""
+        client.post("/orders/", json=sample_order_data, headers={"Idempotency-Key": "a"})
+
+        response = client.post("/orders/", json=sample_order_data, headers={"Idempotency-Key": "b"})
+
+        assert response.status_code == 400
+
+    def test_concurrent_retries(self, client, sample_order_data):
+        """Test concurrent retries create one order and all get its response"""
+        headers = {"Idempotency-Key": "burst"}
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(
+                pool.map(
+                    lambda _: client.post("/orders/", json=sample_order_data, headers=headers),
+                    range(4),
+                )
+            )
+
+        assert [response.status_code for response in responses] == [201] * 4
+        assert len({response.json()["id"] for response in responses}) == 1
+        assert len(client.get("/orders/").json()) == 1
+
+    def test_key_gone_after_lost_race(self, client, monkeypatch, sample_order_data):
+        """Test a request that lost the key but cannot find it again gets 409, not a 500"""
+
+        async def lost_race(*args):
+            return False
+
+        monkeypatch.setattr(idempotency, "store", lost_race)
+
+        response = client.post("/orders/", json=sample_order_data, headers={"Idempotency-Key": "a"})
+
+        assert response.status_code == 409
+        assert client.get("/orders/").json() == []
+
+
+class TestPurge:
+    """Tests for deleting old idempotency keys"""
+
+    def test_purge_older_keys(self, db_session):
+        """Test only keys past the retention period are deleted"""
+        now = datetime.now(timezone.utc)
+        for key, age in (("old", 48), ("new", 1)):
+            db_session.add(
+                models.IdempotencyKey(
+                    client="c",
+                    key=key,
+                    fingerprint="f",
+                    status_code=201,
+                    response_body="{}",
+                    created_at=now - timedelta(hours=age),
+                )
+            )
+        db_session.commit()
+
+        assert idempotency.purge(db_session, timedelta(hours=24)) == 1
+        db_session.commit()
+        assert [row.key for row in db_session.query(models.IdempotencyKey)] == ["new"]
@@ -0,0 +1,134 @@
+"""
+Tests for request timing and SQL query instrumentation
+"""
+
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import instrumentation
+from app.config import settings
+
+
+def timings(response) -> dict[str, str]:
+    """Server-Timing entries of a response as name -> parameters"""
+    entries = (
+        entry.strip().split(";", 1) for entry in response.headers["Server-Timing"].split(",")
+    )
+    return {name: params for name, params in entries}
+
+
+@pytest.fixture
+def instrumented(monkeypatch):
+    monkeypatch.setattr(settings, "instrumentation_enabled", True)
+
+
+class TestServerTiming:
+    """Tests for the Server-Timing header"""
+
+    def test_disabled_by_default(self, client):
+        """Test no header is added unless instrumentation is enabled"""
+        response = client.get("/orders/")
+
+        assert response.status_code == 200
+        assert "Server-Timing" not in response.headers
+
+    def test_phases_and_query_count(self, client, instrumented, create_sample_order):
+        """Test every phase is reported and the order lookup counts its queries"""
+        create_sample_order()
+
+        response = client.get("/orders/ORD-2025-001")
+        entries = timings(response)
+
+        assert list(entries) == ["deps", "handler", "serialize", "db", "total"]
+        assert entries["db"].endswith('desc="1 queries"')
+        assert all(params.startswith("dur=") for params in entries.values())
+
+    def test_rejected_request(self, client, instrumented):
+        """Test requests that never reach the endpoint still get db and total"""
+        response = client.get("/orders/summary", params={"normalize_to": "X"})
+
+        assert response.status_code == 422
+        assert list(timings(response)) == ["db", "total"]
+
+
+class TestRequestMetrics:
+    """Tests for the per-route histograms"""
+
+    def test_observed_per_route_template(self, client, instrumented, create_sample_order):
+        """Test requests are labelled by route template, not by path"""
+        create_sample_order()
+        route = "/orders/{order_id}"
+        before = instrumentation.REQUEST_QUERIES.count(route=route)
+
+        client.get("/orders/ORD-2025-001")
+        client.get("/orders/MISSING")
+
+        assert instrumentation.REQUEST_QUERIES.count(route=route) == before + 2
+        assert instrumentation.REQUEST_SECONDS.count(method="GET", route=route) >= 2
+        assert 'http_request_db_queries_bucket{route="/orders/{order_id}",le="1"}' in (
+            client.get("/metrics").text
+        )
+
+
+class TestSlowQueryLog:
+    """Tests for the slow query log"""
+
+    @pytest.fixture
+    def sqlite_engine(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)"))
+        yield engine
+        engine.dispose()
+
+    def test_logs_plan_above_threshold(self, monkeypatch, caplog, sqlite_engine):
+        """Test slow statements are logged with their parameters and plan"""
+        monkeypatch.setattr(settings, "slow_query_ms", 0.000001)
+        before = instrumentation.SLOW_QUERIES.value()
+
+        with (
+            caplog.at_level(logging.WARNING, logger="app.instrumentation"),
+            sqlite_engine.connect() as connection,
+        ):
+            connection.execute(text("SELECT * FROM t WHERE name = :name"), {"name": "x"})
+
+        assert instrumentation.SLOW_QUERIES.value() == before + 1
+        assert "SELECT * FROM t WHERE name = ?" in caplog.text
+        assert "('x',)" in caplog.text
+        assert "SCAN t" in caplog.text
+
+    def test_without_explain(self, monkeypatch, caplog, sqlite_engine):
+        """Test the plan is left out when SLOW_QUERY_EXPLAIN is off"""
+        monkeypatch.setattr(settings, "slow_query_ms", 0.000001)
+        monkeypatch.setattr(settings, "slow_query_explain", False)
+
+        with (
+            caplog.at_level(logging.WARNING, logger="app.instrumentation"),
+            sqlite_engine.connect() as connection,
+        ):
+            connection.execute(text("SELECT * FROM t"))
+
+        assert "Slow query" in caplog.text
+        assert "Plan:" not in caplog.text
+
+    def test_off_by_default(self, caplog, sqlite_engine):
+        """Test nothing is logged or timed with the default settings"""
+        with (
+            caplog.at_level(logging.WARNING, logger="app.instrumentation"),
+            sqlite_engine.connect() as connection,
+        ):
+            connection.execute(text("SELECT * FROM t"))
+            assert not connection.info.get("instrumentation_started")
+
+        assert caplog.text == ""
+
+    def test_failed_statement_does_not_leak_start(self, monkeypatch, sqlite_engine):
+        """Test a statement that raises leaves no start time behind"""
+        monkeypatch.setattr(settings, "slow_query_ms", 1000)
+
+        with sqlite_engine.connect() as connection:
+            with pytest.raises(Exception, match="no such table"):
+                connection.execute(text("SELECT * FROM missing"))
+            assert connection.info["instrumentation_started"] == []
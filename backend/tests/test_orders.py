@@ -2,8 +2,12 @@
 Tests for order CRUD operations
 """
 
+from datetime import datetime, timedelta, timezone
+
 import pytest
-from datetime import datetime
+from pydantic import TypeAdapter
+
+from app import responses, schemas
 
 
 class TestCreateOrder:
@@ -71,6 +75,53 @@ class TestReadOrders:
         assert response.status_code == 200
         assert len(response.json()) == 2
 
+    def test_read_orders_date_range(self, client, sample_order_data):
+        """Test from is inclusive and to exclusive on order_date"""
+        for i, day in enumerate(["2025-01-31", "2025-02-01", "2025-02-15", "2025-03-01"]):
+            client.post(
+                "/orders/",
+                json={
+                    **sample_order_data,
+                    "order_id": f"ORD-{i}",
+                    "order_date": f"{day}T00:00:00Z",
+                },
+            )
+
+        response = client.get(
+            "/orders/", params={"from": "2025-02-01T00:00:00Z", "to": "2025-03-01T00:00:00Z"}
+        )
+
+        assert response.status_code == 200
+        assert [order["order_id"] for order in response.json()] == ["ORD-2", "ORD-1"]
+
+    def test_read_orders_matches_order_response(self, client, sample_order_data):
+        """Test the unvalidated list body equals OrderResponse serialization"""
+        for i, currency in enumerate(["ISK", "EUR"]):
+            client.post(
+                "/orders/",
+                json={**sample_order_data, "order_id": f"ORD-{i}", "currency": currency},
+            )
+        single = [client.get(f"/orders/ORD-{i}").json() for i in (1, 0)]
+
+        response = client.get("/orders/")
+
+        assert response.headers["content-type"] == "application/json"
+        assert "ETag" in response.headers
+        assert response.json() == single
+        assert list(response.json()[0]) == list(schemas.OrderResponse.model_fields)
+
+    def test_orjson_datetimes_match_pydantic(self):
+        """Test orjson writes datetimes exactly as pydantic does"""
+        adapter = TypeAdapter(datetime)
+        values = [
+            datetime(2025, 1, 1, 12, 30),
+            datetime(2025, 1, 1, 12, 30, 0, 1500, tzinfo=timezone.utc),
+            datetime(2025, 1, 1, 12, 30, tzinfo=timezone(timedelta(hours=-5))),
+        ]
+
+        for value in values:
+            assert responses.ORJSONResponse([value]).body == b"[" + adapter.dump_json(value) + b"]"
+
 
 class TestReadOrder:
     """Tests for GET /orders/{order_id}"""
@@ -137,3 +188,85 @@ class TestDeleteOrder:
 
         assert response.status_code == 404
         assert response.json()["detail"] == "Order not found"
+
+
+class TestCursorPagination:
+    """Tests for keyset pagination of GET /orders/"""
+
+    def create_orders(self, client, sample_order_data, count, **overrides):
+        for i in range(count):
+            order_data = sample_order_data.copy()
+            order_data["order_id"] = f"ORD-PAGE-{i:03d}"
+            # Two orders per day so the id tie-breaker is exercised
+            order_data["order_date"] = f"2025-03-{i // 2 + 1:02d}T12:00:00Z"
+            order_data.update(overrides)
+            client.post("/orders/", json=order_data)
+
+    def test_orders_newest_first(self, client, sample_order_data):
+        """Test listings are ordered by order_date then id, newest first"""
+        self.create_orders(client, sample_order_data, 4)
+
+        response = client.get("/orders/")
+
+        order_ids = [order["order_id"] for order in response.json()]
+        assert order_ids == ["ORD-PAGE-003", "ORD-PAGE-002", "ORD-PAGE-001", "ORD-PAGE-000"]
+
+    def test_walk_all_pages(self, client, sample_order_data):
+        """Test following X-Next-Cursor visits every order exactly once"""
+        self.create_orders(client, sample_order_data, 7)
+
+        seen = []
+        response = client.get("/orders/?limit=3")
+        while True:
+            seen.extend(order["order_id"] for order in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            response = client.get(f"/orders/?limit=3&cursor={cursor}")
+
+        assert seen == [f"ORD-PAGE-{i:03d}" for i in reversed(range(7))]
+
+    def test_cursor_stable_under_inserts(self, client, sample_order_data):
+        """Test newer orders inserted between pages do not shift later pages"""
+        self.create_orders(client, sample_order_data, 4)
+        first = client.get("/orders/?limit=2")
+
+        new_order = {
+            **sample_order_data,
+            "order_id": "ORD-NEWER",
+            "order_date": "2025-04-01T00:00:00Z",
+        }
+        client.post("/orders/", json=new_order)
+
+        cursor = first.headers["X-Next-Cursor"]
+        second = client.get(f"/orders/?limit=2&cursor={cursor}")
+        assert [order["order_id"] for order in second.json()] == ["ORD-PAGE-001", "ORD-PAGE-000"]
+
+    def test_cursor_with_filters(self, client, sample_order_data):
+        """Test cursors combine with the status filter"""
+        self.create_orders(client, sample_order_data, 4, status="shipped")
+        client.post("/orders/", json={**sample_order_data, "order_id": "ORD-PENDING"})
+
+        first = client.get("/orders/?limit=3&status=shipped")
+        cursor = first.headers["X-Next-Cursor"]
+        second = client.get(f"/orders/?limit=3&status=shipped&cursor={cursor}")
+
+        assert len(first.json()) == 3
+        assert [order["order_id"] for order in second.json()] == ["ORD-PAGE-000"]
+        assert "X-Next-Cursor" not in second.headers
+
+    def test_invalid_cursor(self, client):
+        """Test a malformed cursor is rejected"""
+        response = client.get("/orders/?cursor=not-a-cursor")
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+    def test_cursor_and_skip_rejected(self, client, sample_order_data):
+        """Test skip and cursor cannot be combined"""
+        self.create_orders(client, sample_order_data, 2)
+        cursor = client.get("/orders/?limit=1").headers["X-Next-Cursor"]
+
+        response = client.get(f"/orders/?skip=1&cursor={cursor}")
+
+        assert response.status_code == 400
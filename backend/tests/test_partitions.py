@@ -0,0 +1,58 @@
+"""
+Tests for the monthly orders partition helpers
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app import partitions
+from app.cli import main
+
+
+class TestMonths:
+    """Tests for partition months, names and bounds"""
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            (date(2025, 3, 17), date(2025, 3, 1)),
+            (datetime(2025, 3, 31, 23, 0, tzinfo=timezone.utc), date(2025, 3, 1)),
+            # 00:30 on April 1st at UTC+1 is still March in UTC
+            (datetime(2025, 4, 1, 0, 30, tzinfo=timezone(timedelta(hours=1))), date(2025, 3, 1)),
+        ],
+    )
+    def test_month_start_in_utc(self, value, expected):
+        """Test values are bucketed by their UTC month"""
+        assert partitions.month_start(value) == expected
+
+    def test_add_months_across_years(self):
+        """Test month arithmetic wraps around year ends in both directions"""
+        assert partitions.add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+        assert partitions.add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+        assert partitions.add_months(date(2025, 1, 1), -24) == date(2023, 1, 1)
+
+    def test_name_and_bounds(self):
+        """Test a partition covers exactly one UTC month"""
+        month = date(2025, 12, 1)
+
+        assert partitions.partition_name(month) == "orders_p2025_12"
+        assert partitions.partition_bounds(month) == (
+            "2025-12-01 00:00:00+00",
+            "2026-01-01 00:00:00+00",
+        )
+
+
+class TestSqliteFallback:
+    """Tests that SQLite keeps the plain table"""
+
+    def test_helpers_do_nothing(self, db_session):
+        """Test maintenance is a no-op on SQLite"""
+        assert not partitions.is_partitioned(db_session)
+        assert partitions.ensure_partitions(db_session, ahead=3) == []
+        assert partitions.detach_partitions(db_session, retain_months=12) == []
+
+    def test_cli(self, capsys):
+        """Test the partitions command reports there is nothing to do"""
+        assert main(["partitions"]) == 0
+        assert "not partitioned" in capsys.readouterr().out
@@ -0,0 +1,238 @@
+"""
+Tests for per-key rate limiting and load shedding
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fakeredis
+import pytest
+
+from app import auth, loadshed, ratelimit
+from app.config import settings
+from app.database import get_async_db
+from app.main import app
+
+
+@pytest.fixture
+def clock():
+    now = [1000.0]
+    return now
+
+
+@pytest.fixture
+def limiter(monkeypatch, clock):
+    """Real key verification with a small limit and a fake clock"""
+    monkeypatch.setattr(settings, "rate_limit_per_second", 1.0)
+    monkeypatch.setattr(settings, "rate_limit_burst", 3)
+    monkeypatch.setattr(settings, "rate_limit_routes", {})
+    backend = ratelimit.MemoryBucketBackend(clock=lambda: clock[0])
+    monkeypatch.setattr(ratelimit, "limiter", ratelimit.RateLimiter(backend))
+    auth.key_cache.clear()
+    return backend
+
+
+@pytest.fixture
+def limited_client(client, limiter):
+    app.dependency_overrides.pop(auth.verify_api_key)
+    yield client
+    auth.usage = auth.UsageCounter()
+    auth.key_cache.clear()
+
+
+@pytest.fixture
+def shedder(monkeypatch, clock):
+    shedder = loadshed.LoadShedder(clock=lambda: clock[0])
+    monkeypatch.setattr(loadshed, "shedder", shedder)
+    monkeypatch.setattr(settings, "load_shed_max_in_flight", 4)
+    monkeypatch.setattr(settings, "load_shed_pool_wait_ms", 500.0)
+    return shedder
+
+
+@pytest.fixture
+def checkouts(limited_client):
+    """Count the request sessions handed to endpoints"""
+    sessions = []
+    original = app.dependency_overrides[get_async_db]
+
+    async def counting_get_async_db():
+        sessions.append(1)
+        async for db in original():
+            yield db
+
+    app.dependency_overrides[get_async_db] = counting_get_async_db
+    return sessions
+
+
+def burst(client, path, count, key=None):
+    headers = {"X-API-Key": key or settings.api_key}
+    return [client.get(path, headers=headers) for _ in range(count)]
+
+
+class TestRateLimit:
+    """Tests for token buckets per API key and route"""
+
+    def test_burst_then_429(self, limited_client):
+        """Test requests beyond the burst get 429 with Retry-After"""
+        responses = burst(limited_client, "/orders/", 5)
+
+        assert [r.status_code for r in responses] == [200, 200, 200, 429, 429]
+        assert responses[3].headers["Retry-After"] == "1"
+        assert responses[3].json()["detail"] == "Rate limit exceeded"
+
+    def test_rejected_requests_take_no_connection(self, limited_client, checkouts):
+        """Test 429s and 403s are answered before a request session is checked out"""
+        statuses = [r.status_code for r in burst(limited_client, "/orders/", 5)]
+        statuses += [r.status_code for r in burst(limited_client, "/orders/", 2, "osk_bad")]
+
+        assert statuses == [200, 200, 200, 429, 429, 403, 403]
+        assert len(checkouts) == 3
+
+    def test_refill(self, limited_client, clock):
+        """Test the bucket refills at the configured rate"""
+        burst(limited_client, "/orders/", 4)
+
+        clock[0] += 1
+        assert [r.status_code for r in burst(limited_client, "/orders/", 2)] == [200, 429]
+        clock[0] += 10
+        assert [r.status_code for r in burst(limited_client, "/orders/", 4)] == [200] * 3 + [429]
+
+    def test_buckets_per_key_and_route(self, limited_client, create_key):
+        """Test keys and routes do not share a bucket"""
+        burst(limited_client, "/orders/", 4)
+
+        assert burst(limited_client, "/orders/summary", 1)[0].status_code == 200
+        other_key = create_key()
+        assert burst(limited_client, "/orders/", 1, key=other_key)[0].status_code == 200
+
+    def test_route_override(self, limited_client, monkeypatch):
+        """Test RATE_LIMIT_ROUTES replaces the default for one route template"""
+        monkeypatch.setattr(
+            settings,
+            "rate_limit_routes",
+            {"GET /orders/{order_id}": (1.0, 1), "GET /orders/": (0, 0)},
+        )
+
+        assert all(r.status_code == 200 for r in burst(limited_client, "/orders/", 10))
+        statuses = [r.status_code for r in burst(limited_client, "/orders/A-1", 2)]
+        assert statuses == [404, 429]
+
+    def test_unauthenticated_not_counted(self, limited_client):
+        """Test rejected keys do not use up the bucket of a valid one"""
+        burst(limited_client, "/orders/", 5, key="osk_unknown")
+
+        assert burst(limited_client, "/orders/", 1)[0].status_code == 200
+
+    def test_memory_backend_sweeps_full_buckets(self, clock, monkeypatch):
+        """Test buckets that refilled completely are dropped once the table is large"""
+        monkeypatch.setattr(ratelimit.MemoryBucketBackend, "SWEEP_SIZE", 3)
+        backend = ratelimit.MemoryBucketBackend(clock=lambda: clock[0])
+
+        async def fill():
+            for key in ("a", "b", "c"):
+                await backend.take(key, 1.0, 2)
+            clock[0] += 5
+            await backend.take("d", 1.0, 2)
+
+        asyncio.run(fill())
+        assert set(backend._buckets) == {"d"}
+
+
+class TestRedisBackend:
+    """Tests for buckets shared through Redis"""
+
+    def test_burst_then_wait(self):
+        """Test the shared bucket allows the burst, then reports the wait"""
+        backend = ratelimit.RedisBucketBackend(fakeredis.FakeAsyncRedis())
+
+        async def take(count):
+            return [await backend.take("key:GET /orders/", 0.5, 2) for _ in range(count)]
+
+        waits = asyncio.run(take(3))
+
+        assert waits[:2] == [0.0, 0.0]
+        assert 1.9 < waits[2] <= 2.0
+
+    def test_workers_share_bucket(self):
+        """Test two backends on one server draw from the same bucket"""
+        server = fakeredis.FakeServer()
+        first = ratelimit.RedisBucketBackend(fakeredis.FakeAsyncRedis(server=server))
+        second = ratelimit.RedisBucketBackend(fakeredis.FakeAsyncRedis(server=server))
+
+        async def take():
+            results = await asyncio.gather(
+                *(backend.take("key", 0.001, 4) for backend in (first, second) * 3)
+            )
+            return [wait == 0 for wait in results]
+
+        assert sum(asyncio.run(take())) == 4
+
+
+class TestLoadShedding:
+    """Tests for the 503 load shedding middleware"""
+
+    def test_sheds_when_in_flight_full(self, client, shedder):
+        """Test new requests get 503 once too many are in flight"""
+        shedder.in_flight = 4
+
+        response = client.get("/orders/")
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(settings.load_shed_retry_after_seconds)
+        assert response.json() == {"detail": "Service overloaded, retry later"}
+        shedder.in_flight = 3
+        assert client.get("/orders/").status_code == 200
+        assert shedder.in_flight == 3
+
+    def test_change_streams_not_counted(self, client, shedder, monkeypatch, sample_order_data):
+        """Test waiting /orders/changes requests up to the limit leave room for others"""
+        monkeypatch.setattr(settings, "order_events_poll_seconds", 30)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            waiting = [
+                pool.submit(client.get, "/orders/changes", params={"wait": 30}) for _ in range(4)
+            ]
+            time.sleep(0.3)
+
+            response = client.get("/orders/")
+            # Wakes the waiting requests
+            created = client.post("/orders/", json=sample_order_data)
+            changes = [future.result(timeout=10) for future in waiting]
+
+        assert response.status_code == 200
+        assert created.status_code == 201
+        assert [change.status_code for change in changes] == [200] * 4
+        assert shedder.in_flight == 0
+
+    def test_sheds_on_pool_wait(self, client, shedder, clock):
+        """Test long pool waits shed requests until the average decays"""
+        for _ in range(5):
+            shedder.observe_pool_wait(2.0)
+
+        assert client.get("/orders/").status_code == 503
+        clock[0] += 10
+        assert client.get("/orders/").status_code == 200
+
+    def test_exempt_paths(self, client, shedder):
+        """Test the health check and metrics are served while shedding"""
+        shedder.in_flight = 100
+
+        assert client.get("/").status_code == 200
+        assert client.get("/metrics").status_code == 200
+
+    def test_single_slow_checkout_tolerated(self, shedder):
+        """Test one slow checkout does not trip the pool wait threshold on its own"""
+        for _ in range(20):
+            shedder.observe_pool_wait(0.001)
+        shedder.observe_pool_wait(1.0)
+
+        assert shedder.overloaded() is None
+
+    def test_disabled(self, shedder, monkeypatch):
+        """Test thresholds of 0 turn shedding off"""
+        monkeypatch.setattr(settings, "load_shed_max_in_flight", 0)
+        monkeypatch.setattr(settings, "load_shed_pool_wait_ms", 0.0)
+        shedder.in_flight = 10**6
+        shedder.observe_pool_wait(60.0)
+
+        assert shedder.overloaded() is None
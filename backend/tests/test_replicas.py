@@ -0,0 +1,193 @@
+"""
+Tests for routing reads to replicas, with SQLite files standing in for the databases
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app import database, models, replicas
+from app.cache import cache
+from app.config import settings
+from app.database import Base, get_async_db
+from app.main import app
+
+
+def session_factory(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+def seed_replica(path, order_id):
+    """A replica database holding one order the primary does not have"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        db.add(
+            models.Order(
+                order_id=order_id,
+                customer_id="CUST-1",
+                total_amount=100,
+                currency="ISK",
+                status="pending",
+            )
+        )
+        db.commit()
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def clock():
+    now = [1000.0]
+    return now
+
+
+@pytest.fixture
+def wall_clock():
+    now = [1_700_000_000.0]
+    return now
+
+
+@pytest.fixture
+def make_router(client, database_path, monkeypatch, clock, wall_clock):
+    """Install a router over the test database and the given replica files"""
+    monkeypatch.setattr(settings, "read_your_writes_seconds", 5.0)
+    monkeypatch.setattr(settings, "replica_health_check_seconds", 10.0)
+    monkeypatch.setattr(cache, "wall_clock", lambda: wall_clock[0])
+    app.dependency_overrides.pop(get_async_db)
+
+    def _make(*paths):
+        router = replicas.ReplicaRouter(
+            session_factory(database_path),
+            [replicas.Replica(f"replica{i}", session_factory(p)) for i, p in enumerate(paths)],
+            clock=lambda: clock[0],
+            wall_clock=lambda: wall_clock[0],
+        )
+        monkeypatch.setattr(database, "router", router)
+        return router
+
+    # Writes made by other fixtures go to the test database too
+    _make()
+    return _make
+
+
+def listed(client, **kwargs):
+    return [order["order_id"] for order in client.get("/orders/", **kwargs).json()]
+
+
+class TestReplicaRouting:
+    """Tests for which database a request reads from"""
+
+    def test_reads_round_robin(self, client, make_router, tmp_path):
+        """Test GET requests take the replicas in turn"""
+        make_router(
+            seed_replica(tmp_path / "r0.db", "R-0"), seed_replica(tmp_path / "r1.db", "R-1")
+        )
+
+        assert [listed(client) for _ in range(4)] == [["R-0"], ["R-1"], ["R-0"], ["R-1"]]
+        assert client.get("/orders/R-1").status_code == 404
+        assert client.get("/orders/R-1").status_code == 200
+
+    def test_no_replicas(self, client, make_router, create_sample_order):
+        """Test everything goes to the primary without replicas, and no marker is set"""
+        make_router()
+        create_sample_order()
+
+        response = client.patch("/orders/ORD-2025-001", json={"status": "shipped"})
+
+        assert replicas.PRIMARY_UNTIL_HEADER not in response.headers
+        assert listed(client) == ["ORD-2025-001"]
+
+    def test_read_your_writes_cookie(
+        self, client, make_router, tmp_path, sample_order_data, wall_clock
+    ):
+        """Test a write goes to the primary and the client's reads follow it for a while"""
+        make_router(seed_replica(tmp_path / "r0.db", "R-0"))
+
+        response = client.post("/orders/", json=sample_order_data)
+
+        assert response.status_code == 201
+        assert response.headers[replicas.PRIMARY_UNTIL_HEADER] == "1700000005"
+        assert client.cookies[replicas.PRIMARY_UNTIL_COOKIE] == "1700000005"
+        assert listed(client) == ["ORD-2025-001"]
+        wall_clock[0] += 6
+        assert listed(client) == ["R-0"]
+
+    def test_read_your_writes_header(self, client, make_router, tmp_path, sample_order_data):
+        """Test clients without cookies get the same by echoing the header"""
+        make_router(seed_replica(tmp_path / "r0.db", "R-0"))
+        until = client.post("/orders/", json=sample_order_data).headers["X-Read-Primary-Until"]
+        client.cookies.clear()
+        path = f"/orders/{sample_order_data['order_id']}"
+
+        assert client.get(path).status_code == 404
+        assert client.get(path, headers={"X-Read-Primary-Until": until}).status_code == 200
+        assert client.get(path, headers={"X-Read-Primary-Until": "soon"}).status_code == 404
+
+
+class TestVersionedReads:
+    """Tests for cached and ETagged reads after a change"""
+
+    def test_lagging_replica_not_cached_or_tagged(
+        self, client, make_router, tmp_path, sample_order_data, wall_clock
+    ):
+        """Test every client reads versioned routes from the primary right after a change"""
+        make_router(seed_replica(tmp_path / "r0.db", "R-0"))
+        for order_id in ("A", "B"):
+            client.post("/orders/", json={**sample_order_data, "order_id": order_id})
+        client.cookies.clear()
+
+        stats = client.get("/orders/stats")
+        revalidated = client.get("/orders/stats", headers={"If-None-Match": stats.headers["ETag"]})
+
+        assert stats.json()["total_orders"] == 2
+        assert revalidated.status_code == 304
+        assert listed(client) == ["B", "A"]
+        assert client.get("/orders/R-0").status_code == 200
+        wall_clock[0] += 6
+        assert listed(client) == ["R-0"]
+
+
+class TestReplicaHealth:
+    """Tests for taking failed replicas out of rotation"""
+
+    def test_failed_replica_skipped(self, client, make_router, tmp_path, clock):
+        """Test a replica that fails to connect is skipped until it is due a retry"""
+        router = make_router(
+            tmp_path / "missing" / "r0.db", seed_replica(tmp_path / "r1.db", "R-1")
+        )
+
+        assert [listed(client) for _ in range(3)] == [["R-1"]] * 3
+        assert router.replicas[0].down_until == clock[0] + 10
+        assert replicas.REPLICA_UP.value(replica="replica0") == 0
+        (tmp_path / "missing").mkdir()
+        seed_replica(tmp_path / "missing" / "r0.db", "R-0")
+        clock[0] += 11
+        assert sorted(listed(client)[0] for _ in range(2)) == ["R-0", "R-1"]
+
+    def test_all_down_reads_primary(self, client, make_router, tmp_path, create_sample_order):
+        """Test reads fall back to the primary when no replica answers"""
+        create_sample_order()
+        make_router(tmp_path / "missing" / "r0.db")
+
+        assert listed(client) == ["ORD-2025-001"]
+        assert listed(client) == ["ORD-2025-001"]
+
+    def test_health_check(self, client, make_router, tmp_path, clock):
+        """Test the periodic check takes replicas out of rotation and back in"""
+        path = tmp_path / "missing" / "r0.db"
+        router = make_router(path)
+        replica = router.replicas[0]
+
+        assert asyncio.run(router.check(replica, 1.0)) is False
+        assert router.next_replica() is None
+        (tmp_path / "missing").mkdir()
+        seed_replica(path, "R-0")
+        assert asyncio.run(router.check(replica, 1.0)) is True
+        assert router.next_replica() is replica
+        assert replicas.REPLICA_UP.value(replica="replica0") == 1
@@ -0,0 +1,119 @@
+"""
+Tests for the daily_revenue rollup maintained by order mutations
+"""
+
+from datetime import date, datetime, timezone
+
+from app import rollup
+from app.models import DailyRevenue, Order
+
+
+def rollup_rows(db_session):
+    """Return the rollup as {(date, currency): (order_count, revenue_sum)}"""
+    db_session.expire_all()
+    return {
+        (row.date, row.currency): (row.order_count, row.revenue_sum)
+        for row in db_session.query(DailyRevenue).all()
+    }
+
+
+class TestRollupMaintenance:
+    """Tests for rollup updates on create, update and delete"""
+
+    def test_create_order_adds_to_rollup(self, client, db_session, sample_order_data):
+        """Test creating orders accumulates count and revenue per day"""
+        for i in range(2):
+            order_data = sample_order_data.copy()
+            order_data["order_id"] = f"ORD-ROLL-{i:03d}"
+            order_data["order_date"] = "2025-02-01T10:00:00Z"
+            order_data["total_amount"] = 1000
+            client.post("/orders/", json=order_data)
+
+        assert rollup_rows(db_session) == {(date(2025, 2, 1), "ISK"): (2, 2000)}
+
+    def test_create_order_without_date_uses_server_default(
+        self, client, db_session, create_sample_order, sample_order_data
+    ):
+        """Test orders without order_date are bucketed under the stored date"""
+        create_sample_order()
+
+        rows = rollup_rows(db_session)
+        assert len(rows) == 1
+        assert list(rows.values()) == [(1, sample_order_data["total_amount"])]
+
+    def test_update_amount(self, client, db_session, sample_order_data):
+        """Test changing total_amount adjusts the revenue of the same bucket"""
+        order_data = {**sample_order_data, "order_date": "2025-02-01T10:00:00Z"}
+        client.post("/orders/", json=order_data)
+
+        client.patch(f"/orders/{order_data['order_id']}", json={"total_amount": 500})
+
+        assert rollup_rows(db_session) == {(date(2025, 2, 1), "ISK"): (1, 500)}
+
+    def test_update_currency_and_date_moves_order(self, client, db_session, sample_order_data):
+        """Test changing currency and order_date moves the order between buckets"""
+        order_data = {**sample_order_data, "order_date": "2025-02-01T10:00:00Z"}
+        client.post("/orders/", json=order_data)
+
+        client.patch(
+            f"/orders/{order_data['order_id']}",
+            json={"currency": "EUR", "order_date": "2025-02-03T08:00:00Z"},
+        )
+
+        assert rollup_rows(db_session) == {
+            (date(2025, 2, 3), "EUR"): (1, sample_order_data["total_amount"])
+        }
+
+    def test_update_status_leaves_rollup_unchanged(self, client, db_session, sample_order_data):
+        """Test updates that do not touch amount, currency or date keep the rollup"""
+        order_data = {**sample_order_data, "order_date": "2025-02-01T10:00:00Z"}
+        client.post("/orders/", json=order_data)
+
+        client.patch(f"/orders/{order_data['order_id']}", json={"status": "shipped"})
+
+        assert rollup_rows(db_session) == {
+            (date(2025, 2, 1), "ISK"): (1, sample_order_data["total_amount"])
+        }
+
+    def test_delete_order_removes_empty_bucket(self, client, db_session, sample_order_data):
+        """Test deleting the last order of a day removes the rollup row"""
+        client.post("/orders/", json=sample_order_data)
+
+        client.delete(f"/orders/{sample_order_data['order_id']}")
+
+        assert rollup_rows(db_session) == {}
+
+
+class TestRollupCheck:
+    """Tests for comparing and rebuilding the rollup"""
+
+    def test_no_mismatches_after_mutations(self, client, db_session, sample_order_data):
+        """Test the rollup matches the orders table after API mutations"""
+        for i, currency in enumerate(["ISK", "USD", "EUR"]):
+            order_data = {**sample_order_data, "order_id": f"ORD-CHK-{i}", "currency": currency}
+            client.post("/orders/", json=order_data)
+        client.patch("/orders/ORD-CHK-1", json={"currency": "GBP", "total_amount": 42})
+        client.delete("/orders/ORD-CHK-2")
+
+        assert rollup.find_mismatches(db_session) == []
+
+    def test_detects_and_rebuilds_drift(self, db_session):
+        """Test rows written behind the rollup's back are detected and rebuilt"""
+        db_session.add(
+            Order(
+                order_id="ORD-DRIFT-001",
+                customer_id="CUST-1",
+                total_amount=700,
+                currency="USD",
+                order_date=datetime(2025, 3, 1, 12, tzinfo=timezone.utc),
+            )
+        )
+        db_session.commit()
+
+        assert rollup.find_mismatches(db_session) == [(date(2025, 3, 1), "USD", (1, 700), (0, 0))]
+
+        rollup.rebuild(db_session)
+        db_session.commit()
+
+        assert rollup.find_mismatches(db_session) == []
+        assert rollup_rows(db_session) == {(date(2025, 3, 1), "USD"): (1, 700)}
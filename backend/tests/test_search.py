@@ -0,0 +1,112 @@
+"""
+Tests for GET /orders/search
+"""
+
+from sqlalchemy.dialects import postgresql
+
+from app import search
+
+
+def order(sample_order_data, order_id, customer_id="CUST-123", day="2025-01-01", **fields):
+    return {
+        **sample_order_data,
+        "order_id": order_id,
+        "customer_id": customer_id,
+        "order_date": f"{day}T12:00:00Z",
+        **fields,
+    }
+
+
+def found(client, **params):
+    return [o["order_id"] for o in client.get("/orders/search", params=params).json()]
+
+
+class TestSearchMatching:
+    """Tests for which orders match and in what order"""
+
+    def test_ranks_exact_prefix_substring(self, client, sample_order_data):
+        """Test exact matches come first, then prefixes, then substrings, newest first"""
+        client.post("/orders/", json=order(sample_order_data, "X-ABC-1", day="2025-03-01"))
+        client.post("/orders/", json=order(sample_order_data, "ABC-2", day="2025-01-01"))
+        client.post("/orders/", json=order(sample_order_data, "ABC-3", day="2025-02-01"))
+        client.post("/orders/", json=order(sample_order_data, "OTHER", customer_id="abc"))
+        client.post("/orders/", json=order(sample_order_data, "NONE"))
+
+        assert found(client, q="abc") == ["OTHER", "ABC-3", "ABC-2", "X-ABC-1"]
+
+    def test_case_insensitive_and_customer_id(self, client, sample_order_data):
+        """Test both columns are searched regardless of case"""
+        client.post("/orders/", json=order(sample_order_data, "ORD-1", customer_id="Cust-Big"))
+        client.post("/orders/", json=order(sample_order_data, "ORD-2", customer_id="cust-small"))
+
+        assert found(client, q="CUST-BIG") == ["ORD-1"]
+        assert found(client, q="sMaLl") == ["ORD-2"]
+
+    def test_short_terms_match_prefix_only(self, client, sample_order_data):
+        """Test terms under three characters do not match in the middle of a value"""
+        client.post("/orders/", json=order(sample_order_data, "AB-1", customer_id="C-1"))
+        client.post("/orders/", json=order(sample_order_data, "X-AB", customer_id="C-2"))
+
+        assert found(client, q="ab") == ["AB-1"]
+
+    def test_wildcards_are_literal(self, client, sample_order_data):
+        """Test % and _ in the term match only themselves"""
+        client.post("/orders/", json=order(sample_order_data, "A_B-1"))
+        client.post("/orders/", json=order(sample_order_data, "AXB-2"))
+
+        assert found(client, q="a_b") == ["A_B-1"]
+        assert found(client, q="%") == []
+        assert search.escape_like("5%_\\") == "5\\%\\_\\\\"
+
+    def test_patterns_are_constants(self, client, sample_order_data):
+        """Test LIKE patterns are inlined, quotes escaped, so generic plans see the prefix"""
+        client.post("/orders/", json=order(sample_order_data, "O'BRIEN-1"))
+        sql = str(
+            search.search_query("abc", 50).compile(
+                dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True}
+            )
+        )
+
+        assert "LIKE '%%abc%%'" in sql
+        assert "LIKE 'abc%%'" in sql
+        assert found(client, q="o'brien") == ["O'BRIEN-1"]
+
+    def test_status_filter(self, client, sample_order_data):
+        """Test status narrows the matches"""
+        client.post("/orders/", json=order(sample_order_data, "ORD-1"))
+        client.post("/orders/", json=order(sample_order_data, "ORD-2", status="shipped"))
+
+        assert found(client, q="ord", status="shipped") == ["ORD-2"]
+
+
+class TestSearchPaging:
+    """Tests for paging through search results"""
+
+    def test_pages_across_ranks(self, client, sample_order_data):
+        """Test the cursor walks every match once, across rank groups"""
+        client.post("/orders/", json=order(sample_order_data, "KEY", customer_id="C-0"))
+        for i in range(3):
+            client.post(
+                "/orders/", json=order(sample_order_data, f"KEY-{i}", day=f"2025-01-0{i + 1}")
+            )
+            client.post(
+                "/orders/", json=order(sample_order_data, f"A-KEY-{i}", day=f"2025-01-0{i + 1}")
+            )
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"q": "key", "limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/orders/search", params=params)
+            seen += [o["order_id"] for o in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+        assert seen == ["KEY", "KEY-2", "KEY-1", "KEY-0", "A-KEY-2", "A-KEY-1", "A-KEY-0"]
+
+    def test_rejects_bad_input(self, client):
+        """Test blank terms and damaged cursors are rejected"""
+        assert client.get("/orders/search", params={"q": "   "}).status_code == 422
+        assert client.get("/orders/search").status_code == 422
+        assert client.get("/orders/search", params={"q": "a", "cursor": "%%%"}).status_code == 400
@@ -0,0 +1,104 @@
+"""
+Tests for /orders/stats endpoint
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from app import stats
+from app.summary import parse_window
+
+
+def order(sample_order_data, order_id, **fields):
+    return {
+        **sample_order_data,
+        "order_id": order_id,
+        "order_date": "2025-01-01T12:00:00Z",
+        **fields,
+    }
+
+
+def today_at_noon() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT12:00:00Z")
+
+
+class TestOrderStatsEndpoint:
+    """Tests for GET /orders/stats"""
+
+    def test_empty_database(self, client):
+        """Test every status is listed with zero orders"""
+        response = client.get("/orders/stats")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["total_orders"], data["today_orders"], data["by_currency"]) == (0, 0, [])
+        assert [s["count"] for s in data["by_status"]] == [0] * 7
+        assert data["by_status"][0]["status"] == "pending"
+
+    def test_counts_and_values(self, client, sample_order_data):
+        """Test status counts, today's orders and per-currency values over all orders"""
+        client.post("/orders/", json=order(sample_order_data, "A", total_amount=100))
+        client.post(
+            "/orders/",
+            json=order(sample_order_data, "B", total_amount=201, order_date=today_at_noon()),
+        )
+        client.post("/orders/", json=order(sample_order_data, "C", status="shipped"))
+        client.post(
+            "/orders/",
+            json=order(sample_order_data, "D", currency="EUR", total_amount=5, status="shipped"),
+        )
+
+        data = client.get("/orders/stats").json()
+
+        assert (data["total_orders"], data["today_orders"]) == (4, 1)
+        counts = {s["status"]: s["count"] for s in data["by_status"]}
+        assert (counts["pending"], counts["shipped"], counts["cancelled"]) == (2, 2, 0)
+        assert data["by_currency"] == [
+            {
+                "currency": "EUR",
+                "order_count": 1,
+                "average_amount": 5.0,
+                "min_amount": 5,
+                "max_amount": 5,
+            },
+            {
+                "currency": "ISK",
+                "order_count": 3,
+                "average_amount": 8763.67,
+                "min_amount": 100,
+                "max_amount": 25990,
+            },
+        ]
+
+    def test_period(self, client, sample_order_data):
+        """Test from and to limit the statistics to local days"""
+        for order_id, day in (("A", "2025-01-10"), ("B", "2025-01-20"), ("C", "2025-02-01")):
+            client.post(
+                "/orders/", json=order(sample_order_data, order_id, order_date=f"{day}T12:00:00Z")
+            )
+
+        data = client.get("/orders/stats", params={"from": "2025-01-15", "to": "2025-02-01"})
+
+        assert data.json()["total_orders"] == 1
+        assert (data.json()["from"], data.json()["to"]) == ("2025-01-15", "2025-02-01")
+        assert client.get("/orders/stats", params={"tz": "Nowhere/Else"}).status_code == 422
+
+    def test_cached_until_write(self, client, sample_order_data):
+        """Test a write is reflected at once despite the cache, and ETags revalidate"""
+        first = client.get("/orders/stats")
+        revalidated = client.get("/orders/stats", headers={"If-None-Match": first.headers["ETag"]})
+        assert revalidated.status_code == 304
+
+        client.post("/orders/", json=order(sample_order_data, "A"))
+
+        assert client.get("/orders/stats").json()["total_orders"] == 1
+
+
+class TestToday:
+    """Tests for the bounds of today"""
+
+    def test_today_in_zone(self):
+        """Test today is the local day of the time zone"""
+        now = datetime.now(timezone.utc)
+        window = parse_window(None, None, "day", "Etc/GMT-14")
+
+        assert stats.today(window) == (now + timedelta(hours=14)).date()
@@ -128,3 +128,151 @@ class TestOrdersSummaryEndpoint:
         data = response.json()
         assert data["total_orders"] == 3
         assert data["total_revenue"][0]["total"] == expected_total
+
+
+class TestOrdersSummaryWindow:
+    """Tests for the from, to, granularity and tz parameters of GET /orders/summary"""
+
+    @pytest.fixture
+    def create_order(self, client, sample_order_data):
+        def _create(order_id, order_date, total_amount=10000, currency="ISK"):
+            order_data = sample_order_data.copy()
+            order_data.update(
+                order_id=order_id,
+                order_date=order_date,
+                total_amount=total_amount,
+                currency=currency,
+            )
+            response = client.post("/orders/", json=order_data)
+            assert response.status_code == 201
+
+        return _create
+
+    def test_defaults_echoed(self, client):
+        """Test the response reports the default window"""
+        data = client.get("/orders/summary").json()
+
+        assert data["granularity"] == "day"
+        assert data["tz"] == "UTC"
+        assert data["from"] is None
+        assert data["to"] is None
+
+    def test_date_range(self, client, create_order):
+        """Test from is inclusive, to is exclusive and totals only cover the range"""
+        create_order("ORD-1", "2025-02-01T10:00:00Z", 1000)
+        create_order("ORD-2", "2025-02-02T10:00:00Z", 2000)
+        create_order("ORD-3", "2025-02-03T10:00:00Z", 4000)
+
+        response = client.get("/orders/summary", params={"from": "2025-02-02", "to": "2025-02-03"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["from"] == "2025-02-02"
+        assert data["to"] == "2025-02-03"
+        assert data["total_orders"] == 1
+        assert data["total_revenue"] == [{"currency": "ISK", "total": 2000}]
+        assert data["revenue_per_day"] == [
+            {"date": "2025-02-02", "currency": "ISK", "revenue": 2000}
+        ]
+
+    def test_week_granularity(self, client, create_order):
+        """Test weeks start on Monday"""
+        create_order("ORD-MON", "2025-02-03T10:00:00Z", 1000)
+        create_order("ORD-SUN", "2025-02-09T10:00:00Z", 2000)
+        create_order("ORD-NEXT-MON", "2025-02-10T10:00:00Z", 4000)
+
+        data = client.get("/orders/summary", params={"granularity": "week"}).json()
+
+        assert data["granularity"] == "week"
+        assert data["revenue_per_day"] == [
+            {"date": "2025-02-10", "currency": "ISK", "revenue": 4000},
+            {"date": "2025-02-03", "currency": "ISK", "revenue": 3000},
+        ]
+
+    def test_month_granularity(self, client, create_order):
+        """Test month buckets per currency, newest first"""
+        create_order("ORD-JAN", "2025-01-31T10:00:00Z", 1000)
+        create_order("ORD-FEB-1", "2025-02-01T10:00:00Z", 2000)
+        create_order("ORD-FEB-2", "2025-02-28T10:00:00Z", 4000)
+        create_order("ORD-FEB-USD", "2025-02-14T10:00:00Z", 500, "USD")
+
+        data = client.get("/orders/summary", params={"granularity": "month"}).json()
+
+        assert data["total_orders"] == 4
+        assert data["revenue_per_day"] == [
+            {"date": "2025-02-01", "currency": "ISK", "revenue": 6000},
+            {"date": "2025-02-01", "currency": "USD", "revenue": 500},
+            {"date": "2025-01-01", "currency": "ISK", "revenue": 1000},
+        ]
+
+    def test_time_zone_shifts_days(self, client, create_order):
+        """Test an order late in the UTC evening falls on the next day in Tokyo"""
+        create_order("ORD-LATE", "2025-02-01T20:00:00Z", 1000)
+
+        utc = client.get("/orders/summary", params={"from": "2025-02-02"}).json()
+        tokyo = client.get(
+            "/orders/summary", params={"from": "2025-02-02", "tz": "Asia/Tokyo"}
+        ).json()
+
+        assert utc["total_orders"] == 0
+        assert tokyo["tz"] == "Asia/Tokyo"
+        assert tokyo["total_orders"] == 1
+        assert tokyo["revenue_per_day"] == [
+            {"date": "2025-02-02", "currency": "ISK", "revenue": 1000}
+        ]
+
+    def test_reykjavik_matches_utc(self, client, create_order):
+        """Test a zone that has always been at UTC+0 gives the UTC days"""
+        create_order("ORD-LATE", "2025-02-01T23:30:00Z", 1000)
+
+        data = client.get("/orders/summary", params={"tz": "Atlantic/Reykjavik"}).json()
+
+        assert data["revenue_per_day"] == [
+            {"date": "2025-02-01", "currency": "ISK", "revenue": 1000}
+        ]
+
+    def test_normalized_by_month(self, client, create_order):
+        """Test normalized revenue uses the same buckets"""
+        client.put(
+            "/fx-rates", json={"currency": "ISK", "effective_date": "2025-01-01", "rate": "1"}
+        )
+        create_order("ORD-1", "2025-02-01T10:00:00Z", 1000)
+        create_order("ORD-2", "2025-02-20T10:00:00Z", 2000)
+
+        data = client.get(
+            "/orders/summary", params={"granularity": "month", "normalize_to": "ISK"}
+        ).json()
+
+        assert data["normalized"]["revenue_per_day"] == [{"date": "2025-02-01", "revenue": 3000}]
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"tz": "Mars/Olympus_Mons"},
+            {"granularity": "hour"},
+            {"from": "2025-02-02", "to": "2025-02-02"},
+            {"from": "not-a-date"},
+        ],
+    )
+    def test_invalid_parameters(self, client, params):
+        """Test invalid windows are rejected with 422"""
+        response = client.get("/orders/summary", params=params)
+
+        assert response.status_code == 422
+
+    def test_changing_offset_needs_postgres(self, client):
+        """Test SQLite rejects zones with daylight saving time"""
+        response = client.get("/orders/summary", params={"tz": "America/New_York"})
+
+        assert response.status_code == 422
+        assert "PostgreSQL" in response.json()["detail"]
+
+    def test_windows_cached_separately(self, client, create_order):
+        """Test the ETag differs between windows"""
+        create_order("ORD-1", "2025-02-01T10:00:00Z")
+
+        day = client.get("/orders/summary")
+        month = client.get("/orders/summary", params={"granularity": "month"})
+
+        assert day.headers["ETag"] != month.headers["ETag"]
+        assert month.json()["revenue_per_day"][0]["date"] == "2025-02-01"
@@ -0,0 +1,168 @@
+"""
+Tests for POST /orders/status-transitions
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app import events, models, transitions
+from app.schemas import OrderStatus
+
+
+def create(client, sample_order_data, order_id, status="pending", **fields):
+    client.post(
+        "/orders/", json={**sample_order_data, "order_id": order_id, "status": status, **fields}
+    )
+
+
+def statuses(client):
+    return {order["order_id"]: order["status"] for order in client.get("/orders/").json()}
+
+
+class TestTransitionRules:
+    """Tests for the allowed transitions"""
+
+    def test_sources(self):
+        """Test the statuses that may move to a target follow the workflow"""
+        assert transitions.sources(OrderStatus.SHIPPED) == ["confirmed", "processing"]
+        assert transitions.sources(OrderStatus.PENDING) == []
+        assert transitions.sources(OrderStatus.CANCELLED) == ["pending", "confirmed", "processing"]
+
+
+class TestTransitionsByOrderId:
+    """Tests for moving orders listed by order_id"""
+
+    def test_reports_each_outcome(self, client, sample_order_data):
+        """Test allowed orders move and the rest are reported by reason"""
+        create(client, sample_order_data, "A", "processing")
+        create(client, sample_order_data, "B", "confirmed")
+        create(client, sample_order_data, "C", "shipped")
+        create(client, sample_order_data, "D", "cancelled")
+
+        response = client.post(
+            "/orders/status-transitions",
+            json={"status": "shipped", "order_ids": ["A", "B", "C", "D", "NOPE", "A"]},
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "status": "shipped",
+            "updated": 2,
+            "unchanged": ["C"],
+            "not_found": ["NOPE"],
+            "not_allowed": [{"order_id": "D", "status": "cancelled"}],
+        }
+        assert statuses(client) == {
+            "A": "shipped",
+            "B": "shipped",
+            "C": "shipped",
+            "D": "cancelled",
+        }
+
+    def test_chunks_and_events(self, client, sample_order_data):
+        """Test every chunk is applied and each moved order gets an updated event"""
+        for i in range(5):
+            create(client, sample_order_data, f"O-{i}", "shipped")
+
+        response = client.post(
+            "/orders/status-transitions",
+            params={"chunk_size": 2},
+            json={"status": "delivered", "order_ids": [f"O-{i}" for i in range(5)]},
+        )
+
+        assert response.json()["updated"] == 5
+        changes = client.get("/orders/changes", params={"since": 0}).json()["events"]
+        updated = [e for e in changes if e["type"] == "updated"]
+        assert sorted(e["order_id"] for e in updated) == [f"O-{i}" for i in range(5)]
+        assert {e["order"]["status"] for e in updated} == {"delivered"}
+
+    def test_failed_chunk_keeps_earlier_ones_visible(self, client, sample_order_data, monkeypatch):
+        """Test chunks committed before a failure invalidate the cache and reach waiters"""
+        for order_id in ("A", "B"):
+            create(client, sample_order_data, order_id)
+        before = client.get("/orders/stats").headers["ETag"]
+        record = events.record
+        calls = []
+
+        async def failing_record(db, event_type, rows):
+            calls.append(event_type)
+            if len(calls) == 2:
+                raise RuntimeError("chunk failed")
+            await record(db, event_type, rows)
+
+        monkeypatch.setattr(events, "record", failing_record)
+        with pytest.raises(RuntimeError):
+            client.post(
+                "/orders/status-transitions",
+                params={"chunk_size": 1},
+                json={"status": "confirmed", "order_ids": ["A", "B"]},
+            )
+
+        stats = client.get("/orders/stats", headers={"If-None-Match": before})
+        assert stats.status_code == 200
+        counts = {s["status"]: s["count"] for s in stats.json()["by_status"]}
+        assert (counts["confirmed"], counts["pending"]) == (1, 1)
+
+    def test_bumps_updated_at(self, client, db_session, sample_order_data):
+        """Test moved orders get a new updated_at, and so a new ETag, as with PATCH"""
+        create(client, sample_order_data, "A", "delivered")
+        order = db_session.query(models.Order).filter_by(order_id="A").one()
+        order.updated_at = datetime(2020, 1, 1, 12, 0, 0)
+        db_session.commit()
+
+        client.post("/orders/status-transitions", json={"status": "completed", "order_ids": ["A"]})
+
+        after = client.get("/orders/A").json()
+        assert after["status"] == "completed"
+        assert not after["updated_at"].startswith("2020-")
+
+
+class TestTransitionsByFilter:
+    """Tests for moving every order matching a filter"""
+
+    def test_moves_matching_allowed_orders(self, client, sample_order_data):
+        """Test only matching orders in an allowed status move, over several chunks"""
+        for i in range(5):
+            create(client, sample_order_data, f"P-{i}", "processing", customer_id="C-1")
+        create(client, sample_order_data, "OTHER", "processing", customer_id="C-2")
+        create(client, sample_order_data, "DONE", "completed", customer_id="C-1")
+
+        response = client.post(
+            "/orders/status-transitions",
+            params={"chunk_size": 2},
+            json={"status": "shipped", "filter": {"customer_id": "C-1"}},
+        )
+
+        assert response.json()["updated"] == 5
+        assert response.json()["not_allowed"] == []
+        result = statuses(client)
+        assert {result[f"P-{i}"] for i in range(5)} == {"shipped"}
+        assert (result["OTHER"], result["DONE"]) == ("processing", "completed")
+
+    def test_requires_one_selection(self, client):
+        """Test order_ids and filter are mutually exclusive and one is required"""
+        both = {"status": "shipped", "order_ids": ["A"], "filter": {"status": "pending"}}
+
+        assert client.post("/orders/status-transitions", json=both).status_code == 422
+        assert (
+            client.post("/orders/status-transitions", json={"status": "shipped"}).status_code == 422
+        )
+        assert (
+            client.post(
+                "/orders/status-transitions", json={"status": "lost", "order_ids": ["A"]}
+            ).status_code
+            == 422
+        )
+
+    def test_empty_filter_rejected(self, client, sample_order_data):
+        """Test a filter without criteria is rejected instead of moving every order"""
+        create(client, sample_order_data, "A")
+
+        for selection in ({}, {"status": None}):
+            response = client.post(
+                "/orders/status-transitions", json={"status": "cancelled", "filter": selection}
+            )
+            assert response.status_code == 422
+
+        assert statuses(client) == {"A": "pending"}
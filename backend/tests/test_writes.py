@@ -0,0 +1,199 @@
+"""
+Tests for the single-statement writes of PATCH and DELETE /orders/{order_id}
+"""
+
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import customers, models, rollup
+from app.auth import SCOPES, ApiKeyPrincipal, verify_api_key
+from app.cache import MemoryBackend, cache
+from app.database import Base, async_database_url, get_async_db, get_session_factory
+from app.main import app
+from app.models import DailyRevenue
+
+ORDER_PATH = "/orders/ORD-2025-001"
+
+
+@contextmanager
+def statements():
+    """Collect the first words of every statement executed on any engine"""
+    executed = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        executed.append(" ".join(statement.split()[:3]))
+
+    event.listen(Engine, "before_cursor_execute", collect)
+    try:
+        yield executed
+    finally:
+        event.remove(Engine, "before_cursor_execute", collect)
+
+
+def on_orders(executed: list[str]) -> list[str]:
+    return [statement for statement in executed if " orders" in statement]
+
+
+class TestRoundTrips:
+    """Tests for the statements each write runs against orders"""
+
+    def test_create_is_one_insert(self, client, sample_order_data):
+        """Test a create inserts and gets the response back in one statement"""
+        with statements() as executed:
+            response = client.post("/orders/", json=sample_order_data)
+
+        assert response.status_code == 201
+        assert on_orders(executed) == ["INSERT INTO orders"]
+
+    def test_status_update_is_one_update(self, client, create_sample_order):
+        """Test a status change is one UPDATE ... RETURNING, without reading the order"""
+        create_sample_order()
+
+        with statements() as executed:
+            response = client.patch(ORDER_PATH, json={"status": "shipped"})
+
+        assert response.json()["status"] == "shipped"
+        assert response.headers["ETag"] == client.get(ORDER_PATH).headers["ETag"]
+        assert on_orders(executed) == ["UPDATE orders SET"]
+
+    def test_delete_is_one_delete(self, client, create_sample_order):
+        """Test a delete needs no read first, the deleted row comes back with RETURNING"""
+        create_sample_order()
+
+        with statements() as executed:
+            assert client.delete(ORDER_PATH).status_code == 204
+
+        assert on_orders(executed) == ["DELETE FROM orders"]
+
+    def test_missing_order(self, client):
+        """Test not-found is told from the empty RETURNING of either write"""
+        with statements() as executed:
+            assert client.patch("/orders/NOPE", json={"status": "shipped"}).status_code == 404
+            assert client.delete("/orders/NOPE").status_code == 404
+
+        assert on_orders(executed) == ["UPDATE orders SET", "DELETE FROM orders"]
+
+
+class TestOldValues:
+    """Tests for writes that need the order as it was"""
+
+    def test_stale_etag_leaves_rollup(self, client, db_session, create_sample_order):
+        """Test a rejected amount change is rolled back along with its rollup deltas"""
+        create_sample_order()
+        stale = client.get(ORDER_PATH).headers["ETag"]
+        order = db_session.query(models.Order).filter_by(order_id="ORD-2025-001").one()
+        order.updated_at = datetime(2030, 1, 1, 12, 0, 0)
+        db_session.commit()
+
+        response = client.patch(ORDER_PATH, json={"total_amount": 5}, headers={"If-Match": stale})
+
+        assert response.status_code == 412
+        db_session.expire_all()
+        assert [row.revenue_sum for row in db_session.query(DailyRevenue)] == [25990]
+        assert client.get(ORDER_PATH).json()["total_amount"] == 25990
+
+    def test_deleted_before_update(self, client, create_sample_order):
+        """Test an order deleted between reading it and updating it gives 404"""
+        create_sample_order()
+
+        def delete_first(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE orders"):
+                cursor.execute("DELETE FROM orders")
+
+        event.listen(Engine, "before_cursor_execute", delete_first)
+        try:
+            response = client.patch(ORDER_PATH, json={"total_amount": 5})
+        finally:
+            event.remove(Engine, "before_cursor_execute", delete_first)
+
+        assert response.status_code == 404
+
+
+@pytest.fixture
+def postgres(sample_order_data):
+    """A client and session on the scratch database in $BENCH_POSTGRES_URL, with one order"""
+    url = os.environ.get("BENCH_POSTGRES_URL")
+    if not url:
+        pytest.skip("BENCH_POSTGRES_URL is not set")
+    # A scratch database, like the benchmarks use: its tables are dropped
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    async_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+    session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    cache.backend = MemoryBackend()
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    app.dependency_overrides[verify_api_key] = lambda: ApiKeyPrincipal(
+        key_hash="test", name="test", scopes=frozenset(SCOPES)
+    )
+    try:
+        with sessionmaker(bind=engine)() as db, TestClient(app) as client:
+            assert client.post("/orders/", json=sample_order_data).status_code == 201
+            yield client, db
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+@pytest.mark.integration
+class TestPostgresOldValues:
+    """Tests for the UPDATE ... FROM (SELECT ... FOR UPDATE) path, run on $BENCH_POSTGRES_URL"""
+
+    def test_counted_change_is_one_update(self, postgres):
+        """Test a currency, amount and date change moves the rollup and customer_stats"""
+        client, db = postgres
+        changes = {"currency": "EUR", "total_amount": 1500, "order_date": "2025-03-01T12:00:00Z"}
+        headers = {"If-Match": client.get(ORDER_PATH).headers["ETag"]}
+
+        with statements() as executed:
+            response = client.patch(ORDER_PATH, json=changes, headers=headers)
+
+        assert response.status_code == 200
+        order = response.json()
+        assert (order["currency"], order["total_amount"]) == ("EUR", 1500)
+        assert order["order_date"].startswith("2025-03-01")
+        assert response.headers["ETag"] == client.get(ORDER_PATH).headers["ETag"]
+        assert on_orders(executed) == ["UPDATE orders SET"]
+        assert [(row.currency, row.revenue_sum) for row in db.query(DailyRevenue)] == [
+            ("EUR", 1500)
+        ]
+        assert rollup.find_mismatches(db) == []
+        assert customers.find_mismatches(db) == []
+
+    def test_stale_etag_leaves_order(self, postgres):
+        """Test If-Match is checked against the locked old version and a 412 rolls back"""
+        client, db = postgres
+        stale = client.get(ORDER_PATH).headers["ETag"]
+        order = db.query(models.Order).filter_by(order_id="ORD-2025-001").one()
+        order.updated_at = datetime(2030, 1, 1, 12, 0, 0)
+        db.commit()
+
+        response = client.patch(ORDER_PATH, json={"total_amount": 5}, headers={"If-Match": stale})
+
+        assert response.status_code == 412
+        assert client.get(ORDER_PATH).json()["total_amount"] == 25990
+        assert rollup.find_mismatches(db) == []
+        assert customers.find_mismatches(db) == []
+
+    def test_missing_order(self, postgres):
+        """Test the joined UPDATE finds no row for an unknown order_id"""
+        client, _ = postgres
+
+        response = client.patch("/orders/NOPE", json={"total_amount": 5})
+
+        assert response.status_code == 404
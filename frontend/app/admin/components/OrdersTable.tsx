@@ -29,6 +29,9 @@ interface OrdersTableProps {
     onStatusFilterChange: (status: string) => void;
     onSearchQueryChange: (query: string) => void;
     onRefresh: () => void;
+    hasMore: boolean;
+    isLoadingMore: boolean;
+    onLoadMore: () => void;
 }
 
 export function OrdersTable({
@@ -40,6 +43,9 @@ export function OrdersTable({
     onStatusFilterChange,
     onSearchQueryChange,
     onRefresh,
+    hasMore,
+    isLoadingMore,
+    onLoadMore,
 }: OrdersTableProps) {
     const [isRefreshing, setIsRefreshing] = useState(false);
     const [showSuccess, setShowSuccess] = useState(false);
@@ -229,6 +235,19 @@ export function OrdersTable({
                                 ))}
                             </Table.Body>
                         </Table.Root>
+                        {hasMore && (
+                            <HStack justify="center" pt={4}>
+                                <Button
+                                    size="sm"
+                                    variant="outline"
+                                    onClick={onLoadMore}
+                                    disabled={isLoadingMore}
+                                    aria-label="Load older orders"
+                                >
+                                    {isLoadingMore ? <Spinner size="sm" /> : 'Load more'}
+                                </Button>
+                            </HStack>
+                        )}
                     </Box>
                 )}
             </Card.Body>
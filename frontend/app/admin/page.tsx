@@ -1,10 +1,10 @@
 'use client';
 
 import { Box, Button, Container, Card, Badge, Grid, Stack } from '@chakra-ui/react';
-import { useEffect, useState } from 'react';
+import { useEffect, useMemo, useState } from 'react';
 import styles from './admin.module.css';
 import { RevenueChart } from '../../components/RevenueChart';
-import { useQuery } from '@tanstack/react-query';
+import { keepPreviousData, useInfiniteQuery, useQuery } from '@tanstack/react-query';
 
 // Components
 import { DashboardHeader } from './components/DashboardHeader';
@@ -34,35 +34,80 @@ export default function AdminDashboard() {
         refetchIntervalInBackground: true,
     });
 
+    const { data: orderStats, refetch: refetchStats } = useQuery({
+        queryKey: ['stats'],
+        queryFn: () => orderService.fetchStats(),
+        refetchInterval: 30000,
+        refetchIntervalInBackground: true,
+    });
+
+    const [statusFilter, setStatusFilter] = useState<string>('all');
+
+    // The server filters by status, so pages that are not loaded yet are not missed
     const { 
-        data: orders = [], 
+        data: orderPages, 
         isLoading: ordersLoading,
         error: ordersError,
-        refetch: refetchOrders 
-    } = useQuery({
-        queryKey: ['orders'],
-        queryFn: () => orderService.fetchOrders(50),
+        refetch: refetchOrders,
+        fetchNextPage,
+        hasNextPage,
+        isFetchingNextPage,
+    } = useInfiniteQuery({
+        queryKey: ['orders', statusFilter],
+        queryFn: ({ pageParam }) => orderService.fetchOrdersPage(statusFilter, 50, pageParam),
+        initialPageParam: null as string | null,
+        getNextPageParam: (lastPage) => lastPage.nextCursor,
+        // Keep showing the current orders while another status loads
+        placeholderData: keepPreviousData,
         refetchInterval: 30000,
         refetchIntervalInBackground: true,
     });
+    const orders = useMemo(
+        () => orderPages?.pages.flatMap(page => page.orders) ?? [],
+        [orderPages],
+    );
 
     const [filteredOrders, setFilteredOrders] = useState<Order[]>([]);
-    const [statusFilter, setStatusFilter] = useState<string>('all');
     const [currencyFilter, setCurrencyFilter] = useState<string>('ISK');
     const [searchQuery, setSearchQuery] = useState<string>('');
+    const [searchTerm, setSearchTerm] = useState<string>('');
     const [currencyView, setCurrencyView] = useState<CurrencyView>('grid');
     const [lastRefresh, setLastRefresh] = useState<Date>(new Date());
 
     // Calculate derived data
-    const statistics = orderService.calculateStatistics(orders);
-    const totalRevenueISK = summary ? currencyService.calculateTotalRevenueISK(summary.total_revenue) : 0;
-    const currencyBreakdown = summary ? currencyService.createCurrencyBreakdown(summary.total_revenue) : [];
+    const statistics = orderService.toStatistics(orderStats);
+    const totalRevenueISK = summary ? currencyService.calculateTotalRevenueISK(summary) : 0;
+    const currencyBreakdown = summary ? currencyService.createCurrencyBreakdown(summary) : [];
+
+    // Search on the server once typing pauses, across all orders rather than the loaded pages
+    useEffect(() => {
+        const timeout = setTimeout(() => setSearchTerm(searchQuery.trim()), 300);
+        return () => clearTimeout(timeout);
+    }, [searchQuery]);
+
+    const {
+        data: searchPages,
+        fetchNextPage: fetchNextSearchPage,
+        hasNextPage: hasNextSearchPage,
+        isFetchingNextPage: isFetchingNextSearchPage,
+    } = useInfiniteQuery({
+        queryKey: ['orders', 'search', searchTerm, statusFilter],
+        queryFn: ({ pageParam }) =>
+            orderService.searchOrders(searchTerm, statusFilter, 50, pageParam),
+        initialPageParam: null as string | null,
+        getNextPageParam: (lastPage) => lastPage.nextCursor,
+        enabled: searchTerm !== '',
+    });
+    const searching = searchTerm !== '';
 
-    // Apply filters when orders or filters change
+    // Show search results while searching, otherwise the status-filtered pages
     useEffect(() => {
-        const filtered = orderService.applyFilters(orders, statusFilter, searchQuery);
-        setFilteredOrders(filtered);
-    }, [statusFilter, searchQuery, orders]);
+        if (searching) {
+            setFilteredOrders(searchPages?.pages.flatMap(page => page.orders) ?? []);
+        } else {
+            setFilteredOrders(orders);
+        }
+    }, [searching, searchPages, orders]);
 
     // Update last refresh timestamp
     useEffect(() => {
@@ -74,6 +119,7 @@ export default function AdminDashboard() {
     // Handle manual refresh
     const handleRefresh = () => {
         refetchSummary();
+        refetchStats();
         refetchOrders();
         setLastRefresh(new Date());
     };
@@ -174,6 +220,9 @@ export default function AdminDashboard() {
                         onStatusFilterChange={setStatusFilter}
                         onSearchQueryChange={setSearchQuery}
                         onRefresh={handleRefresh}
+                        hasMore={searching ? hasNextSearchPage : hasNextPage}
+                        isLoadingMore={searching ? isFetchingNextSearchPage : isFetchingNextPage}
+                        onLoadMore={() => (searching ? fetchNextSearchPage() : fetchNextPage())}
                     />
 
                     {/* Info Footer */}
@@ -1,14 +1,4 @@
-import type { CurrencyTotal, CurrencyBreakdownItem } from '../types/order.types';
-
-// Currency conversion rates (approximate - for display purposes)
-export const CURRENCY_RATES: Record<string, number> = {
-    ISK: 1,
-    USD: 138.89,
-    EUR: 153.85,
-    GBP: 175.45,
-    SEK: 13.86,
-    NOK: 12.84,
-};
+import type { CurrencyTotal, CurrencyBreakdownItem, Summary } from '../types/order.types';
 
 export const currencyService = {
     /**
@@ -27,30 +17,24 @@ export const currencyService = {
     },
 
     /**
-     * Convert amount to ISK equivalent
+     * Total revenue in ISK, converted by the server at each day's FX rate
      */
-    toISK(amount: number, currency: string): number {
-        return amount * (CURRENCY_RATES[currency] || 1);
-    },
-
-    /**
-     * Calculate total revenue in ISK
-     */
-    calculateTotalRevenueISK(currencyTotals: CurrencyTotal[]): number {
-        return currencyTotals.reduce((sum, rev) => {
-            return sum + this.toISK(rev.total, rev.currency);
-        }, 0);
+    calculateTotalRevenueISK(summary: Summary): number {
+        return summary.normalized?.total ?? 0;
     },
 
     /**
      * Create currency breakdown with ISK equivalents and percentages
      */
-    createCurrencyBreakdown(currencyTotals: CurrencyTotal[]): CurrencyBreakdownItem[] {
-        const totalRevenueISK = this.calculateTotalRevenueISK(currencyTotals);
-        
-        return currencyTotals
+    createCurrencyBreakdown(summary: Summary): CurrencyBreakdownItem[] {
+        const totalRevenueISK = this.calculateTotalRevenueISK(summary);
+        const iskByCurrency = new Map(
+            (summary.normalized?.total_by_currency ?? []).map(ct => [ct.currency, ct.total]),
+        );
+
+        return summary.total_revenue
             .map(rev => {
-                const iskEquivalent = this.toISK(rev.total, rev.currency);
+                const iskEquivalent = iskByCurrency.get(rev.currency) ?? 0;
                 const percentage = totalRevenueISK > 0 ? (iskEquivalent / totalRevenueISK) * 100 : 0;
                 return {
                     ...rev,
@@ -1,4 +1,4 @@
-import type { Order, Summary } from '../types/order.types';
+import type { Order, OrderPage, OrderStats, Statistics, Summary } from '../types/order.types';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:5000';
 const API_KEY = process.env.NEXT_PUBLIC_API_KEY || '';
@@ -18,10 +18,10 @@ const getHeaders = (): HeadersInit => {
 
 export const orderService = {
     /**
-     * Fetch summary data including total orders and revenue
+     * Fetch summary data including total orders and revenue, with totals in ISK
      */
     async fetchSummary(): Promise<Summary> {
-        const response = await fetch(`${API_BASE_URL}/orders/summary`, {
+        const response = await fetch(`${API_BASE_URL}/orders/summary?normalize_to=ISK`, {
             headers: getHeaders(),
         });
         if (!response.ok) {
@@ -44,66 +44,85 @@ export const orderService = {
     },
 
     /**
-     * Filter orders by status
+     * Fetch one page of orders, newest first, filtered by status on the server.
+     * Pass the previous page's nextCursor to continue where it ended.
      */
-    filterByStatus(orders: Order[], status: string): Order[] {
-        if (status === 'all') {
-            return orders;
+    async fetchOrdersPage(
+        status: string = 'all',
+        limit: number = 50,
+        cursor?: string | null,
+    ): Promise<OrderPage> {
+        const params = new URLSearchParams({ limit: String(limit) });
+        if (status !== 'all') {
+            params.set('status', status);
         }
-        return orders.filter(order => order.status === status);
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
+        const response = await fetch(`${API_BASE_URL}/orders/?${params}`, {
+            headers: getHeaders(),
+        });
+        if (!response.ok) {
+            throw new Error('Failed to fetch orders');
+        }
+        return {
+            orders: await response.json(),
+            nextCursor: response.headers.get('X-Next-Cursor'),
+        };
     },
 
     /**
-     * Filter orders by search query (order_id or customer_id)
+     * Search all orders by order_id or customer_id on the server, best matches
+     * first. Pass the previous page's nextCursor to continue where it ended.
      */
-    filterBySearch(orders: Order[], query: string): Order[] {
-        if (!query) {
-            return orders;
+    async searchOrders(
+        query: string,
+        status: string = 'all',
+        limit: number = 50,
+        cursor?: string | null,
+    ): Promise<OrderPage> {
+        const params = new URLSearchParams({ q: query, limit: String(limit) });
+        if (status !== 'all') {
+            params.set('status', status);
+        }
+        if (cursor) {
+            params.set('cursor', cursor);
         }
-        const lowerQuery = query.toLowerCase();
-        return orders.filter(order => 
-            order.order_id.toLowerCase().includes(lowerQuery) ||
-            order.customer_id.toLowerCase().includes(lowerQuery)
-        );
+        const response = await fetch(`${API_BASE_URL}/orders/search?${params}`, {
+            headers: getHeaders(),
+        });
+        if (!response.ok) {
+            throw new Error('Failed to search orders');
+        }
+        return {
+            orders: await response.json(),
+            nextCursor: response.headers.get('X-Next-Cursor'),
+        };
     },
 
     /**
-     * Apply combined filters (status and search)
+     * Fetch order counts and per-currency order values over all orders, with
+     * today counted in UTC like the summary
      */
-    applyFilters(orders: Order[], statusFilter: string, searchQuery: string): Order[] {
-        let filtered = orders;
-        
-        if (statusFilter !== 'all') {
-            filtered = this.filterByStatus(filtered, statusFilter);
-        }
-        
-        if (searchQuery) {
-            filtered = this.filterBySearch(filtered, searchQuery);
+    async fetchStats(): Promise<OrderStats> {
+        const response = await fetch(`${API_BASE_URL}/orders/stats`, {
+            headers: getHeaders(),
+        });
+        if (!response.ok) {
+            throw new Error('Failed to fetch statistics');
         }
-        
-        return filtered;
+        return response.json();
     },
 
     /**
-     * Calculate statistics from orders
+     * Pick the dashboard figures out of the stats, averaging orders in one currency
      */
-    calculateStatistics(orders: Order[]) {
-        const averageOrderValue = orders.length > 0 
-            ? orders.reduce((sum, o) => sum + o.total_amount, 0) / orders.length 
-            : 0;
-
-        const todayOrders = orders.filter(o => {
-            const orderDate = new Date(o.order_date).toDateString();
-            const today = new Date().toDateString();
-            return orderDate === today;
-        }).length;
-
-        const pendingOrders = orders.filter(o => o.status === 'pending').length;
-
+    toStatistics(stats: OrderStats | undefined, currency: string = 'ISK'): Statistics {
         return {
-            averageOrderValue,
-            todayOrders,
-            pendingOrders,
+            averageOrderValue:
+                stats?.by_currency.find(c => c.currency === currency)?.average_amount ?? 0,
+            todayOrders: stats?.today_orders ?? 0,
+            pendingOrders: stats?.by_status.find(s => s.status === 'pending')?.count ?? 0,
         };
     },
 
@@ -9,6 +9,11 @@ export interface Order {
     created_at: string;
 }
 
+export interface OrderPage {
+    orders: Order[];
+    nextCursor: string | null;
+}
+
 export interface CurrencyTotal {
     currency: string;
     total: number;
@@ -20,10 +25,18 @@ export interface DailyRevenue {
     revenue: number;
 }
 
+export interface NormalizedRevenue {
+    currency: string;
+    total: number;
+    total_by_currency: CurrencyTotal[];
+    revenue_per_day: { date: string; revenue: number }[];
+}
+
 export interface Summary {
     total_orders: number;
     total_revenue: CurrencyTotal[];
     revenue_per_day: DailyRevenue[];
+    normalized: NormalizedRevenue | null;
 }
 
 export interface CurrencyBreakdownItem extends CurrencyTotal {
@@ -31,6 +44,26 @@ export interface CurrencyBreakdownItem extends CurrencyTotal {
     percentage: number;
 }
 
+export interface StatusCount {
+    status: string;
+    count: number;
+}
+
+export interface CurrencyOrderStats {
+    currency: string;
+    order_count: number;
+    average_amount: number;
+    min_amount: number;
+    max_amount: number;
+}
+
+export interface OrderStats {
+    total_orders: number;
+    today_orders: number;
+    by_status: StatusCount[];
+    by_currency: CurrencyOrderStats[];
+}
+
 export interface Statistics {
     averageOrderValue: number;
     todayOrders: number;